@@ -20,24 +20,22 @@ Dynamic Itinerary Optimization, Collaborative Filtering
 import datetime
 import operator
 import os
-from typing import Annotated, TypedDict
+import sys
+import threading
+import time
+from typing import Annotated, Any, Dict, TypedDict
 
 from dotenv import load_dotenv
-from langchain_core.messages import AnyMessage, HumanMessage, SystemMessage, ToolMessage
-from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.memory import MemorySaver
-from langgraph.graph import END, StateGraph
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
 
+from agents.control.budget import LLM_CALLS, TOOL_CALLS, LoopBudget, local_summary, turn_usage
+from agents.metrics.recorder import record_event
 from agents.privacy.masking import mask_pii, mask_pii_in_obj
 from agents.security.intent_filter import is_malicious, sanitize
-
-from agents.tools.flights_finder import flights_finder
-from agents.tools.hotels_finder import hotels_finder
-from agents.tools.weather import weather_tool
-from agents.tools.flight_status import flight_status_tool
-from agents.itinerary.itinerary_builder import itinerary_builder
+from agents.tools.registry import (all_tools, execution_order, invoke_tool, planner_hints, tool_names, turn_cache,
+                                   turn_scope)
+from agents.tracing.tracer import payload_size, span, traced
 
 _ = load_dotenv()
 
@@ -46,6 +44,8 @@ CURRENT_YEAR = datetime.datetime.now().year
 
 class AgentState(TypedDict):
     messages: Annotated[list[AnyMessage], operator.add]
+    # Unix time of the current turn's first LLM call, for the wall-clock budget.
+    turn_started: float
 
 
 PROJECT_METADATA = {
@@ -88,7 +88,9 @@ TOOLS_SYSTEM_PROMPT = f"""You are a smart travel agency assistant working for Vo
     """
 
 
-TOOLS = [flights_finder, hotels_finder, weather_tool, flight_status_tool, itinerary_builder]
+BUDGET_SUMMARY_PROMPT = """The budget for this request has been used up, so no more tools can be called.
+Answer now using only the information gathered so far, following the output guidance above,
+and say briefly which parts of the request could not be completed."""
 
 
 EMAILS_SYSTEM_PROMPT = """Your task is to convert structured markdown-like text into a valid HTML email body.
@@ -148,11 +150,87 @@ Expected Output:
 """
 
 
+def _llm_usage(message) -> dict:
+    usage = getattr(message, 'usage_metadata', None) or {}
+    return {
+        'input_tokens': usage.get('input_tokens', 0),
+        'output_tokens': usage.get('output_tokens', 0),
+        'total_tokens': usage.get('total_tokens', 0),
+    }
+
+
+def __getattr__(name: str):
+    # `ChatOpenAI` (langchain_openai is slow to import) and `TOOLS` are resolved on first access.
+    if name == 'ChatOpenAI':
+        from langchain_openai import ChatOpenAI
+        globals()['ChatOpenAI'] = ChatOpenAI
+        return ChatOpenAI
+    if name == 'TOOLS':
+        return all_tools()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def _chat_model(**kwargs):
+    # Looked up on the module so tests and benchmarks can patch `agents.agent.ChatOpenAI`.
+    return sys.modules[__name__].ChatOpenAI(**kwargs)
+
+
+_TOOLS_LLM: Dict[str, Any] = {}
+_GRAPH: Dict[str, Any] = {}
+_LOCK = threading.Lock()
+
+
+def _tools_llm():
+    """The tool-calling LLM, bound to every registered tool on first use."""
+    factory = sys.modules[__name__].ChatOpenAI
+    if _TOOLS_LLM.get('factory') is not factory:
+        with _LOCK:
+            if _TOOLS_LLM.get('factory') is not factory:
+                _TOOLS_LLM['llm'] = _chat_model(model='gpt-4o').bind_tools(all_tools())
+                _TOOLS_LLM['factory'] = factory
+    return _TOOLS_LLM['llm']
+
+
+def _email_fields(config: RunnableConfig) -> Dict[str, str]:
+    # Per-session addresses travel in the run config; the environment only supplies defaults.
+    configurable = (config or {}).get('configurable') or {}
+    return {
+        'from_email': configurable.get('from_email') or os.environ['FROM_EMAIL'],
+        'to_emails': configurable.get('to_email') or os.environ['TO_EMAIL'],
+        'subject': configurable.get('email_subject') or os.environ.get('EMAIL_SUBJECT', 'Travel Information'),
+    }
+
+
 class Agent:
+    """Entry point holding the compiled graph.
+
+    The nodes keep no per-instance state, so the graph (and its checkpointer)
+    is compiled once per process and shared by every `Agent`; conversations
+    are kept apart by their `thread_id`.
+    """
 
     def __init__(self):
-        self._tools = {t.name: t for t in TOOLS}
-        self._tools_llm = ChatOpenAI(model='gpt-4o').bind_tools(TOOLS)
+        self.graph = _GRAPH.get('graph') or self._compile()
+
+    def invoke(self, inputs, config: Dict[str, Any]):
+        """Run one turn of the graph (`inputs` None resumes it) under a root `plan` span.
+
+        The node, tool and gateway spans of the turn become its children, so a
+        plan is one trace with one sampling decision.
+        """
+        with span('plan', thread_id=config['configurable'].get('thread_id'), resumed=inputs is None):
+            return self.graph.invoke(inputs, config=config)
+
+    def _compile(self):
+        with _LOCK:
+            if 'graph' in _GRAPH:
+                return _GRAPH['graph']
+            _GRAPH['graph'] = self._build()
+        return _GRAPH['graph']
+
+    def _build(self):
+        from langgraph.checkpoint.memory import MemorySaver
+        from langgraph.graph import END, StateGraph
 
         builder = StateGraph(AgentState)
         builder.add_node('call_tools_llm', self.call_tools_llm)
@@ -164,9 +242,22 @@ class Agent:
         builder.add_edge('invoke_tools', 'call_tools_llm')
         builder.add_edge('email_sender', END)
         memory = MemorySaver()
-        self.graph = builder.compile(checkpointer=memory, interrupt_before=['email_sender'])
+        return builder.compile(checkpointer=memory, interrupt_before=['email_sender'])
 
-        print(self.graph.get_graph().draw_mermaid())
+    def prefetch(self, query: str, config: Dict[str, Any], today=None):
+        """Start the searches `query` likely needs before the graph runs; call `.finish()` on the result after.
+
+        The calls are parked in the turn cache of the user message about to be
+        added to the conversation, so `invoke_tools` picks them up.
+        """
+        from agents.tools.prefetch import prefetch
+
+        messages = (self.graph.get_state(config).values or {}).get('messages', [])
+        turn = sum(1 for m in messages if isinstance(m, HumanMessage)) + 1
+        return prefetch(query, turn_cache(((config.get('configurable') or {}).get('thread_id'), turn)), today)
+
+    def mermaid(self) -> str:
+        return self.graph.get_graph().draw_mermaid()
 
     @staticmethod
     def exists_action(state: AgentState):
@@ -175,27 +266,37 @@ class Agent:
             return 'email_sender'
         return 'more_tools'
 
-    def email_sender(self, state: AgentState):
+    @traced('node.email_sender')
+    def email_sender(self, state: AgentState, config: RunnableConfig):
+        from sendgrid import SendGridAPIClient
+        from sendgrid.helpers.mail import Mail
+
         print('Sending email')
-        email_llm = ChatOpenAI(model='gpt-4o', temperature=0.1)  # Instantiate another LLM
+        email_llm = _chat_model(model='gpt-4o', temperature=0.1)  # Instantiate another LLM
         email_message = [SystemMessage(content=EMAILS_SYSTEM_PROMPT), HumanMessage(content=state['messages'][-1].content)]
-        email_response = email_llm.invoke(email_message)
+        with span('llm.invoke', model='gpt-4o', purpose='email',
+                  prompt_chars=sum(payload_size(m.content) for m in email_message)) as s:
+            email_response = email_llm.invoke(email_message)
+            s.set(completion_chars=payload_size(email_response.content), **_llm_usage(email_response))
         print('Email content:', email_response.content)
 
         # Mask PII in the generated HTML email body before sending
-        safe_html = mask_pii(email_response.content)
-        message = Mail(from_email=os.environ['FROM_EMAIL'], to_emails=os.environ['TO_EMAIL'], subject=os.environ['EMAIL_SUBJECT'],
-                       html_content=safe_html)
+        with span('mask_pii', payload_chars=payload_size(email_response.content)):
+            safe_html = mask_pii(email_response.content)
+        message = Mail(**_email_fields(config), html_content=safe_html)
         try:
-            sg = SendGridAPIClient(os.environ.get('SENDGRID_API_KEY'))
-            response = sg.send(message)
+            with span('email.send', payload_chars=len(safe_html)) as s:
+                sg = SendGridAPIClient(os.environ.get('SENDGRID_API_KEY'))
+                response = sg.send(message)
+                s.set(status_code=response.status_code)
             print(response.status_code)
             print(response.body)
             print(response.headers)
         except Exception as e:
             print(str(e))
 
-    def call_tools_llm(self, state: AgentState):
+    @traced('node.call_tools_llm')
+    def call_tools_llm(self, state: AgentState, config: RunnableConfig):
         messages = state['messages']
         # Intent filtering: check human messages for jailbreak/malicious intent
         human_msgs = [m for m in messages if isinstance(m, HumanMessage)]
@@ -207,25 +308,83 @@ class Agent:
                                        " Please rephrase your query without instructions to bypass safety.")
                 return {'messages': [refuse]}
 
-        messages = [SystemMessage(content=TOOLS_SYSTEM_PROMPT)] + messages
-        message = self._tools_llm.invoke(messages)
-        return {'messages': [message]}
-
-    def invoke_tools(self, state: AgentState):
+        # Stop the tool loop once any budget for this turn runs out, answering with what we have.
+        usage = turn_usage(messages)
+        now = time.time()
+        started = (state.get('turn_started') or now) if usage[LLM_CALLS] else now
+        reason = LoopBudget.from_config(config).exhausted(usage, now - started)
+        if reason is not None:
+            return {'messages': [self._summarize(messages, reason, usage)]}
+
+        messages = [SystemMessage(content=TOOLS_SYSTEM_PROMPT + '\n' + planner_hints())] + messages
+        with span('llm.invoke', model='gpt-4o', purpose='tools',
+                  prompt_chars=sum(payload_size(m.content) for m in messages)) as s:
+            message = _tools_llm().invoke(messages)
+            s.set(completion_chars=payload_size(message.content), tool_calls=len(message.tool_calls),
+                  **_llm_usage(message))
+        return {'messages': [message], 'turn_started': started}
+
+    def _summarize(self, messages, reason: str, usage: dict) -> AIMessage:
+        record_event(f'budget_exhausted.{reason}')
+        with span('budget.exhausted', reason=reason, **usage):
+            if reason not in (LLM_CALLS, TOOL_CALLS):
+                # Out of time or tokens: another LLM round-trip is not affordable.
+                return AIMessage(content=local_summary(messages, reason))
+            prompt = ([SystemMessage(content=TOOLS_SYSTEM_PROMPT)] + messages
+                      + [SystemMessage(content=BUDGET_SUMMARY_PROMPT)])
+            with span('llm.invoke', model='gpt-4o', purpose='summary',
+                      prompt_chars=sum(payload_size(m.content) for m in prompt)) as s:
+                response = _chat_model(model='gpt-4o').invoke(prompt)
+                s.set(completion_chars=payload_size(response.content), **_llm_usage(response))
+        # Drop any tool calls so the graph ends the loop here.
+        return AIMessage(content=response.content, usage_metadata=getattr(response, 'usage_metadata', None))
+
+    @traced('node.invoke_tools')
+    def invoke_tools(self, state: AgentState, config: RunnableConfig):
         tool_calls = state['messages'][-1].tool_calls
-        results = []
-        for t in tool_calls:
-            print(f'Calling: {t}')
-            if not t['name'] in self._tools:  # check for bad tool name from LLM
-                print('\n ....bad tool name....')
-                result = 'bad tool name, retry'  # instruct LLM to retry if bad
-            else:
-                result = self._tools[t['name']].invoke(t['args'])
-                # Mask any detected PII in the tool result before returning it to the model
-                try:
-                    masked = mask_pii_in_obj(result)
-                except Exception:
-                    masked = result
-            results.append(ToolMessage(tool_call_id=t['id'], name=t['name'], content=str(masked)))
+        # Calls beyond the turn's tool budget are answered without running them.
+        allowed = LoopBudget.from_config(config).remaining_tool_calls(turn_usage(state['messages']))
+        # Tool results are reused for the rest of the user's turn (see agents/tools/registry.py).
+        turn = sum(1 for m in state['messages'] if isinstance(m, HumanMessage))
+        cache = turn_cache(((config.get('configurable') or {}).get('thread_id'), turn))
+        results = [None] * len(tool_calls)
+        with turn_scope(cache):
+            # Covering tools (itinerary_builder) run first so their sub-searches can answer the others.
+            for i in execution_order(t['name'] for t in tool_calls):
+                t = tool_calls[i]
+                print(f'Calling: {t}')
+                if i >= allowed:
+                    masked = 'tool budget exhausted; answer with the information already gathered'
+                elif t['name'] not in tool_names():  # check for bad tool name from LLM
+                    print('\n ....bad tool name....')
+                    masked = 'bad tool name, retry'  # instruct LLM to retry if bad
+                else:
+                    with span(f'tool.{t["name"]}', args_chars=payload_size(t['args'])) as s:
+                        result = invoke_tool(t['name'], t['args'])
+                        result_chars = payload_size(result)
+                        s.set(result_chars=result_chars)
+                    # Mask any detected PII in the tool result before returning it to the model
+                    with span('mask_pii_in_obj', payload_chars=result_chars):
+                        try:
+                            masked = mask_pii_in_obj(result)
+                        except Exception:
+                            masked = result
+                results[i] = ToolMessage(tool_call_id=t['id'], name=t['name'], content=str(masked))
         print('Back to the model!')
         return {'messages': results}
+
+
+_AGENT: Dict[str, Agent] = {}
+
+
+def get_agent() -> Agent:
+    """The process-wide `Agent`, created on first use and safe to share between threads.
+
+    Callers keep their conversations apart by passing their own `thread_id` in
+    the run config; nothing else about a session lives on the agent.
+    """
+    if 'agent' not in _AGENT:
+        agent = Agent()  # takes _LOCK itself while compiling the graph
+        with _LOCK:
+            _AGENT.setdefault('agent', agent)
+    return _AGENT['agent']
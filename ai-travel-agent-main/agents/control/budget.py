@@ -0,0 +1,90 @@
+import os
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+
+"""Budgets for the call_tools_llm <-> invoke_tools loop.
+
+A budget bounds one conversation turn (everything after the latest user
+message): LLM iterations, tool calls, wall-clock time and LLM tokens. Usage
+is derived from the messages already in the graph state, so nothing extra
+has to be checkpointed apart from the turn's start time.
+
+Defaults come from the environment and can be overridden per conversation
+with `config['configurable']['budget'] = {'max_llm_calls': 4, ...}`:
+
+- `AGENT_MAX_LLM_CALLS` (default 8), including the final summary call;
+- `AGENT_MAX_TOOL_CALLS` (default 16);
+- `AGENT_DEADLINE_S` (default 120);
+- `AGENT_MAX_TOKENS` (default 100000).
+"""
+
+
+LLM_CALLS = 'llm_calls'
+TOOL_CALLS = 'tool_calls'
+DEADLINE = 'deadline'
+TOKENS = 'tokens'
+
+
+class LoopBudget:
+    __slots__ = ('max_llm_calls', 'max_tool_calls', 'deadline_s', 'max_tokens')
+
+    def __init__(self, max_llm_calls: Optional[int] = None, max_tool_calls: Optional[int] = None,
+                 deadline_s: Optional[float] = None, max_tokens: Optional[int] = None):
+        env = os.environ.get
+        self.max_llm_calls = int(max_llm_calls if max_llm_calls is not None else env('AGENT_MAX_LLM_CALLS', 8))
+        self.max_tool_calls = int(max_tool_calls if max_tool_calls is not None else env('AGENT_MAX_TOOL_CALLS', 16))
+        self.deadline_s = float(deadline_s if deadline_s is not None else env('AGENT_DEADLINE_S', 120))
+        self.max_tokens = int(max_tokens if max_tokens is not None else env('AGENT_MAX_TOKENS', 100000))
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> 'LoopBudget':
+        overrides = ((config or {}).get('configurable') or {}).get('budget') or {}
+        return cls(**{k: v for k, v in overrides.items() if k in cls.__slots__})
+
+    def exhausted(self, usage: Dict[str, int], elapsed_s: float) -> Optional[str]:
+        """Name of the first budget used up before another tool-calling LLM round, or None."""
+        # One LLM call is kept back for the closing summary.
+        if usage[LLM_CALLS] >= self.max_llm_calls - 1:
+            return LLM_CALLS
+        if usage[TOOL_CALLS] >= self.max_tool_calls:
+            return TOOL_CALLS
+        if elapsed_s >= self.deadline_s:
+            return DEADLINE
+        if usage[TOKENS] >= self.max_tokens:
+            return TOKENS
+        return None
+
+    def remaining_tool_calls(self, usage: Dict[str, int]) -> int:
+        return max(0, self.max_tool_calls - usage[TOOL_CALLS])
+
+
+def turn_messages(messages: List[Any]) -> List[Any]:
+    """Messages after the latest user message."""
+    for i in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[i], HumanMessage):
+            return messages[i + 1:]
+    return list(messages)
+
+
+def turn_usage(messages: List[Any]) -> Dict[str, int]:
+    turn = turn_messages(messages)
+    ai = [m for m in turn if isinstance(m, AIMessage)]
+    return {
+        LLM_CALLS: len(ai),
+        TOOL_CALLS: sum(1 for m in turn if isinstance(m, ToolMessage)),
+        TOKENS: sum((getattr(m, 'usage_metadata', None) or {}).get('total_tokens', 0) for m in ai),
+    }
+
+
+def local_summary(messages: List[Any], reason: str) -> str:
+    """Plain-text answer built from the turn's tool results, used when no LLM call can be afforded."""
+    lines = [f'I had to stop early ({reason.replace("_", " ")} budget reached). Here is what I found so far:']
+    results = [m for m in turn_messages(messages) if isinstance(m, ToolMessage)]
+    for m in results:
+        content = str(m.content)
+        lines.append(f'- {m.name}: {content[:400]}{"..." if len(content) > 400 else ""}')
+    if not results:
+        lines.append('- No results were gathered yet; please try again or narrow the request.')
+    return '\n'.join(lines)
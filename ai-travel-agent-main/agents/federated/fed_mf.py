@@ -0,0 +1,136 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .fedavg import server_aggregate
+
+
+"""Federated matrix factorization for the collaborative recommender.
+
+Implicit-feedback matrix factorization (an interaction counts as a
+preference, with confidence growing with the rating) trained with FedAvg:
+
+- each client holds the interactions of a few users, which never leave the
+  client;
+- every round the server sends the item factors to the selected clients;
+  each client solves its user factors in closed form against them and runs
+  a few gradient steps on a local copy of the item factors, all as batched
+  NumPy array operations. User factors are a function of the current item
+  factors, so nothing about them is kept between rounds or sent anywhere;
+- clients return only their item-factor update and a weight (their number
+  of interactions), which the server combines with `server_aggregate`.
+
+Client updates of a round run in parallel across a process pool; the
+server side only ever sees item-factor updates.
+
+The trained item factors feed `agents/recommender/factorized.py`.
+"""
+
+
+class Client:
+    """One device (or silo) with the interaction rows of its users."""
+    __slots__ = ('client_id', 'ratings')
+
+    def __init__(self, client_id: int, ratings: np.ndarray):
+        self.client_id = client_id
+        self.ratings = ratings
+
+
+def make_clients(matrix, users_per_client: int = 8) -> List[Client]:
+    """Split a users x items interaction matrix into clients of `users_per_client` users."""
+    ratings = np.asarray(matrix, dtype=np.float32)
+    return [Client(i, ratings[start:start + users_per_client])
+            for i, start in enumerate(range(0, len(ratings), users_per_client))]
+
+
+def solve_user_factors(ratings: np.ndarray, item_factors: np.ndarray, alpha: float = 2.0,
+                       reg: float = 1.0) -> np.ndarray:
+    """Weighted least-squares user factors for rows of `ratings` given fixed item factors."""
+    confidence = 1.0 + alpha * ratings
+    preference = (ratings > 0).astype(item_factors.dtype)
+    k = item_factors.shape[1]
+    # A_u = Q^T C_u Q + reg I and b_u = Q^T C_u p_u for every user at once.
+    a = (item_factors.T * confidence[:, None, :]) @ item_factors + reg * np.eye(k, dtype=item_factors.dtype)
+    b = (confidence * preference) @ item_factors
+    return np.linalg.solve(a, b[..., None])[..., 0]
+
+
+def client_update(ratings: np.ndarray, item_factors: np.ndarray, epochs: int = 2, lr: float = 1.0,
+                  alpha: float = 2.0, reg: float = 1.0) -> Tuple[np.ndarray, float]:
+    """Local training on one client; returns (item-factor update, weight) for the server."""
+    confidence = 1.0 + alpha * ratings
+    preference = (ratings > 0).astype(item_factors.dtype)
+    local = item_factors.copy()
+    # Gradient steps on the client's mean per-user loss.
+    step = lr / len(ratings)
+    for _ in range(epochs):
+        users = solve_user_factors(ratings, local, alpha, reg)
+        error = confidence * (preference - users @ local.T)
+        local += step * (error.T @ users - reg * local)
+    return local - item_factors, float((ratings > 0).sum())
+
+
+def _client_job(args):
+    ratings, item_factors, options = args
+    return client_update(ratings, item_factors, **options)
+
+
+def train_federated(clients: List[Client], num_items: int, factors: int = 16, rounds: int = 10,
+                    fraction: float = 1.0, workers: Optional[int] = None, seed: int = 0,
+                    **options: Any) -> Dict[str, Any]:
+    """Train item factors with FedAvg over `clients`; returns {'item_factors', 'rounds', 'history'}.
+
+    `fraction` of the clients take part in each round; `workers` > 1 runs
+    their updates in a process pool (default: CPU count). Extra keyword
+    arguments go to `client_update`.
+    """
+    rng = np.random.RandomState(seed)
+    item_factors = rng.normal(0, 0.1, (num_items, factors)).astype(np.float32)
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    history = []
+    try:
+        for _ in range(rounds):
+            count = max(1, int(round(fraction * len(clients))))
+            selected = [clients[i] for i in sorted(rng.choice(len(clients), count, replace=False))]
+            jobs = [(c.ratings, item_factors, options) for c in selected]
+            results = list(pool.map(_client_job, jobs, chunksize=max(1, len(jobs) // (4 * workers)))
+                           if pool is not None else map(_client_job, jobs))
+            update = server_aggregate([r[0] for r in results], [r[1] for r in results])
+            item_factors = item_factors + update
+            history.append(float(np.abs(update).mean()))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return {'item_factors': item_factors, 'rounds': rounds, 'history': history}
+
+
+def synthetic_interactions(num_users: int = 1000, num_items: int = 300, clusters: int = 8,
+                           per_user: int = 12, seed: int = 0) -> np.ndarray:
+    """Implicit ratings (0 = no interaction, 1..5) where users of a cluster share tastes."""
+    rng = np.random.RandomState(seed)
+    taste = rng.dirichlet(np.full(num_items, 0.05), size=clusters)
+    matrix = np.zeros((num_users, num_items), dtype=np.float32)
+    for u in range(num_users):
+        p = 0.9 * taste[u % clusters] + 0.1 / num_items
+        items = rng.choice(num_items, size=per_user, replace=False, p=p / p.sum())
+        matrix[u, items] = rng.randint(1, 6, size=per_user)
+    return matrix
+
+
+def hold_out(matrix: np.ndarray, seed: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """(training matrix, held-out item per user) with one interaction removed per user."""
+    rng = np.random.RandomState(seed)
+    train = matrix.copy()
+    held = np.empty(len(matrix), dtype=np.int64)
+    for u, row in enumerate(matrix):
+        held[u] = rng.choice(np.flatnonzero(row))
+        train[u, held[u]] = 0
+    return train, held
+
+
+def recall(top: np.ndarray, held: np.ndarray) -> float:
+    """Share of users whose held-out item is among their recommendations `top`."""
+    return float((top == held[:, None]).any(axis=1).mean())
@@ -2,12 +2,16 @@ from typing import Optional
 from pydantic import BaseModel, Field
 from langchain_core.tools import tool
 
-from agents.tools.flights_finder import FlightsInput, flights_finder
-from agents.tools.hotels_finder import HotelsInput, hotels_finder
-from agents.tools.weather import WeatherInput, weather_tool
-from agents.optimizer.cost_optimizer import recommend, rank_by_price
+from agents.tools.flights_finder import FlightsInput
+from agents.tools.hotels_finder import HotelsInput, hotel_pages, search_params
+from agents.tools.registry import invoke_tool
+from agents.tools.weather import WeatherInput
+from agents.optimizer.cost_optimizer import recommend, rank_by_price, recommend_from_pages
+from agents.optimizer.options import flight_options as to_flight_options
 from agents.recommender.collaborative import load_sample_data
-from agents.pricing.price_forecast import forecast_price_trend
+
+# Result pages of hotels walked at most while looking for one within budget.
+HOTEL_MAX_PAGES = 5
 
 
 class ItineraryInput(BaseModel):
@@ -38,7 +42,7 @@ def itinerary_builder(params: ItineraryInput):
         return_date=params.return_date,
         adults=params.adults,
     )
-    flights = flights_finder(flights_query)
+    flights = invoke_tool('flights_finder', {'params': flights_query})
 
     # Hotels search (use arrival_location as query)
     hotels_query = HotelsInput(
@@ -47,52 +51,63 @@ def itinerary_builder(params: ItineraryInput):
         check_out_date=params.return_date or params.outbound_date,
         adults=params.adults,
     )
-    hotels = hotels_finder(hotels_query)
+    # Through the registry so the planner's identical hotels_finder call is answered from this turn;
+    # the page it fetched is cached and becomes the first page walked below.
+    invoke_tool('hotels_finder', {'params': hotels_query})
 
-    # Weather check for outbound date
-    weather_q = WeatherInput(location=params.arrival_location, date=params.outbound_date)
-    weather = weather_tool(weather_q)
+    # Weather for every day of the trip, from one forecast request
+    weather_q = WeatherInput(location=params.arrival_location, date=params.outbound_date,
+                             end_date=params.return_date)
+    weather = invoke_tool('weather_tool', {'params': weather_q})
 
     # Cost-based selection for demo
-    # Normalize flight and hotel options into lists with numeric price field if possible
-    flight_options = []
-    try:
-        # flights may be list-like
-        for f in flights[:5]:
-            price = f.get('price') or f.get('total_price') or f.get('amount') or None
-            flight_options.append({'source': f, 'price': float(price) if price else None})
-    except Exception:
-        flight_options = []
+    # Compact option records: prices are parsed once ('$1,234' included) and raw results are not kept.
+    flight_options = to_flight_options(flights)
 
-    hotel_options = []
+    # Further result pages are requested only while no hotel fits the budget.
     try:
-        for h in hotels:
-            price = h.get('price') or h.get('rate') or None
-            hotel_options.append({'source': h, 'price': float(price) if price else None})
+        chosen_hotel = recommend_from_pages(hotel_pages(search_params(hotels_query), max_pages=HOTEL_MAX_PAGES),
+                                            budget=params.budget)
     except Exception:
-        hotel_options = []
+        chosen_hotel = {}
 
     chosen_flight = recommend(flight_options, budget=params.budget) if flight_options else {}
-    chosen_hotel = recommend(hotel_options, budget=params.budget) if hotel_options else {}
 
-    # Forecast price trend for flights (basic stub)
+    # Buy/wait advice from the observed price history (heuristic until enough history exists)
+    from agents.pricing.price_forecast import forecast_price_trend
+    from agents.pricing.price_history import flight_key, hotel_key
+
     flight_price_trend = None
     try:
         if chosen_flight and chosen_flight.get('price'):
-            flight_price_trend = forecast_price_trend(chosen_flight['price'])
+            # The search has no arrival airport, so there is no route history to forecast from.
+            route = flights_query.arrival_airport and flight_key(
+                flights_query.departure_airport, flights_query.arrival_airport, params.outbound_date)
+            flight_price_trend = forecast_price_trend(chosen_flight['price'], key=route or None,
+                                                      travel_date=params.outbound_date)
     except Exception:
         flight_price_trend = None
 
+    hotel_price_trend = None
+    try:
+        if chosen_hotel and chosen_hotel.get('price'):
+            hotel_price_trend = forecast_price_trend(
+                chosen_hotel['price'], key=hotel_key(chosen_hotel, params.outbound_date),
+                travel_date=params.outbound_date)
+    except Exception:
+        hotel_price_trend = None
+
     # Sample recommender usage
     sample_data = load_sample_data()
 
     itinerary = {
         'flights_found': len(flight_options),
-        'hotels_found': len(hotel_options),
+        'hotels_found': chosen_hotel.get('considered', 0),
         'chosen_flight': chosen_flight,
         'chosen_hotel': chosen_hotel,
         'weather': weather,
         'flight_price_trend': flight_price_trend,
+        'hotel_price_trend': hotel_price_trend,
         'sample_recommender_data_present': bool(sample_data)
     }
 
@@ -1,11 +1,14 @@
 from typing import Dict, Any
 import time
 
+from agents.metrics import store
+
 _METRICS = {
     'sessions': 0,
     'total_planning_time_seconds': 0.0,
     'total_savings': 0.0,
-    'satisfaction_scores': []
+    'satisfaction_scores': [],
+    'events': {}
 }
 
 
@@ -19,9 +22,29 @@ def end_session(start_time: float, time_saved_seconds: float = 0.0, savings: flo
     _METRICS['total_savings'] += savings
     if satisfaction is not None:
         _METRICS['satisfaction_scores'].append(satisfaction)
+    # Also append to the shared store so the dashboard sees sessions from every worker.
+    try:
+        store.record_session(time_saved_seconds, savings, satisfaction)
+    except Exception:
+        pass
+
+
+def record_event(kind: str):
+    """Count an operational event (e.g. `budget_exhausted.tokens`) here and in the shared store."""
+    _METRICS['events'][kind] = _METRICS['events'].get(kind, 0) + 1
+    try:
+        store.record_event(kind)
+    except Exception:
+        pass
+
+
+def event_counts(shared: bool = False) -> Dict[str, int]:
+    """Event counts for this process, or for every worker when `shared` is set."""
+    return store.event_counts() if shared else dict(_METRICS['events'])
 
 
 def snapshot():
+    """Return this process's in-memory metrics (see `shared_snapshot` for all workers)."""
     avg_satisfaction = None
     if _METRICS['satisfaction_scores']:
         avg_satisfaction = sum(_METRICS['satisfaction_scores']) / len(_METRICS['satisfaction_scores'])
@@ -31,3 +54,8 @@ def snapshot():
         'total_savings': _METRICS['total_savings'],
         'avg_satisfaction': avg_satisfaction
     }
+
+
+def shared_snapshot():
+    """Return metrics aggregated across every process writing to the shared store."""
+    return store.snapshot()
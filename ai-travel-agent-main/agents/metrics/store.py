@@ -0,0 +1,192 @@
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+"""Shared, multi-process metrics store backed by a SQLite WAL file.
+
+Every app worker appends session events to the same database file. WAL mode
+lets writers append without blocking the dashboard's readers, and each write
+also upserts per-minute, per-hour and all-time rollup rows in the same
+transaction, so windowed queries (sessions/min, savings/hour) and the overall
+snapshot only touch a handful of rollup rows instead of rescanning history.
+Operational events other than sessions (e.g. loop budgets running out) are
+appended to the same log under their own `kind` and counted with
+`event_counts`.
+
+The database location is taken from `METRICS_DB` (default: `metrics.db` in
+the project directory).
+"""
+
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parents[2] / 'metrics.db'
+
+MINUTE = 60
+HOUR = 3600
+# Granularity 0 holds a single all-time totals row (bucket 0).
+TOTALS = 0
+_GRANULARITIES = (MINUTE, HOUR, TOTALS)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    pid INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    time_saved REAL NOT NULL DEFAULT 0,
+    savings REAL NOT NULL DEFAULT 0,
+    satisfaction INTEGER
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    granularity INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    sessions INTEGER NOT NULL DEFAULT 0,
+    time_saved REAL NOT NULL DEFAULT 0,
+    savings REAL NOT NULL DEFAULT 0,
+    satisfaction_sum INTEGER NOT NULL DEFAULT 0,
+    satisfaction_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (granularity, bucket)
+);
+CREATE INDEX IF NOT EXISTS events_kind_ts ON events (kind, ts);
+"""
+
+_UPSERT_ROLLUP = """
+INSERT INTO rollups (granularity, bucket, sessions, time_saved, savings, satisfaction_sum, satisfaction_count)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (granularity, bucket) DO UPDATE SET
+    sessions = sessions + excluded.sessions,
+    time_saved = time_saved + excluded.time_saved,
+    savings = savings + excluded.savings,
+    satisfaction_sum = satisfaction_sum + excluded.satisfaction_sum,
+    satisfaction_count = satisfaction_count + excluded.satisfaction_count
+"""
+
+_LOCK = threading.Lock()
+_CONN: Dict[str, sqlite3.Connection] = {}
+
+
+def db_path() -> str:
+    return os.environ.get('METRICS_DB') or str(DEFAULT_DB_PATH)
+
+
+def connect(path: Optional[str] = None) -> sqlite3.Connection:
+    """Return this process's connection to the store, creating the schema on first use."""
+    path = path or db_path()
+    key = f'{os.getpid()}:{path}'
+    conn = _CONN.get(key)
+    if conn is None:
+        with _LOCK:
+            conn = _CONN.get(key)
+            if conn is None:
+                conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=NORMAL')
+                conn.executescript(_SCHEMA)
+                _CONN[key] = conn
+    return conn
+
+
+def close_all():
+    with _LOCK:
+        for conn in _CONN.values():
+            conn.close()
+        _CONN.clear()
+
+
+def record_session(time_saved_seconds: float = 0.0, savings: float = 0.0, satisfaction: Optional[int] = None,
+                   ts: Optional[float] = None, path: Optional[str] = None):
+    """Append one session event and update its rollup buckets in a single transaction."""
+    ts = time.time() if ts is None else ts
+    sat_sum = satisfaction if satisfaction is not None else 0
+    sat_count = 1 if satisfaction is not None else 0
+    conn = connect(path)
+    with _LOCK:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('INSERT INTO events (ts, pid, kind, time_saved, savings, satisfaction) '
+                         'VALUES (?, ?, ?, ?, ?, ?)',
+                         (ts, os.getpid(), 'session', time_saved_seconds, savings, satisfaction))
+            for g in _GRANULARITIES:
+                bucket = int(ts // g) * g if g else 0
+                conn.execute(_UPSERT_ROLLUP, (g, bucket, 1, time_saved_seconds, savings, sat_sum, sat_count))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+
+def record_event(kind: str, ts: Optional[float] = None, path: Optional[str] = None):
+    """Append one non-session event (no rollups are touched)."""
+    ts = time.time() if ts is None else ts
+    conn = connect(path)
+    with _LOCK:
+        conn.execute('INSERT INTO events (ts, pid, kind) VALUES (?, ?, ?)', (ts, os.getpid(), kind))
+
+
+def event_counts(since: Optional[float] = None, prefix: str = '', path: Optional[str] = None) -> Dict[str, int]:
+    """Number of non-session events per kind from `since` onwards, optionally filtered by kind prefix."""
+    rows = connect(path).execute(
+        "SELECT kind, COUNT(*) FROM events WHERE kind != 'session' AND substr(kind, 1, ?) = ? AND ts >= ? "
+        'GROUP BY kind', (len(prefix), prefix, since or 0)).fetchall()
+    return dict(rows)
+
+
+def snapshot(path: Optional[str] = None) -> Dict[str, Any]:
+    """Return the all-time snapshot aggregated over every process, in `recorder.snapshot` shape."""
+    row = connect(path).execute(
+        'SELECT sessions, time_saved, savings, satisfaction_sum, satisfaction_count FROM rollups '
+        'WHERE granularity = ? AND bucket = 0', (TOTALS,)).fetchone()
+    if row is None:
+        row = (0, 0.0, 0.0, 0, 0)
+    sessions, time_saved, savings, sat_sum, sat_count = row
+    return {
+        'sessions': sessions,
+        'total_planning_time_seconds': time_saved,
+        'total_savings': savings,
+        'avg_satisfaction': (sat_sum / sat_count) if sat_count else None
+    }
+
+
+def rollups(granularity: int = MINUTE, since: Optional[float] = None,
+            path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Return per-bucket aggregates (e.g. sessions/min, savings/hour) from `since` onwards.
+
+    Only rollup rows inside the window are read; the raw event log is not scanned.
+    """
+    since = 0 if since is None else int(since // granularity) * granularity
+    rows = connect(path).execute(
+        'SELECT bucket, sessions, time_saved, savings, satisfaction_sum, satisfaction_count FROM rollups '
+        'WHERE granularity = ? AND bucket >= ? ORDER BY bucket', (granularity, since)).fetchall()
+    return [{
+        'bucket_start': bucket,
+        'sessions': sessions,
+        'total_planning_time_seconds': time_saved,
+        'total_savings': savings,
+        'avg_satisfaction': (sat_sum / sat_count) if sat_count else None
+    } for bucket, sessions, time_saved, savings, sat_sum, sat_count in rows]
+
+
+class EventReader:
+    """Incremental reader over the event log.
+
+    Keeps a cursor on the last event id seen, so each `poll()` only reads rows
+    appended since the previous call.
+    """
+
+    def __init__(self, path: Optional[str] = None, last_id: int = 0):
+        self.path = path
+        self.last_id = last_id
+
+    def poll(self, limit: int = 10000) -> List[Dict[str, Any]]:
+        rows = connect(self.path).execute(
+            'SELECT id, ts, pid, kind, time_saved, savings, satisfaction FROM events WHERE id > ? ORDER BY id LIMIT ?',
+            (self.last_id, limit)).fetchall()
+        if rows:
+            self.last_id = rows[-1][0]
+        return [{
+            'id': r[0], 'ts': r[1], 'pid': r[2], 'kind': r[3],
+            'time_saved_seconds': r[4], 'savings': r[5], 'satisfaction': r[6]
+        } for r in rows]
@@ -1,4 +1,4 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 
 
 """Simple cost optimizer for VoyageVerse.
@@ -9,9 +9,19 @@ accepts lists of flight or hotel option dicts (expected to include a numeric
 implementation is intentionally small — it is a starting point for more
 advanced optimization (constraints, multi-objective optimization, budgets,
 and trade-offs).
+
+Options may also be `FlightOption`/`HotelOption` records
+(`agents/optimizer/options.py`); those are ranked on a NumPy price column
+and recommended as plain dicts.
 """
 
 
+def _price(o: Any) -> Any:
+    if isinstance(o, dict):
+        return o.get('price', float('inf'))
+    return getattr(o, 'price', None)
+
+
 def rank_by_price(options: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Return options sorted ascending by their numeric `price` field.
 
@@ -19,7 +29,7 @@ def rank_by_price(options: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     def _key(o: Dict[str, Any]) -> float:
         try:
-            return float(o.get('price', float('inf')))
+            return float(_price(o))
         except Exception:
             return float('inf')
 
@@ -33,6 +43,8 @@ def recommend(options: List[Dict[str, Any]], budget: Optional[float] = None) ->
     options are within budget, return the overall cheapest with a `within_budget`
     flag set to False.
     """
+    if options and not isinstance(options[0], dict):
+        return _recommend_records(options, budget)
     ranked = rank_by_price(options)
     if budget is not None:
         for o in ranked:
@@ -52,3 +64,59 @@ def recommend(options: List[Dict[str, Any]], budget: Optional[float] = None) ->
             ranked[0]['within_budget'] = True
             return ranked[0]
         return {}
+
+
+def best_index(prices, budget: Optional[float] = None) -> Tuple[int, bool]:
+    """Index of the cheapest price within `budget` (else overall) in a NumPy array, and whether it fits.
+
+    Unknown (NaN) prices rank last; returns (-1, False) for an empty array.
+    """
+    import numpy as np
+
+    if not len(prices):
+        return -1, False
+    finite = np.where(np.isnan(prices), np.inf, prices)
+    if budget is not None:
+        affordable = np.where(finite <= budget, finite, np.inf)
+        i = int(np.argmin(affordable))
+        if np.isfinite(affordable[i]):
+            return i, True
+        return int(np.argmin(finite)), False
+    return int(np.argmin(finite)), True
+
+
+def _recommend_records(options: List[Any], budget: Optional[float]) -> Dict[str, Any]:
+    from agents.optimizer.options import to_columns
+
+    i, within = best_index(to_columns(options, ['price'])['price'], budget)
+    return dict(options[i].to_dict(), within_budget=within) if i >= 0 else {}
+
+
+def recommend_from_pages(pages: Iterable[List[Dict[str, Any]]], budget: Optional[float] = None,
+                         max_pages: Optional[int] = None) -> Dict[str, Any]:
+    """Like `recommend`, pulling pages of options from a lazy source only as needed.
+
+    With a budget, pages are consumed until one contains an affordable option
+    and the cheapest affordable option seen so far is returned. Without one,
+    only the first page is ranked. `considered` on the result counts the
+    options looked at.
+    """
+    seen: List[Dict[str, Any]] = []
+    for n, page in enumerate(pages, 1):
+        seen.extend(page)
+        if budget is None or _any_within(page, budget) or (max_pages is not None and n >= max_pages):
+            break
+    best = recommend(seen, budget=budget)
+    if best:
+        best['considered'] = len(seen)
+    return best
+
+
+def _any_within(options: List[Dict[str, Any]], budget: float) -> bool:
+    for o in options:
+        try:
+            if float(_price(o)) <= budget:
+                return True
+        except Exception:
+            continue
+    return False
@@ -0,0 +1,185 @@
+import math
+import re
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+
+"""Compact, typed records for flight and hotel options.
+
+SerpAPI returns several kilobytes of nested dicts per option (logos, links,
+images, amenity lists...) of which planning uses a handful of fields.
+`FlightOption` and `HotelOption` keep only those fields in `__slots__`, with
+numbers parsed once by `parse_price` (which understands `'$1,234'`,
+`'1.234,50 €'`, `'USD 99'`) and repeated strings such as airline and airport
+codes interned. The raw payload can be dropped as soon as the records are
+built, which takes memory per search down by more than an order of
+magnitude.
+
+`to_columns` turns a list of records into NumPy columns (float prices with
+NaN for unknown, integer durations and stops) for vectorized ranking in
+`agents/optimizer/cost_optimizer.py`.
+"""
+
+
+_NUMBER_RE = re.compile(r'[-+]?\d[\d.,\s\u00a0\u202f\']*')
+
+
+def parse_price(value: Any) -> Optional[float]:
+    """Parse a provider number such as `702`, `'702'`, `'$1,234'` or `'1.234,50 €'`; None if unparseable."""
+    if isinstance(value, (int, float)):
+        return None if isinstance(value, float) and math.isnan(value) else float(value)
+    if not isinstance(value, str):
+        return None
+    m = _NUMBER_RE.search(value)
+    if m is None:
+        return None
+    digits = re.sub(r'[\s\u00a0\u202f\']', '', m.group()).rstrip('.,')
+    last_dot, last_comma = digits.rfind('.'), digits.rfind(',')
+    if last_dot >= 0 and last_comma >= 0:
+        # Both separators: the later one is the decimal point.
+        thousands = ',' if last_dot > last_comma else '.'
+        digits = digits.replace(thousands, '').replace(',', '.')
+    elif last_comma >= 0 or digits.count('.') > 1:
+        sep = ',' if last_comma >= 0 else '.'
+        groups = digits.split(sep)
+        # '1,234' and '1.234.567' group thousands; '1,5' is a decimal comma and a single '.' a decimal point.
+        if len(groups) > 2 or len(groups[-1]) == 3:
+            digits = digits.replace(sep, '')
+        else:
+            digits = digits.replace(',', '.')
+    try:
+        return float(digits)
+    except ValueError:
+        return None
+
+
+def _text(value: Any) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) and value else None
+
+
+def _int(value: Any, default: int = -1) -> int:
+    number = parse_price(value)
+    return int(number) if number is not None else default
+
+
+class FlightOption:
+    """One itinerary from a Google Flights search."""
+    __slots__ = ('price', 'airline', 'flight_number', 'departure_airport', 'arrival_airport', 'departure_time',
+                 'arrival_time', 'duration_min', 'stops', 'departure_token')
+
+    def __init__(self, price: Optional[float], airline: Optional[str] = None, flight_number: Optional[str] = None,
+                 departure_airport: Optional[str] = None, arrival_airport: Optional[str] = None,
+                 departure_time: Optional[str] = None, arrival_time: Optional[str] = None,
+                 duration_min: int = -1, stops: int = 0, departure_token: Optional[str] = None):
+        self.price = price
+        self.airline = airline
+        self.flight_number = flight_number
+        self.departure_airport = departure_airport
+        self.arrival_airport = arrival_airport
+        self.departure_time = departure_time
+        self.arrival_time = arrival_time
+        self.duration_min = duration_min
+        self.stops = stops
+        self.departure_token = departure_token
+
+    @classmethod
+    def from_result(cls, result: Dict[str, Any]) -> 'FlightOption':
+        legs = result.get('flights') or [{}]
+        first, last = legs[0], legs[-1]
+        departure, arrival = first.get('departure_airport') or {}, last.get('arrival_airport') or {}
+        price = result.get('price')
+        for alternative in ('total_price', 'amount'):
+            if price is None:
+                price = result.get(alternative)
+        return cls(
+            price=parse_price(price),
+            airline=_text(first.get('airline')),
+            flight_number=first.get('flight_number'),
+            departure_airport=_text(departure.get('id')),
+            arrival_airport=_text(arrival.get('id')),
+            departure_time=departure.get('time'),
+            arrival_time=arrival.get('time'),
+            duration_min=_int(result.get('total_duration')),
+            stops=len(legs) - 1,
+            departure_token=result.get('departure_token'),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return (f'FlightOption({self.airline} {self.departure_airport}->{self.arrival_airport} '
+                f'{self.departure_time}, {self.price})')
+
+
+class HotelOption:
+    """One property from a Google Hotels search; `price` is the lowest nightly rate."""
+    __slots__ = ('price', 'total_price', 'name', 'property_token', 'hotel_class', 'rating', 'reviews')
+
+    def __init__(self, price: Optional[float], total_price: Optional[float] = None, name: Optional[str] = None,
+                 property_token: Optional[str] = None, hotel_class: int = -1, rating: Optional[float] = None,
+                 reviews: int = -1):
+        self.price = price
+        self.total_price = total_price
+        self.name = name
+        self.property_token = property_token
+        self.hotel_class = hotel_class
+        self.rating = rating
+        self.reviews = reviews
+
+    @classmethod
+    def from_property(cls, prop: Dict[str, Any]) -> 'HotelOption':
+        rate, total = prop.get('rate_per_night') or {}, prop.get('total_rate') or {}
+        return cls(
+            price=parse_price(rate.get('extracted_lowest', rate.get('lowest'))),
+            total_price=parse_price(total.get('extracted_lowest', total.get('lowest'))),
+            name=prop.get('name'),
+            property_token=prop.get('property_token'),
+            hotel_class=_int(prop.get('extracted_hotel_class', prop.get('hotel_class'))),
+            rating=parse_price(prop.get('overall_rating')),
+            reviews=_int(prop.get('reviews')),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f'HotelOption({self.name}, {self.price})'
+
+
+def flight_options(results: Any) -> List[FlightOption]:
+    """Records for a `flights_finder` result (a list of itineraries); [] for anything else."""
+    if not isinstance(results, list):
+        return []
+    return [FlightOption.from_result(r) for r in results if isinstance(r, dict)]
+
+
+def hotel_options(properties: Any) -> List[HotelOption]:
+    """Records for a list of Google Hotels properties; [] for anything else."""
+    if not isinstance(properties, list):
+        return []
+    return [HotelOption.from_property(p) for p in properties if isinstance(p, dict)]
+
+
+# Column dtypes per record type; NaN / -1 mark unknown values.
+_COLUMNS = {
+    FlightOption: {'price': 'float64', 'duration_min': 'int32', 'stops': 'int8'},
+    HotelOption: {'price': 'float64', 'total_price': 'float64', 'hotel_class': 'int8', 'rating': 'float32',
+                  'reviews': 'int32'},
+}
+
+
+def to_columns(options: Sequence[Any], fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """NumPy columns for the numeric fields of `options` (all of one record type)."""
+    import numpy as np
+
+    if not options:
+        return {f: np.empty(0) for f in (fields or ('price',))}
+    dtypes = _COLUMNS[type(options[0])]
+    out = {}
+    for field in fields or dtypes:
+        dtype = np.dtype(dtypes[field])
+        missing = np.nan if dtype.kind == 'f' else -1
+        values = [getattr(o, field) for o in options]
+        out[field] = np.fromiter((missing if v is None else v for v in values), dtype=dtype, count=len(values))
+    return out
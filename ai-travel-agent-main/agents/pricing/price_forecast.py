@@ -1,12 +1,245 @@
-from typing import Dict
+import atexit
+import os
+import threading
+from typing import Any, Dict, List, Optional
 
+import numpy as np
 
-def forecast_price_trend(current_price: float) -> Dict[str, str]:
-    """Return a tiny heuristic-based forecast for demonstrative purposes.
+from agents.pricing.price_history import PriceHistory, flight_observations, hotel_observations, to_day, today
 
-    This is a placeholder. Replace with a real time-series model (Prophet,
-    LSTM) for production usage.
+
+"""Price forecasting for flights and hotels.
+
+`PriceForecaster` keeps additive, damped-trend Holt-Winters state (level,
+trend, weekly seasonal baseline and an EWMA of squared one-step errors) for
+every priced key in flat NumPy arrays. New observations update only the affected keys, in
+vectorized waves, so the models refresh incrementally instead of being
+refitted; `forecast` evaluates any number of keys at once.
+
+The model steps once per day. Repeat observations of a key on its latest
+day replace that day's point with the day's running minimum: the state
+from before the day is kept and the step is redone, so three searches in
+one afternoon are one observation, not a trend. Observations older than a
+key's latest day are kept in the history but do not move the model.
+`MIN_OBSERVATIONS` counts distinct days.
+
+`forecast_price_trend` keeps its original heuristic signature and uses the
+model when the key has enough history.
+"""
+
+
+SEASON = 7
+MIN_OBSERVATIONS = 3
+_Z = {0.8: 1.2816, 0.9: 1.6449, 0.95: 1.96}
+
+
+class PriceForecaster:
+
+    def __init__(self, history: Optional[PriceHistory] = None, alpha: float = 0.4, beta: float = 0.1,
+                 gamma: float = 0.2, phi: float = 0.9, capacity: int = 256):
+        self.history = history or PriceHistory()
+        self.alpha, self.beta, self.gamma, self.phi = alpha, beta, gamma, phi
+        self._lock = threading.Lock()
+        self.level = np.zeros(capacity)
+        self.trend = np.zeros(capacity)
+        self.season = np.zeros((capacity, SEASON))
+        self.err_var = np.zeros(capacity)
+        self.last_day = np.full(capacity, -1, dtype=np.int64)
+        self.n_obs = np.zeros(capacity, dtype=np.int64)  # distinct days observed
+        # State before each key's latest day and that day's lowest price, to redo the day's step.
+        self.day_min = np.zeros(capacity)
+        self.prev_level = np.zeros(capacity)
+        self.prev_trend = np.zeros(capacity)
+        self.prev_season = np.zeros(capacity)
+        self.prev_err_var = np.zeros(capacity)
+        self.prev_last_day = np.full(capacity, -1, dtype=np.int64)
+        if len(self.history):
+            h = self.history
+            self._update(h.key_id[:h.size], h.observed_day[:h.size], h.price[:h.size])
+
+    def _ensure(self, n_keys: int):
+        cap = len(self.level)
+        if n_keys <= cap:
+            return
+        while cap < n_keys:
+            cap *= 2
+        for name, fill in (('level', 0.0), ('trend', 0.0), ('err_var', 0.0), ('last_day', -1), ('n_obs', 0),
+                           ('day_min', 0.0), ('prev_level', 0.0), ('prev_trend', 0.0), ('prev_season', 0.0),
+                           ('prev_err_var', 0.0), ('prev_last_day', -1)):
+            old = getattr(self, name)
+            new = np.full(cap, fill, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        season = np.zeros((cap, SEASON))
+        season[:len(self.season)] = self.season
+        self.season = season
+
+    def observe(self, keys: List[str], prices: List[float], observed_day: Optional[int] = None,
+                travel_days: Optional[List[int]] = None):
+        """Append observations to the history and update the affected models."""
+        if not keys:
+            return
+        day = today() if observed_day is None else observed_day
+        ids = self.history.append(keys, prices, observed_day=day, travel_days=travel_days)
+        self._update(ids, np.full(len(ids), day), np.asarray(prices, dtype=np.float64))
+
+    def _update(self, ids: np.ndarray, days: np.ndarray, prices: np.ndarray):
+        with self._lock:
+            self._ensure(len(self.history.key_names))
+            ids = np.asarray(ids, dtype=np.int64)
+            days = np.asarray(days, dtype=np.int64)
+            prices = np.asarray(prices, dtype=np.float64)
+            # Observations for the same key must be applied in order, so process in
+            # waves: wave r holds the r-th observation of every key in the batch.
+            order = np.lexsort((days, ids))
+            ids, days, prices = ids[order], days[order], prices[order]
+            starts = np.r_[0, np.flatnonzero(np.diff(ids)) + 1]
+            rank = np.arange(len(ids)) - np.repeat(starts, np.diff(np.r_[starts, len(ids)]))
+            for r in range(int(rank.max()) + 1 if len(rank) else 0):
+                sel = rank == r
+                self._step(ids[sel], days[sel], prices[sel])
+
+    def _damped(self, steps: np.ndarray) -> np.ndarray:
+        """Sum of phi**i for i in 1..steps: how far a damped trend carries over `steps` days."""
+        phi = self.phi
+        return phi * (1 - phi ** steps) / (1 - phi)
+
+    def _step(self, k: np.ndarray, day: np.ndarray, y: np.ndarray):
+        seen = self.n_obs[k] > 0
+        same_day = seen & (day == self.last_day[k])
+        # Keep new days, and same-day prices below the day's minimum so far; drop the rest.
+        keep = ~seen | (day > self.last_day[k]) | (same_day & (y < self.day_min[k]))
+        k, day, y, same_day = k[keep], day[keep], y[keep], same_day[keep]
+        s = day % SEASON
+        # Same day: undo the day's step before redoing it with the lower price.
+        redo, new = k[same_day], k[~same_day]
+        self.level[redo], self.trend[redo] = self.prev_level[redo], self.prev_trend[redo]
+        self.season[redo, s[same_day]] = self.prev_season[redo]
+        self.err_var[redo], self.last_day[redo] = self.prev_err_var[redo], self.prev_last_day[redo]
+        self.n_obs[redo] -= 1
+        self.prev_level[new], self.prev_trend[new] = self.level[new], self.trend[new]
+        self.prev_season[new] = self.season[new, s[~same_day]]
+        self.prev_err_var[new], self.prev_last_day[new] = self.err_var[new], self.last_day[new]
+        self.day_min[k] = y
+
+        a, b, g = self.alpha, self.beta, self.gamma
+        fresh = self.n_obs[k] == 0
+        gap = np.maximum(day - self.last_day[k], 1).astype(np.float64)
+        level, trend, seas = self.level[k], self.trend[k], self.season[k, s]
+        carried = level + trend * self._damped(gap)
+
+        err = y - (carried + seas)
+        new_level = a * (y - seas) + (1 - a) * carried
+        new_trend = b * (new_level - level) / gap + (1 - b) * trend * self.phi ** gap
+        new_seas = g * (y - new_level) + (1 - g) * seas
+        new_var = 0.8 * self.err_var[k] + 0.2 * err ** 2
+
+        # First observation initialises the level with a 10% spread prior.
+        self.level[k] = np.where(fresh, y, new_level)
+        self.trend[k] = np.where(fresh, 0.0, new_trend)
+        self.season[k, s] = np.where(fresh, 0.0, new_seas)
+        self.err_var[k] = np.where(fresh, (0.1 * y) ** 2, new_var)
+        self.last_day[k] = day
+        self.n_obs[k] += 1
+
+    def forecast(self, key_ids: np.ndarray, horizon: int = 7, confidence: float = 0.9) -> Dict[str, np.ndarray]:
+        """Forecast `horizon` days ahead of each key's last observation.
+
+        Returns arrays of shape (len(key_ids), horizon) for `mean`, `low` and `high`.
+        """
+        k = np.asarray(key_ids, dtype=np.int64)
+        h = np.arange(1, horizon + 1)
+        target = (self.last_day[k][:, None] + h[None, :]) % SEASON
+        mean = (self.level[k][:, None] + self.trend[k][:, None] * self._damped(h)
+                + np.take_along_axis(self.season[k], target, axis=1))
+        mean = np.maximum(mean, 0.0)
+        std = np.sqrt(self.err_var[k][:, None] * (1 + (h - 1) * self.alpha ** 2))
+        z = _Z.get(confidence, 1.6449)
+        return {'mean': mean, 'low': np.maximum(mean - z * std, 0.0), 'high': mean + z * std}
+
+    def advise(self, key: str, current_price: float, horizon: int = 7,
+               confidence: float = 0.9) -> Optional[Dict[str, Any]]:
+        """Return buy/wait advice for one key, or None when there is not enough history."""
+        kid = self.history.key_of(key)
+        if kid is None or self.n_obs[kid] < MIN_OBSERVATIONS:
+            return None
+        fc = self.forecast(np.array([kid]), horizon=horizon, confidence=confidence)
+        best = int(np.argmin(fc['mean'][0]))
+        expected, low, high = (float(fc[n][0, best]) for n in ('mean', 'low', 'high'))
+        # Only wait when the whole interval sits below today's price.
+        advice = 'wait' if high < current_price else 'buy'
+        return {
+            'current_price': current_price,
+            'advice': advice,
+            'expected_price': round(expected, 2),
+            'expected_in_days': best + 1,
+            'confidence_interval': [round(low, 2), round(high, 2)],
+            'confidence': confidence,
+            'days_observed': int(self.n_obs[kid]),
+            'model': 'holt_winters',
+        }
+
+
+_FORECASTER: Dict[str, PriceForecaster] = {}
+_FORECASTER_LOCK = threading.Lock()
+
+
+def get_forecaster() -> PriceForecaster:
+    """Return the process-wide forecaster, loading `PRICE_HISTORY_PATH` if it exists.
+
+    With `PRICE_HISTORY_PATH` set, the history is written back there at exit.
+    """
+    fc = _FORECASTER.get('default')
+    if fc is None:
+        with _FORECASTER_LOCK:
+            fc = _FORECASTER.get('default')
+            if fc is None:
+                path = os.environ.get('PRICE_HISTORY_PATH')
+                history = PriceHistory.load(path) if path and os.path.exists(path) else None
+                fc = _FORECASTER['default'] = PriceForecaster(history)
+                if path:
+                    # Merged into the file, so workers sharing the path keep each other's observations.
+                    atexit.register(fc.history.save, path, merge=True)
+    return fc
+
+
+def save_history(path: Optional[str] = None):
+    """Merge the process-wide history into `path` (default `PRICE_HISTORY_PATH`) now, e.g. on a schedule."""
+    path = path or os.environ.get('PRICE_HISTORY_PATH')
+    if path:
+        get_forecaster().history.save(path, merge=True)
+
+
+def record_flight_prices(departure: Optional[str], arrival: Optional[str], outbound_date: Optional[str], results: Any):
+    keys, prices, travel_days = flight_observations(departure, arrival, outbound_date, results)
+    get_forecaster().observe(keys, prices, travel_days=travel_days)
+
+
+def record_hotel_prices(check_in_date: Optional[str], properties: Any):
+    keys, prices, travel_days = hotel_observations(check_in_date, properties)
+    get_forecaster().observe(keys, prices, travel_days=travel_days)
+
+
+def forecast_price_trend(current_price: float, key: Optional[str] = None,
+                         travel_date: Optional[str] = None) -> Dict[str, Any]:
+    """Return buy/wait advice for a price.
+
+    When `key` has enough observed history the Holt-Winters model is used and
+    the result includes the expected price and a confidence interval; the
+    horizon is capped at the days left before `travel_date`. Otherwise falls
+    back to a simple threshold heuristic.
     """
+    if key is not None:
+        horizon = 7
+        travel_day = to_day(travel_date)
+        fc = get_forecaster()
+        kid = fc.history.key_of(key)
+        if travel_day >= 0 and kid is not None:
+            horizon = int(max(1, min(horizon, travel_day - fc.last_day[kid] - 1)))
+        result = fc.advise(key, current_price, horizon=horizon)
+        if result is not None:
+            return result
+
     if current_price < 100:
         advice = 'buy'
     elif current_price < 300:
@@ -0,0 +1,201 @@
+import datetime
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from agents.optimizer.options import parse_price
+from agents.storage.locking import lock_exclusive
+
+
+"""Compact columnar history of observed prices.
+
+Each observation is one row across four NumPy columns: interned key id
+(int32), observation day and travel day (int32 days since the unix epoch)
+and price (float32) — 16 bytes per row instead of a raw SerpAPI dict. Keys
+name what was priced for which travel date, e.g. `flight:MAD-JFK@2025-10-01`
+or `hotel:<property token>@2025-10-01`: fares for different departures are
+separate series. Columns grow by doubling, so appends are amortized O(1).
+
+`save(path, merge=True)` adds the rows observed since the last load or save
+to whatever is in `path` (under a file lock), so workers sharing one file do
+not overwrite each other's observations.
+"""
+
+
+_EPOCH = datetime.date(1970, 1, 1)
+
+
+def to_day(value: Any) -> int:
+    """Convert a date, datetime or `YYYY-MM-DD` string to days since the unix epoch (-1 if unknown)."""
+    if value is None or value == '':
+        return -1
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    if isinstance(value, str):
+        try:
+            value = datetime.date.fromisoformat(value[:10])
+        except ValueError:
+            return -1
+    return (value - _EPOCH).days
+
+
+def today() -> int:
+    return to_day(datetime.date.today())
+
+
+class PriceHistory:
+
+    def __init__(self, capacity: int = 1024):
+        self._lock = threading.Lock()
+        self._key_ids: Dict[str, int] = {}
+        self.key_names: List[str] = []
+        self.size = 0
+        self.key_id = np.empty(capacity, dtype=np.int32)
+        self.observed_day = np.empty(capacity, dtype=np.int32)
+        self.travel_day = np.empty(capacity, dtype=np.int32)
+        self.price = np.empty(capacity, dtype=np.float32)
+        # Rows already in the file this history was loaded from or last saved to.
+        self.persisted = 0
+
+    def __len__(self):
+        return self.size
+
+    def intern(self, key: str) -> int:
+        kid = self._key_ids.get(key)
+        if kid is None:
+            kid = self._key_ids[key] = len(self.key_names)
+            self.key_names.append(key)
+        return kid
+
+    def key_of(self, key: str) -> Optional[int]:
+        return self._key_ids.get(key)
+
+    def _grow(self, needed: int):
+        cap = len(self.price)
+        if needed <= cap:
+            return
+        while cap < needed:
+            cap *= 2
+        for name in ('key_id', 'observed_day', 'travel_day', 'price'):
+            old = getattr(self, name)
+            new = np.empty(cap, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def append(self, keys: List[str], prices: Iterable[float], observed_day: Any = None,
+               travel_days: Optional[Iterable[int]] = None) -> np.ndarray:
+        """Append one observation per key and return their interned key ids.
+
+        `observed_day` is one day for all rows (default today) or an array of one per row.
+        """
+        n = len(keys)
+        observed_day = today() if observed_day is None else observed_day
+        with self._lock:
+            ids = np.fromiter((self.intern(k) for k in keys), dtype=np.int32, count=n)
+            self._grow(self.size + n)
+            end = self.size + n
+            self.key_id[self.size:end] = ids
+            self.observed_day[self.size:end] = observed_day
+            self.travel_day[self.size:end] = -1 if travel_days is None else np.fromiter(travel_days, np.int32, n)
+            self.price[self.size:end] = np.fromiter(prices, np.float32, n)
+            self.size = end
+        return ids
+
+    def series(self, key: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (observed_day, price) arrays for one key, in insertion order."""
+        kid = self.key_of(key)
+        if kid is None:
+            return np.empty(0, np.int32), np.empty(0, np.float32)
+        mask = self.key_id[:self.size] == kid
+        return self.observed_day[:self.size][mask], self.price[:self.size][mask]
+
+    def save(self, path: str, merge: bool = False):
+        """Write the history to `path` (a `.npz` file).
+
+        With `merge`, only the rows not yet persisted are added to the file's
+        current contents, under an exclusive lock on `<path>.lock`.
+        """
+        with self._lock:
+            if not merge:
+                self._write(path)
+                self.persisted = self.size
+                return
+            new = slice(self.persisted, self.size)
+            keys = [self.key_names[k] for k in self.key_id[new]]
+            rows = self.observed_day[new].copy(), self.travel_day[new].copy(), self.price[new].copy()
+            with open(path + '.lock', 'a+b') as lock:
+                lock_exclusive(lock, blocking=True)
+                on_disk = PriceHistory.load(path) if os.path.exists(path) else PriceHistory()
+                if keys:
+                    on_disk.append(keys, rows[2], observed_day=rows[0], travel_days=rows[1])
+                on_disk._write(path)
+            self.persisted = self.size
+
+    def _write(self, path: str):
+        tmp = path + '.tmp.npz'  # np.savez adds `.npz` to names without it
+        np.savez_compressed(tmp, key_id=self.key_id[:self.size], observed_day=self.observed_day[:self.size],
+                            travel_day=self.travel_day[:self.size], price=self.price[:self.size],
+                            key_names=np.array(json.dumps(self.key_names)))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'PriceHistory':
+        data = np.load(path)
+        size = len(data['price'])
+        h = cls(capacity=max(1024, size))
+        for k in json.loads(str(data['key_names'])):
+            h.intern(k)
+        for name in ('key_id', 'observed_day', 'travel_day', 'price'):
+            getattr(h, name)[:size] = data[name]
+        h.size = h.persisted = size
+        return h
+
+
+def _dated(key: str, travel_date: Optional[str]) -> str:
+    return f'{key}@{str(travel_date)[:10]}' if travel_date else key
+
+
+def flight_key(departure: Optional[str], arrival: Optional[str], travel_date: Optional[str] = None) -> str:
+    return _dated(f'flight:{(departure or "?").upper()}-{(arrival or "?").upper()}', travel_date)
+
+
+def hotel_key(prop: Dict[str, Any], travel_date: Optional[str] = None) -> str:
+    return _dated(f'hotel:{prop.get("property_token") or prop.get("name") or "?"}', travel_date)
+
+
+def parse_number(value: Any) -> Optional[float]:
+    """Parse a provider number such as `702`, `'702'` or `'$1,234'`; None if unparseable."""
+    return parse_price(value)
+
+
+def flight_observations(departure: Optional[str], arrival: Optional[str], outbound_date: Optional[str],
+                        results: Any) -> Tuple[List[str], List[float], List[int]]:
+    """Extract the cheapest observed fare for a route from a `flights_finder` result.
+
+    Searches without both airports are not a route; they are not recorded.
+    """
+    if not departure or not arrival or not isinstance(results, list):
+        return [], [], []
+    prices = [p for p in (parse_number(f.get('price')) for f in results if isinstance(f, dict)) if p is not None]
+    if not prices:
+        return [], [], []
+    return [flight_key(departure, arrival, outbound_date)], [min(prices)], [to_day(outbound_date)]
+
+
+def hotel_observations(check_in_date: Optional[str], properties: Any) -> Tuple[List[str], List[float], List[int]]:
+    """Extract one nightly-rate observation per property from a `hotels_finder` result."""
+    keys, prices = [], []
+    if not isinstance(properties, list):
+        return [], [], []
+    for prop in properties:
+        if not isinstance(prop, dict):
+            continue
+        rate = prop.get('rate_per_night') or {}
+        price = parse_number(rate.get('extracted_lowest')) if isinstance(rate, dict) else None
+        if price is not None:
+            keys.append(hotel_key(prop, check_in_date))
+            prices.append(price)
+    return keys, prices, [to_day(check_in_date)] * len(keys)
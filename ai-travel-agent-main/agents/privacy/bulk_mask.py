@@ -0,0 +1,197 @@
+import argparse
+import json
+import mmap
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from agents.privacy.masking import CATEGORIES, mask_pii_counted, mask_pii_in_obj_counted
+
+
+"""Bulk PII masking for logs and exported transcripts.
+
+Masks a file line by line with the same rules as `mask_pii`, either as plain
+text or as JSONL records (every string value of each record is masked; keys
+and non-string values are kept). Input is cut into batches of whole lines of
+about `batch_bytes` each and masked across a process pool; results are
+written in input order and at most two batches per worker are in flight, so
+memory stays bounded whatever the input size.
+
+With `use_mmap=True` the parent only scans a memory-mapped file for batch
+boundaries and each worker maps and reads its own byte range, so line data
+is never pickled to the pool. Lines are handled as UTF-8 with undecodable
+bytes passed through unchanged.
+
+Library use:
+
+    from agents.privacy.bulk_mask import mask_file
+    report = mask_file('app.log', 'app.masked.log', workers=8, use_mmap=True)
+
+Command line (`-` reads stdin / writes stdout):
+
+    python -m agents.privacy.bulk_mask app.log -o app.masked.log --workers 8 --mmap
+    python -m agents.privacy.bulk_mask transcripts.jsonl --jsonl -o masked.jsonl
+
+Each run reports bytes and lines processed, MB/s and the detections per
+category (plus `invalid_json` JSONL lines, which are masked as text).
+"""
+
+
+BATCH_BYTES = 4 << 20
+_ENCODING = 'utf-8'
+_ERRORS = 'surrogateescape'
+
+
+def _mask_line(line: bytes, jsonl: bool, counts: Dict[str, int]) -> bytes:
+    text = line.decode(_ENCODING, _ERRORS)
+    body = text.rstrip('\r\n')
+    ending = text[len(body):]
+    if jsonl and body.strip():
+        try:
+            record = json.loads(body)
+        except ValueError:
+            counts['invalid_json'] = counts.get('invalid_json', 0) + 1
+        else:
+            masked = json.dumps(mask_pii_in_obj_counted(record, counts), ensure_ascii=False)
+            return (masked + ending).encode(_ENCODING, _ERRORS)
+    return (mask_pii_counted(body, counts) + ending).encode(_ENCODING, _ERRORS)
+
+
+def _mask_batch(data: bytes, jsonl: bool) -> Tuple[int, bytes, int, Dict[str, int]]:
+    """(input bytes, masked bytes, lines, detections) for a batch of whole lines."""
+    counts: Dict[str, int] = {}
+    lines = data.splitlines(keepends=True)
+    return len(data), b''.join(_mask_line(line, jsonl, counts) for line in lines), len(lines), counts
+
+
+def _mask_range(path: str, start: int, end: int, jsonl: bool) -> Tuple[int, bytes, int, Dict[str, int]]:
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        data = mapped[start:end]
+    return _mask_batch(data, jsonl)
+
+
+def _stream_batches(src: BinaryIO, batch_bytes: int) -> Iterator[bytes]:
+    lines: List[bytes] = []
+    size = 0
+    for line in src:
+        lines.append(line)
+        size += len(line)
+        if size >= batch_bytes:
+            yield b''.join(lines)
+            lines, size = [], 0
+    if lines:
+        yield b''.join(lines)
+
+
+def _mmap_ranges(path: str, batch_bytes: int) -> Iterator[Tuple[int, int]]:
+    size = os.path.getsize(path)
+    if not size:
+        return
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        start = 0
+        while start < size:
+            cut = mapped.find(b'\n', min(size - 1, start + batch_bytes - 1))
+            end = size if cut < 0 else cut + 1
+            yield start, end
+            start = end
+
+
+def _ordered(pool: Optional[ProcessPoolExecutor], fn, jobs: Iterator[tuple], window: int):
+    """Results of fn(*job) in job order, with at most `window` jobs submitted ahead."""
+    if pool is None:
+        for job in jobs:
+            yield fn(*job)
+        return
+    pending: deque = deque()
+    for job in jobs:
+        pending.append(pool.submit(fn, *job))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _run(fn, jobs: Iterator[tuple], dst: BinaryIO, workers: Optional[int]) -> Dict[str, Any]:
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    report = {'bytes_in': 0, 'bytes_out': 0, 'lines': 0, 'detections': dict.fromkeys(CATEGORIES, 0)}
+    start = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for size, masked, lines, counts in _ordered(pool, fn, jobs, 2 * workers):
+            dst.write(masked)
+            report['bytes_in'] += size
+            report['bytes_out'] += len(masked)
+            report['lines'] += lines
+            for name, n in counts.items():
+                report['detections'][name] = report['detections'].get(name, 0) + n
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    report['seconds'] = time.perf_counter() - start
+    report['mb_per_s'] = report['bytes_in'] / (1 << 20) / report['seconds'] if report['seconds'] else 0.0
+    return report
+
+
+def mask_stream(src: BinaryIO, dst: BinaryIO, jsonl: bool = False, workers: Optional[int] = None,
+                batch_bytes: int = BATCH_BYTES) -> Dict[str, Any]:
+    """Mask the lines of binary stream `src` into `dst`; `workers` <= 1 masks in-process."""
+    return _run(_mask_batch, ((batch, jsonl) for batch in _stream_batches(src, batch_bytes)), dst, workers)
+
+
+def mask_mapped(src_path: str, dst: BinaryIO, jsonl: bool = False, workers: Optional[int] = None,
+                batch_bytes: int = BATCH_BYTES) -> Dict[str, Any]:
+    """Mask file `src_path` into `dst`, with workers reading their batches from a memory map."""
+    jobs = ((src_path, start, end, jsonl) for start, end in _mmap_ranges(src_path, batch_bytes))
+    return _run(_mask_range, jobs, dst, workers)
+
+
+def mask_file(src_path: str, dst_path: str, jsonl: bool = False, workers: Optional[int] = None,
+              use_mmap: bool = False, batch_bytes: int = BATCH_BYTES) -> Dict[str, Any]:
+    """Mask file `src_path` into `dst_path` and return the run's report."""
+    with open(dst_path, 'wb') as dst:
+        if use_mmap:
+            return mask_mapped(src_path, dst, jsonl, workers, batch_bytes)
+        with open(src_path, 'rb') as src:
+            return mask_stream(src, dst, jsonl, workers, batch_bytes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mask PII in a log or JSONL file.')
+    parser.add_argument('input', help="file to mask, or '-' for stdin")
+    parser.add_argument('-o', '--output', default='-', help="masked output file (default '-', stdout)")
+    parser.add_argument('--jsonl', action='store_true', help='treat each line as a JSON record')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--mmap', action='store_true', help='memory-map the input file')
+    parser.add_argument('--batch-mb', type=float, default=BATCH_BYTES / (1 << 20))
+    parser.add_argument('--report', help='also write the report as JSON to this file')
+    args = parser.parse_args(argv)
+
+    batch_bytes = max(1, int(args.batch_mb * (1 << 20)))
+    if args.mmap and args.input == '-':
+        parser.error('--mmap needs an input file')
+    src = sys.stdin.buffer if args.input == '-' else open(args.input, 'rb')
+    dst = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+    try:
+        if args.mmap:
+            report = mask_mapped(args.input, dst, args.jsonl, args.workers, batch_bytes)
+        else:
+            report = mask_stream(src, dst, args.jsonl, args.workers, batch_bytes)
+    finally:
+        for f in (src, dst):
+            if f not in (sys.stdin.buffer, sys.stdout.buffer):
+                f.close()
+
+    detections = ', '.join(f'{name}={n}' for name, n in report['detections'].items())
+    print(f"masked {report['lines']} lines, {report['bytes_in'] / (1 << 20):.1f} MB in {report['seconds']:.2f}s "
+          f"({report['mb_per_s']:.1f} MB/s); detections: {detections}", file=sys.stderr)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
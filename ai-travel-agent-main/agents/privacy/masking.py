@@ -1,5 +1,5 @@
 import re
-from typing import Pattern
+from typing import Dict, Pattern
 
 
 """PII masking utilities for VoyageVerse.
@@ -36,6 +36,16 @@ def mask_ssn(text: str) -> str:
     return _SSN_RE.sub("***-**-****", text)
 
 
+# (category, pattern, replacement), applied in this order by mask_pii and mask_pii_counted.
+_MASKS = (
+    ('credit_card', _CC_RE, "**** **** **** ****"),
+    ('ssn', _SSN_RE, "***-**-****"),
+    ('email', _EMAIL_RE, "***@***"),
+    ('phone', _PHONE_RE, "***-***-****"),
+)
+CATEGORIES = tuple(name for name, _, _ in _MASKS)
+
+
 def mask_pii(text: str) -> str:
     """Return a copy of text with common PII masked.
 
@@ -45,12 +55,33 @@ def mask_pii(text: str) -> str:
     """
     if not text:
         return text
-    out = text
-    out = mask_credit_cards(out)
-    out = mask_ssn(out)
-    out = mask_emails(out)
-    out = mask_phone_numbers(out)
-    return out
+    for _, pattern, replacement in _MASKS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def mask_pii_counted(text: str, counts: Dict[str, int]) -> str:
+    """Like mask_pii, adding the number of matches per category to `counts`."""
+    if not text:
+        return text
+    for name, pattern, replacement in _MASKS:
+        text, n = pattern.subn(replacement, text)
+        if n:
+            counts[name] = counts.get(name, 0) + n
+    return text
+
+
+def mask_pii_in_obj_counted(obj, counts: Dict[str, int]):
+    """Like mask_pii_in_obj, adding the number of matches per category to `counts`."""
+    if isinstance(obj, str):
+        return mask_pii_counted(obj, counts)
+    if isinstance(obj, list):
+        return [mask_pii_in_obj_counted(x, counts) for x in obj]
+    if isinstance(obj, tuple):
+        return tuple(mask_pii_in_obj_counted(x, counts) for x in obj)
+    if isinstance(obj, dict):
+        return {k: mask_pii_in_obj_counted(v, counts) for k, v in obj.items()}
+    return obj
 
 
 def mask_pii_in_obj(obj):
@@ -2,9 +2,6 @@ import json
 from pathlib import Path
 from typing import List
 
-import numpy as np
-from sklearn.neighbors import NearestNeighbors
-
 
 DATA_PATH = Path(__file__).parent / 'sample_user_item.json'
 
@@ -16,6 +13,10 @@ def load_sample_data():
 
 
 def build_model(user_item_matrix: List[List[float]]):
+    # NumPy and scikit-learn are imported on first use; they dominate the agent's import time.
+    import numpy as np
+    from sklearn.neighbors import NearestNeighbors
+
     arr = np.array(user_item_matrix)
     model = NearestNeighbors(metric='cosine', algorithm='brute')
     model.fit(arr)
@@ -0,0 +1,44 @@
+from typing import Optional, Sequence
+
+import numpy as np
+
+
+"""Dot-product top-k recommendations from trained item factors.
+
+Item factors come from `agents/federated/fed_mf.py`. A user's own factors
+stay on their side: `user_vector` solves them from the user's interaction
+row against the item factors, so scoring is a single matrix-vector (or, for
+a batch of users, matrix-matrix) product followed by `argpartition` for the
+top k. Items the user already interacted with are excluded.
+"""
+
+
+class FactorizedRecommender:
+
+    def __init__(self, item_factors, alpha: float = 2.0, reg: float = 1.0):
+        self.item_factors = np.ascontiguousarray(item_factors, dtype=np.float32)
+        self.alpha = alpha
+        self.reg = reg
+
+    def user_vector(self, ratings: Sequence[float]) -> np.ndarray:
+        """Factors for a user (or each row of a 2-D array) from their interaction row(s)."""
+        from agents.federated.fed_mf import solve_user_factors
+
+        rows = np.atleast_2d(np.asarray(ratings, dtype=np.float32))
+        users = solve_user_factors(rows, self.item_factors, self.alpha, self.reg)
+        return users[0] if np.ndim(ratings) == 1 else users
+
+    def top_k(self, ratings: Sequence[float], k: int = 10, users: Optional[np.ndarray] = None) -> np.ndarray:
+        """Indices of the k best-scoring unseen items, best first, per row of `ratings`.
+
+        `users` may carry precomputed user factors for the rows.
+        """
+        rows = np.atleast_2d(np.asarray(ratings, dtype=np.float32))
+        vectors = self.user_vector(rows) if users is None else np.atleast_2d(users)
+        scores = vectors @ self.item_factors.T
+        scores[rows > 0] = -np.inf
+        k = min(k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(scores, top, axis=1).argsort(axis=1)[:, ::-1]
+        best = np.take_along_axis(top, order, axis=1)
+        return best[0] if np.ndim(ratings) == 1 else best
@@ -0,0 +1,224 @@
+import heapq
+import itertools
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from agents.pricing.price_history import parse_number
+from agents.tools.ratelimit import TokenBucket
+
+
+"""Price-watch scheduler for proactive re-pricing.
+
+Users or itineraries register watches on a flight route or hotel search with
+a target price. Watches with identical search parameters share one search
+group, so each due group costs a single `flights_finder`/`hotels_finder`
+call however many watches it serves. Groups wait in a heap ordered by their
+next-due time; due groups move to a ready heap ordered by price volatility,
+and a global token bucket caps outbound calls per hour. Volatile searches
+are re-checked more often, stable ones back off.
+"""
+
+
+FLIGHT = 'flight'
+HOTEL = 'hotel'
+
+
+class Watch:
+    __slots__ = ('watch_id', 'kind', 'query', 'threshold', 'owner', 'last_price', 'group')
+
+    def __init__(self, watch_id: int, kind: str, query: Dict[str, Any], threshold: float, owner: Optional[str],
+                 group: str):
+        self.watch_id = watch_id
+        self.kind = kind
+        self.query = query
+        self.threshold = threshold
+        self.owner = owner
+        self.last_price: Optional[float] = None
+        self.group = group
+
+
+class _Group:
+    __slots__ = ('key', 'kind', 'query', 'watches', 'next_due', 'interval', 'volatility', 'last_price', 'generation')
+
+    def __init__(self, key: str, kind: str, query: Dict[str, Any], interval: float):
+        self.key = key
+        self.kind = kind
+        self.query = query
+        self.watches: Dict[int, Watch] = {}
+        self.next_due = 0.0
+        self.interval = interval
+        self.volatility = 0.0
+        self.last_price: Optional[float] = None
+        # Bumped whenever the group is rescheduled or removed; stale heap entries are skipped.
+        self.generation = 0
+
+
+def search_key(kind: str, query: Dict[str, Any]) -> str:
+    return kind + ':' + json.dumps({k: v for k, v in query.items() if v is not None}, sort_keys=True)
+
+
+def fetch_lowest_price(kind: str, query: Dict[str, Any]) -> Optional[float]:
+    """Run the matching search tool and return the lowest price it reports."""
+    from agents.tools.gateway import BACKGROUND, priority
+
+    with priority(BACKGROUND):
+        return _lowest_price(kind, query)
+
+
+def _lowest_price(kind: str, query: Dict[str, Any]) -> Optional[float]:
+    if kind == FLIGHT:
+        from agents.tools.flights_finder import flights_finder
+        results = flights_finder.invoke({'params': query})
+        if not isinstance(results, list):
+            return None
+        prices = [parse_number(r.get('price')) for r in results if isinstance(r, dict)]
+    else:
+        from agents.tools.hotels_finder import hotels_finder
+        results = hotels_finder.invoke({'params': query})
+        prices = [parse_number((r.get('rate_per_night') or {}).get('extracted_lowest'))
+                  for r in results if isinstance(r, dict)]
+    prices = [p for p in prices if p is not None]
+    return min(prices) if prices else None
+
+
+class PriceWatchScheduler:
+
+    def __init__(self, fetch: Callable[[str, Dict[str, Any]], Optional[float]] = fetch_lowest_price,
+                 notify: Optional[Callable[[Dict[str, Any]], None]] = None, max_calls_per_hour: float = 600,
+                 base_interval: float = 3600.0, min_interval: float = 900.0, max_interval: float = 6 * 3600.0,
+                 batch_size: int = 50, clock: Callable[[], float] = time.monotonic):
+        self.fetch = fetch
+        self.notify = notify
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.batch_size = batch_size
+        self.clock = clock
+        self.bucket = TokenBucket(max_calls_per_hour, clock=clock)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._seq = itertools.count()
+        self._watches: Dict[int, Watch] = {}
+        self._groups: Dict[str, _Group] = {}
+        self._waiting: List[tuple] = []  # (next_due, seq, key, generation)
+        self._ready: List[tuple] = []    # (-volatility, next_due, seq, key, generation)
+        self.stats = {'calls': 0, 'watches_checked': 0, 'notifications': 0, 'rate_limited': 0, 'errors': 0}
+
+    def __len__(self):
+        return len(self._watches)
+
+    def register(self, kind: str, query: Dict[str, Any], threshold: float, owner: Optional[str] = None) -> int:
+        """Register a watch; `query` holds `FlightsInput`/`HotelsInput` fields. Returns the watch id."""
+        key = search_key(kind, query)
+        with self._lock:
+            group = self._groups.get(key)
+            if group is None:
+                group = self._groups[key] = _Group(key, kind, dict(query), self.base_interval)
+                group.next_due = self.clock()
+                self._push_waiting(group)
+            # A new watch has seen no price yet, so it fires on its first check if the group is already below.
+            watch = Watch(next(self._ids), kind, group.query, threshold, owner, key)
+            group.watches[watch.watch_id] = watch
+            self._watches[watch.watch_id] = watch
+        return watch.watch_id
+
+    def unregister(self, watch_id: int):
+        with self._lock:
+            watch = self._watches.pop(watch_id, None)
+            if watch is None:
+                return
+            group = self._groups[watch.group]
+            del group.watches[watch_id]
+            if not group.watches:
+                group.generation += 1
+                del self._groups[group.key]
+
+    def _push_waiting(self, group: _Group):
+        heapq.heappush(self._waiting, (group.next_due, next(self._seq), group.key, group.generation))
+
+    def _live(self, key: str, generation: int) -> Optional[_Group]:
+        group = self._groups.get(key)
+        return group if group is not None and group.generation == generation else None
+
+    def _promote_due(self, now: float):
+        while self._waiting and self._waiting[0][0] <= now:
+            next_due, seq, key, gen = heapq.heappop(self._waiting)
+            group = self._live(key, gen)
+            if group is not None:
+                heapq.heappush(self._ready, (-group.volatility, next_due, seq, key, gen))
+
+    def due_batch(self) -> List[_Group]:
+        """Pop up to `batch_size` due groups, most volatile first, within the rate limit."""
+        with self._lock:
+            self._promote_due(self.clock())
+            batch = []
+            while self._ready and len(batch) < self.batch_size:
+                _, _, _, key, gen = self._ready[0]
+                group = self._live(key, gen)
+                if group is None:
+                    heapq.heappop(self._ready)
+                    continue
+                if not self.bucket.take():
+                    self.stats['rate_limited'] += 1
+                    break
+                heapq.heappop(self._ready)
+                group.generation += 1  # in flight: not schedulable until rescheduled
+                batch.append(group)
+            return batch
+
+    def _reschedule(self, group: _Group, price: Optional[float]):
+        if price is not None and group.last_price:
+            change = abs(price - group.last_price) / group.last_price
+            group.volatility = 0.7 * group.volatility + 0.3 * change
+        # 10% average moves between checks halve the interval; stable prices back off.
+        interval = self.base_interval / (1.0 + 10.0 * group.volatility)
+        if price is not None and group.last_price == price:
+            interval = min(group.interval * 1.5, interval * 2)
+        group.interval = max(self.min_interval, min(self.max_interval, interval))
+        if price is not None:
+            group.last_price = price
+        group.next_due = self.clock() + group.interval
+        if self._groups.get(group.key) is group:
+            self._push_waiting(group)
+
+    def _evaluate(self, group: _Group, price: float) -> List[Dict[str, Any]]:
+        events = []
+        for watch in group.watches.values():
+            previous = watch.last_price
+            watch.last_price = price
+            # Fire on the crossing, not on every check below the threshold.
+            if price <= watch.threshold and (previous is None or previous > watch.threshold):
+                events.append({'watch_id': watch.watch_id, 'owner': watch.owner, 'kind': watch.kind,
+                               'query': watch.query, 'threshold': watch.threshold, 'price': price,
+                               'previous_price': previous})
+        return events
+
+    def run_due(self) -> List[Dict[str, Any]]:
+        """Check every due search group allowed by the rate limit and return fired notifications."""
+        fired = []
+        for group in self.due_batch():
+            try:
+                price = self.fetch(group.kind, group.query)
+                self.stats['calls'] += 1
+            except Exception:
+                price = None
+                self.stats['errors'] += 1
+            with self._lock:
+                if price is not None:
+                    self.stats['watches_checked'] += len(group.watches)
+                    fired.extend(self._evaluate(group, price))
+                group.generation += 1
+                self._reschedule(group, price)
+        self.stats['notifications'] += len(fired)
+        if self.notify is not None:
+            for event in fired:
+                self.notify(event)
+        return fired
+
+    def run_forever(self, stop: threading.Event, poll_seconds: float = 5.0):
+        """Run checks until `stop` is set; intended for a background thread."""
+        while not stop.is_set():
+            self.run_due()
+            stop.wait(poll_seconds)
@@ -1,21 +1,57 @@
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 import os
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, List, Optional, Sequence
 
 """Encryption utilities using Fernet (symmetric) for demo purposes.
 
 In production, use a robust KMS (AWS KMS, Azure Key Vault) and rotate keys.
+
+`FERNET_KEY` holds one key or a comma-separated list, newest first. Data is
+always encrypted with the first key and decrypted with any of them, so a key
+is rotated by prepending the new one, re-encrypting stored tokens with
+`rotate_token` and finally dropping the old key. The cipher is built once and
+rebuilt only when `FERNET_KEY` changes.
+
+Large files are encrypted in chunks (`encrypt_stream`/`encrypt_file`) so they
+never have to fit in memory. Each chunk is a separate Fernet token carrying
+its sequence number and a last-chunk flag, which makes reordered, repeated,
+truncated or extended streams fail to decrypt.
 """
 
 
+# Plaintext bytes per streamed chunk.
+CHUNK_SIZE = 1 << 20
+
+_MAGIC = b'TAFS1'
+_LENGTH = struct.Struct('>I')
+_CHUNK_HEADER = struct.Struct('>Q?')
+
+# Below this many items a thread pool costs more than it saves.
+_MIN_PARALLEL_ITEMS = 64
+
+_CACHE = {}
+_LOCK = threading.Lock()
+
+
 def generate_key() -> bytes:
     return Fernet.generate_key()
 
 
-def get_fernet():
+def get_fernet() -> MultiFernet:
     key = os.environ.get('FERNET_KEY')
     if not key:
         raise RuntimeError('FERNET_KEY environment variable is required')
-    return Fernet(key.encode() if isinstance(key, str) else key)
+    cached = _CACHE.get('fernet')
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with _LOCK:
+        keys = [k.strip() for k in key.split(',') if k.strip()]
+        fernet = MultiFernet([Fernet(k.encode()) for k in keys])
+        _CACHE['fernet'] = (key, fernet)
+    return fernet
 
 
 def encrypt_bytes(data: bytes) -> bytes:
@@ -34,3 +70,88 @@ def encrypt_text(text: str) -> str:
 
 def decrypt_text(token: str) -> str:
     return decrypt_bytes(token.encode()).decode()
+
+
+def rotate_token(token: bytes) -> bytes:
+    """Re-encrypt `token` under the primary key (it may have been made with any configured key)."""
+    return get_fernet().rotate(token)
+
+
+def _batched(fn, items: Sequence[bytes], workers: Optional[int]) -> List[bytes]:
+    if workers is None:
+        workers = min(8, os.cpu_count() or 1)
+    if workers <= 1 or len(items) < _MIN_PARALLEL_ITEMS:
+        return [fn(item) for item in items]
+    # One contiguous slice per worker keeps the per-item overhead to a plain loop.
+    size = -(-len(items) // workers)
+    slices = [items[i:i + size] for i in range(0, len(items), size)]
+    with ThreadPoolExecutor(max_workers=len(slices)) as pool:
+        parts = pool.map(lambda part: [fn(item) for item in part], slices)
+    return [token for part in parts for token in part]
+
+
+def encrypt_many(items: Sequence[bytes], workers: Optional[int] = None) -> List[bytes]:
+    """Encrypt each item of `items`, in order; large batches are split across `workers` threads."""
+    return _batched(get_fernet().encrypt, list(items), workers)
+
+
+def decrypt_many(tokens: Sequence[bytes], workers: Optional[int] = None) -> List[bytes]:
+    """Decrypt each token of `tokens`, in order; raises InvalidToken if any of them is invalid."""
+    return _batched(get_fernet().decrypt, list(tokens), workers)
+
+
+def encrypt_stream(src: BinaryIO, dst: BinaryIO, chunk_size: int = CHUNK_SIZE) -> int:
+    """Encrypt `src` into `dst` one chunk at a time; returns the number of plaintext bytes."""
+    f = get_fernet()
+    dst.write(_MAGIC)
+    total, index = 0, 0
+    chunk = src.read(chunk_size)
+    while True:
+        following = src.read(chunk_size) if chunk else b''
+        token = f.encrypt(_CHUNK_HEADER.pack(index, not following) + chunk)
+        dst.write(_LENGTH.pack(len(token)))
+        dst.write(token)
+        total += len(chunk)
+        if not following:
+            return total
+        chunk, index = following, index + 1
+
+
+def decrypt_stream(src: BinaryIO, dst: BinaryIO) -> int:
+    """Decrypt a stream written by `encrypt_stream` into `dst`; returns the number of plaintext bytes."""
+    f = get_fernet()
+    if src.read(len(_MAGIC)) != _MAGIC:
+        raise InvalidToken
+    total, index = 0, 0
+    while True:
+        length = src.read(_LENGTH.size)
+        if len(length) < _LENGTH.size:
+            raise InvalidToken  # truncated: the last chunk never arrived
+        plain = f.decrypt(src.read(_LENGTH.unpack(length)[0]))
+        if len(plain) < _CHUNK_HEADER.size:
+            raise InvalidToken
+        seq, last = _CHUNK_HEADER.unpack_from(plain)
+        if seq != index:
+            raise InvalidToken
+        dst.write(plain[_CHUNK_HEADER.size:])
+        total += len(plain) - _CHUNK_HEADER.size
+        if last:
+            if src.read(1):
+                raise InvalidToken  # something was appended after the last chunk
+            return total
+        index += 1
+
+
+def encrypt_file(src_path: str, dst_path: str, chunk_size: int = CHUNK_SIZE) -> int:
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+        return encrypt_stream(src, dst, chunk_size)
+
+
+def decrypt_file(src_path: str, dst_path: str) -> int:
+    """Decrypt `src_path` into `dst_path`; nothing is left behind if the stream is invalid."""
+    try:
+        with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+            return decrypt_stream(src, dst)
+    except InvalidToken:
+        os.remove(dst_path)
+        raise
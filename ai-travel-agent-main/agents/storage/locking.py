@@ -0,0 +1,16 @@
+"""Cross-process file locks for the on-disk stores."""
+
+
+def lock_exclusive(f, blocking: bool = False):
+    """Lock open file `f` for this process; OSError if another process holds it.
+
+    With `blocking`, wait for the lock instead. The lock is released when `f`
+    is closed or the process exits.
+    """
+    try:
+        import fcntl
+    except ImportError:  # Windows; LK_LOCK retries for about ten seconds
+        import msvcrt
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+    else:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
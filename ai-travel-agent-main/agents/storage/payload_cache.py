@@ -0,0 +1,274 @@
+import atexit
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+import warnings
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from agents.security.encryption import get_fernet
+from agents.storage.locking import lock_exclusive
+
+
+"""Encrypted, compressed on-disk cache for tool payloads.
+
+Payloads (SerpAPI results, serialized conversation state, ...) are
+compressed with zstd when the `zstandard` package is installed and zlib
+otherwise, encrypted with the Fernet cipher from
+`agents/security/encryption.py` and written content-addressed:
+
+    <root>/index.json          cache key -> object digest, sizes and timestamps
+    <root>/objects/ab/cdef...  one encrypted object per distinct payload
+
+Neither cache keys nor payload hashes are stored in the clear: both are
+hashed with a key derived from the primary `FERNET_KEY`, so file names and
+the index reveal nothing about the searches behind them (rotating the primary
+key therefore starts a fresh cache; old entries age out). Objects are stored
+as raw token bytes (not base64) behind a 4-byte header. Reads cannot be
+zero-copy: Fernet authenticates and decrypts whole base64 tokens, so every
+object is read into memory and re-encoded before decryption.
+
+The total size of the objects is bounded by `max_bytes`; when a write goes
+over it, the least recently used entries are evicted down to 90% of the
+bound. The index is written at most once a second and at exit; objects it
+does not reference (after a crash) are removed when the cache is opened.
+
+A cache directory belongs to one process at a time. The index lives in
+memory and is rewritten whole, and opening sweeps unreferenced objects, so
+two processes sharing a directory would drop each other's entries. Opening
+takes an exclusive lock on `<root>/.lock` and raises RuntimeError while
+another process holds it; `close()` (or exit) releases it.
+"""
+
+
+_MAGIC = b'PC'
+ZLIB, ZSTD = 1, 2
+_INDEX_WRITE_INTERVAL_S = 1.0
+_LOW_WATERMARK = 0.9
+
+_LOCAL = threading.local()
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def _compress(data: bytes, codec: int, level: int) -> bytes:
+    if codec == ZLIB:
+        return zlib.compress(data, level)
+    # zstandard compressors are not thread-safe; keep one per thread.
+    compressors = getattr(_LOCAL, 'zstd', None)
+    if compressors is None:
+        compressors = _LOCAL.zstd = {}
+    if level not in compressors:
+        compressors[level] = _zstd().ZstdCompressor(level=level)
+    return compressors[level].compress(data)
+
+
+def _decompress(data: bytes, codec: int) -> bytes:
+    if codec == ZLIB:
+        return zlib.decompress(data)
+    zstandard = _zstd()
+    if zstandard is None:
+        raise RuntimeError('this cache entry is zstd-compressed; install zstandard to read it')
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+def _atomic_write(path: Path, text: str):
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+class PayloadCache:
+
+    def __init__(self, root: str, max_bytes: int = 256 << 20, codec: Optional[int] = None,
+                 level: Optional[int] = None):
+        self.root = Path(root)
+        self.objects = self.root / 'objects'
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self._lockfile = open(self.root / '.lock', 'a+b')
+        try:
+            lock_exclusive(self._lockfile)
+        except OSError:
+            self._lockfile.close()
+            raise RuntimeError(f'payload cache {self.root} is in use by another process') from None
+        self.max_bytes = max_bytes
+        self.codec = codec or (ZSTD if _zstd() is not None else ZLIB)
+        self.level = level if level is not None else (3 if self.codec == ZSTD else 6)
+        secret = os.environ.get('FERNET_KEY', '').split(',')[0].strip().encode()
+        self._secret = hashlib.sha256(b'payload-cache:' + secret).digest()
+        self._lock = threading.RLock()
+        index_path = self.root / 'index.json'
+        self._entries: Dict[str, Dict[str, Any]] = json.loads(index_path.read_text()) if index_path.exists() else {}
+        self._refs: Dict[str, int] = {}
+        self._sizes: Dict[str, int] = {}
+        for entry in self._entries.values():
+            self._refs[entry['digest']] = self._refs.get(entry['digest'], 0) + 1
+            self._sizes[entry['digest']] = entry['stored']
+        self.total_bytes = sum(self._sizes.values())
+        self._dirty = False
+        self._written = 0.0
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'deduplicated': 0, 'evicted': 0}
+        self._sweep()
+
+    def _hash(self, data: bytes) -> str:
+        return hashlib.blake2b(data, digest_size=20, key=self._secret).hexdigest()
+
+    def _path(self, digest: str) -> Path:
+        return self.objects / digest[:2] / digest[2:]
+
+    def _sweep(self):
+        for shard in self.objects.iterdir():
+            for obj in shard.iterdir():
+                if shard.name + obj.name not in self._refs:
+                    obj.unlink()
+
+    def put(self, key: str, payload: bytes) -> str:
+        """Store `payload` under `key`; returns the object's digest."""
+        hkey, digest = self._hash(key.encode()), self._hash(payload)
+        with self._lock:
+            old = self._entries.get(hkey)
+            if old is not None and old['digest'] == digest:
+                old['created'] = old['used'] = time.time()
+                self._dirty = True
+                self._save()
+                return digest
+            if digest in self._refs:
+                self.stats['deduplicated'] += 1
+            else:
+                token = get_fernet().encrypt(_compress(payload, self.codec, self.level))
+                blob = _MAGIC + bytes((self.codec, 0)) + base64.urlsafe_b64decode(token)
+                path = self._path(digest)
+                path.parent.mkdir(exist_ok=True)
+                tmp = path.with_suffix('.tmp')
+                tmp.write_bytes(blob)
+                os.replace(tmp, path)
+                self._sizes[digest] = len(blob)
+                self.total_bytes += len(blob)
+            if old is not None:
+                self._release(old['digest'])
+            self._refs[digest] = self._refs.get(digest, 0) + 1
+            now = time.time()
+            self._entries[hkey] = {'digest': digest, 'stored': self._sizes[digest], 'raw': len(payload),
+                                   'created': now, 'used': now}
+            self.stats['writes'] += 1
+            self._dirty = True
+            self._evict()
+            self._save()
+        return digest
+
+    def get(self, key: str, max_age_s: Optional[float] = None) -> Optional[bytes]:
+        """The payload stored under `key`, or None if missing or older than `max_age_s`."""
+        hkey = self._hash(key.encode())
+        with self._lock:
+            entry = self._entries.get(hkey)
+            if entry is None or (max_age_s is not None and time.time() - entry['created'] > max_age_s):
+                self.stats['misses'] += 1
+                return None
+            entry['used'] = time.time()
+            self._dirty = True
+            digest = entry['digest']
+        try:
+            payload = self._read(digest)
+        except FileNotFoundError:  # evicted by another thread since the lookup
+            with self._lock:
+                self.stats['misses'] += 1
+            return None
+        with self._lock:
+            self.stats['hits'] += 1
+        return payload
+
+    def _read(self, digest: str) -> bytes:
+        blob = self._path(digest).read_bytes()
+        if blob[:2] != _MAGIC:
+            raise ValueError(f'not a payload cache object: {digest}')
+        token = base64.urlsafe_b64encode(memoryview(blob)[4:])
+        return _decompress(get_fernet().decrypt(token), blob[2])
+
+    def put_json(self, key: str, value: Any) -> str:
+        return self.put(key, json.dumps(value, separators=(',', ':')).encode())
+
+    def get_json(self, key: str, max_age_s: Optional[float] = None) -> Any:
+        payload = self.get(key, max_age_s)
+        return json.loads(payload) if payload is not None else None
+
+    def _release(self, digest: str):
+        self._refs[digest] -= 1
+        if self._refs[digest] == 0:
+            del self._refs[digest]
+            self.total_bytes -= self._sizes.pop(digest)
+            self._path(digest).unlink(missing_ok=True)
+
+    def _evict(self):
+        if self.total_bytes <= self.max_bytes:
+            return
+        target = self.max_bytes * _LOW_WATERMARK
+        for hkey in sorted(self._entries, key=lambda k: self._entries[k]['used']):
+            if self.total_bytes <= target:
+                break
+            self._release(self._entries.pop(hkey)['digest'])
+            self.stats['evicted'] += 1
+
+    def _save(self, force: bool = False):
+        now = time.monotonic()
+        if self._dirty and (force or now - self._written >= _INDEX_WRITE_INTERVAL_S):
+            _atomic_write(self.root / 'index.json', json.dumps(self._entries))
+            self._dirty = False
+            self._written = now
+
+    def flush(self):
+        with self._lock:
+            self._save(force=True)
+
+    def close(self):
+        """Write the index and release the directory for other processes."""
+        with self._lock:
+            if not self._lockfile.closed:
+                self._save(force=True)
+                self._lockfile.close()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def compression_ratio(self) -> float:
+        """Raw payload bytes per stored byte across the cached entries."""
+        with self._lock:
+            raw = sum(e['raw'] for e in self._entries.values())
+        return raw / self.total_bytes if self.total_bytes else 0.0
+
+
+_CACHE: Dict[str, PayloadCache] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def get_cache() -> Optional[PayloadCache]:
+    """Return the process-wide cache rooted at `PAYLOAD_CACHE_DIR`, or None when unset.
+
+    `PAYLOAD_CACHE_MAX_MB` bounds its size (default 256). Also None, with a
+    warning, when another process already uses the directory.
+    """
+    root = os.environ.get('PAYLOAD_CACHE_DIR')
+    if not root:
+        return None
+    if root not in _CACHE:
+        with _CACHE_LOCK:
+            if root not in _CACHE:
+                max_bytes = int(float(os.environ.get('PAYLOAD_CACHE_MAX_MB', 256)) * (1 << 20))
+                try:
+                    cache = PayloadCache(root, max_bytes=max_bytes)
+                except RuntimeError as e:
+                    warnings.warn(f'{e}; running without the payload cache')
+                    cache = None
+                else:
+                    atexit.register(cache.close)
+                _CACHE[root] = cache
+    return _CACHE[root]
@@ -0,0 +1,366 @@
+import atexit
+import calendar
+import datetime
+import json
+import os
+import shutil
+import threading
+import time
+import warnings
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from agents.pricing.price_history import parse_number, to_day
+from agents.storage.locking import lock_exclusive
+
+
+"""Compact columnar store for historical flight and hotel search results.
+
+SerpAPI results are flattened into typed columns — prices as float32,
+airports/airlines/properties as interned int32 ids, times as int64 unix
+timestamps and dates as int32 epoch days — and written as append-only
+chunks, one `.npy` file per column:
+
+    <root>/strings.json                    interned string table
+    <root>/<table>/index.json              chunk list with row counts, date range and keys
+    <root>/<table>/chunk_000001/price.npy  one file per column
+
+Scans memory-map only the columns they need and skip chunks whose index
+entry cannot match the requested key or date range, so filtering runs as
+vectorized NumPy over mapped pages.
+
+A root directory has a single writer process. The first write (or `claim()`)
+takes an exclusive lock on `<root>/.lock` and raises RuntimeError while
+another process holds it; `get_store()` then runs without an archive. Any
+number of processes may scan. Chunks are written to a temporary directory
+and renamed into place before the index names them, and claiming removes
+chunk directories the index does not list (left by a crash), so a failed
+flush never blocks later ones. A flush that fails anyway drops its rows with
+a warning rather than buffering them forever.
+"""
+
+
+FLIGHTS = 'flights'
+HOTELS = 'hotels'
+
+SCHEMAS: Dict[str, Dict[str, Any]] = {
+    FLIGHTS: {
+        'search_ts': np.int64,
+        'route': np.int32,
+        'departure_airport': np.int32,
+        'arrival_airport': np.int32,
+        'airline': np.int32,
+        'departure_time': np.int64,
+        'arrival_time': np.int64,
+        'outbound_day': np.int32,
+        'return_day': np.int32,
+        'duration_min': np.int32,
+        'stops': np.int8,
+        'price': np.float32,
+    },
+    HOTELS: {
+        'search_ts': np.int64,
+        'location': np.int32,
+        'property': np.int32,
+        'check_in_day': np.int32,
+        'check_out_day': np.int32,
+        'hotel_class': np.int8,
+        'rating': np.float32,
+        'price': np.float32,
+        'total_price': np.float32,
+    },
+}
+# Column used for key lookups and for date-range pruning, per table.
+KEY_COLUMN = {FLIGHTS: 'route', HOTELS: 'location'}
+DATE_COLUMN = {FLIGHTS: 'outbound_day', HOTELS: 'check_in_day'}
+
+MISSING = -1
+
+
+class StringTable:
+    """Append-only string interning table persisted as a JSON list."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.values: List[str] = json.loads(path.read_text()) if path.exists() else []
+        self._ids = {v: i for i, v in enumerate(self.values)}
+        self._saved = len(self.values)
+
+    def intern(self, value: Optional[str]) -> int:
+        if value is None or value == '':
+            return MISSING
+        sid = self._ids.get(value)
+        if sid is None:
+            sid = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return sid
+
+    def lookup(self, value: str) -> int:
+        return self._ids.get(value, MISSING)
+
+    def decode(self, sid: int) -> Optional[str]:
+        return self.values[sid] if 0 <= sid < len(self.values) else None
+
+    def save(self):
+        if len(self.values) != self._saved:
+            _atomic_write(self.path, json.dumps(self.values))
+            self._saved = len(self.values)
+
+
+def _atomic_write(path: Path, text: str):
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+def _timestamp(value: Any) -> int:
+    """Parse SerpAPI local times such as `2024-06-22 10:25` into unix seconds."""
+    if not value:
+        return MISSING
+    try:
+        dt = datetime.datetime.strptime(str(value)[:16], '%Y-%m-%d %H:%M')
+    except ValueError:
+        return MISSING
+    return calendar.timegm(dt.timetuple())
+
+
+def _route(departure: Optional[str], arrival: Optional[str]) -> str:
+    return f'{(departure or "?").upper()}-{(arrival or "?").upper()}'
+
+
+class SearchStore:
+
+    def __init__(self, root: str, chunk_rows: int = 65536):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.chunk_rows = chunk_rows
+        self.strings = StringTable(self.root / 'strings.json')
+        self._lock = threading.RLock()
+        self._buffers: Dict[str, Dict[str, list]] = {t: {c: [] for c in s} for t, s in SCHEMAS.items()}
+        self._index: Dict[str, List[Dict[str, Any]]] = {}
+        self._lockfile = None
+        for table in SCHEMAS:
+            (self.root / table).mkdir(exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        for table in SCHEMAS:
+            index_path = self.root / table / 'index.json'
+            self._index[table] = json.loads(index_path.read_text()) if index_path.exists() else []
+
+    def claim(self):
+        """Become the root's writer; RuntimeError if another process is writing to it."""
+        with self._lock:
+            if self._lockfile is not None:
+                return
+            lockfile = open(self.root / '.lock', 'a+b')
+            try:
+                lock_exclusive(lockfile)
+            except OSError:
+                lockfile.close()
+                raise RuntimeError(f'search store {self.root} is in use by another process') from None
+            self._lockfile = lockfile
+            # A previous writer may have flushed since this store was opened.
+            self.strings = StringTable(self.root / 'strings.json')
+            self._load_index()
+            for table in SCHEMAS:
+                indexed = {c['name'] for c in self._index[table]}
+                for entry in (self.root / table).iterdir():
+                    if entry.is_dir() and entry.name not in indexed:
+                        shutil.rmtree(entry, ignore_errors=True)
+
+    def _append(self, table: str, rows: List[Dict[str, Any]]):
+        buf = self._buffers[table]
+        for row in rows:
+            for col, values in buf.items():
+                values.append(row[col])
+        if len(buf['price']) >= self.chunk_rows:
+            self._flush_table(table)
+
+    def add_flights(self, params: Dict[str, Any], results: Any, search_ts: Optional[int] = None):
+        """Flatten one `flights_finder` result (list of itineraries) into rows."""
+        if not isinstance(results, list):
+            return
+        ts = int(time.time()) if search_ts is None else search_ts
+        outbound, ret = to_day(params.get('outbound_date')), to_day(params.get('return_date'))
+        with self._lock:
+            self.claim()
+            self._append(FLIGHTS, self._flight_rows(params, results, ts, outbound, ret))
+
+    def _flight_rows(self, params, results, ts, outbound, ret) -> List[Dict[str, Any]]:
+        s = self.strings
+        route = s.intern(_route(params.get('departure_id'), params.get('arrival_id')))
+        rows = []
+        for it in results:
+            if not isinstance(it, dict):
+                continue
+            legs = it.get('flights') or [{}]
+            first, last = legs[0], legs[-1]
+            price = parse_number(it.get('price'))
+            duration = parse_number(it.get('total_duration'))
+            rows.append({
+                'search_ts': ts,
+                'route': route,
+                'departure_airport': s.intern((first.get('departure_airport') or {}).get('id')),
+                'arrival_airport': s.intern((last.get('arrival_airport') or {}).get('id')),
+                'airline': s.intern(first.get('airline')),
+                'departure_time': _timestamp((first.get('departure_airport') or {}).get('time')),
+                'arrival_time': _timestamp((last.get('arrival_airport') or {}).get('time')),
+                'outbound_day': outbound,
+                'return_day': ret,
+                'duration_min': int(duration) if duration is not None else MISSING,
+                'stops': len(legs) - 1,
+                'price': price if price is not None else np.nan,
+            })
+        return rows
+
+    def add_hotels(self, params: Dict[str, Any], properties: Any, search_ts: Optional[int] = None):
+        """Flatten one `hotels_finder` result (list of properties) into rows."""
+        if not isinstance(properties, list):
+            return
+        ts = int(time.time()) if search_ts is None else search_ts
+        check_in, check_out = to_day(params.get('check_in_date')), to_day(params.get('check_out_date'))
+        with self._lock:
+            self.claim()
+            self._append(HOTELS, self._hotel_rows(params, properties, ts, check_in, check_out))
+
+    def _hotel_rows(self, params, properties, ts, check_in, check_out) -> List[Dict[str, Any]]:
+        s = self.strings
+        location = s.intern((params.get('q') or '').strip().lower())
+        rows = []
+        for prop in properties:
+            if not isinstance(prop, dict):
+                continue
+            rate = parse_number((prop.get('rate_per_night') or {}).get('extracted_lowest'))
+            total = parse_number((prop.get('total_rate') or {}).get('extracted_lowest'))
+            rating = parse_number(prop.get('overall_rating'))
+            hotel_class = parse_number(prop.get('extracted_hotel_class'))
+            rows.append({
+                'search_ts': ts,
+                'location': location,
+                'property': s.intern(prop.get('property_token') or prop.get('name')),
+                'check_in_day': check_in,
+                'check_out_day': check_out,
+                'hotel_class': int(hotel_class) if hotel_class is not None else MISSING,
+                'rating': rating if rating is not None else np.nan,
+                'price': rate if rate is not None else np.nan,
+                'total_price': total if total is not None else np.nan,
+            })
+        return rows
+
+    def _flush_table(self, table: str):
+        buf = self._buffers[table]
+        n = len(buf['price'])
+        if not n:
+            return
+        chunks = self._index[table]
+        name = f'chunk_{max((int(c["name"][6:]) for c in chunks), default=0) + 1:06d}'
+        tmp = self.root / table / f'.{name}.tmp'
+        try:
+            shutil.rmtree(tmp, ignore_errors=True)
+            tmp.mkdir()
+            columns = {c: np.asarray(v, dtype=SCHEMAS[table][c]) for c, v in buf.items()}
+            for col, arr in columns.items():
+                np.save(tmp / f'{col}.npy', arr)
+            os.replace(tmp, self.root / table / name)
+            dates = columns[DATE_COLUMN[table]]
+            known = dates[dates != MISSING]
+            entry = {
+                'name': name,
+                'rows': n,
+                'min_day': int(known.min()) if len(known) else MISSING,
+                'max_day': int(known.max()) if len(known) else MISSING,
+                'keys': sorted(int(k) for k in np.unique(columns[KEY_COLUMN[table]])),
+            }
+            # Strings first, then the index: a crash in between leaves unused strings, never dangling ids.
+            self.strings.save()
+            _atomic_write(self.root / table / 'index.json', json.dumps(chunks + [entry]))
+            chunks.append(entry)
+        except Exception as e:
+            shutil.rmtree(tmp, ignore_errors=True)
+            warnings.warn(f'search store: dropped {n} {table} rows that could not be written: {e!r}')
+        finally:
+            for values in buf.values():
+                values.clear()
+
+    def flush(self):
+        with self._lock:
+            for table in SCHEMAS:
+                self._flush_table(table)
+
+    def rows(self, table: str) -> int:
+        return sum(c['rows'] for c in self._index[table]) + len(self._buffers[table]['price'])
+
+    def scan(self, table: str, key: Optional[str] = None, start: Any = None, end: Any = None,
+             columns: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """Return matching rows as a dict of column arrays.
+
+        `key` is a route such as `MAD-JFK` (flights) or a location query (hotels);
+        `start`/`end` bound the table's date column inclusively and accept
+        `YYYY-MM-DD` strings, dates or epoch days.
+        """
+        columns = list(columns or SCHEMAS[table])
+        key_col, date_col = KEY_COLUMN[table], DATE_COLUMN[table]
+        kid = None
+        if key is not None:
+            kid = self.strings.lookup(key.upper() if table == FLIGHTS else key.strip().lower())
+            if kid == MISSING:
+                return {c: np.empty(0, dtype=SCHEMAS[table][c]) for c in columns}
+        lo = start if isinstance(start, int) or start is None else to_day(start)
+        hi = end if isinstance(end, int) or end is None else to_day(end)
+        needed = set(columns) | {key_col, date_col}
+
+        parts: List[Dict[str, np.ndarray]] = []
+        for chunk in self._index[table]:
+            if kid is not None and kid not in chunk['keys']:
+                continue
+            if lo is not None and chunk['max_day'] < lo or hi is not None and chunk['min_day'] > hi:
+                continue
+            chunk_dir = self.root / table / chunk['name']
+            parts.append({c: np.load(chunk_dir / f'{c}.npy', mmap_mode='r') for c in needed})
+        with self._lock:
+            buf = self._buffers[table]
+            if buf['price']:
+                parts.append({c: np.asarray(buf[c], dtype=SCHEMAS[table][c]) for c in needed})
+
+        out: Dict[str, List[np.ndarray]] = {c: [] for c in columns}
+        for part in parts:
+            mask = np.ones(len(part[date_col]), dtype=bool)
+            if kid is not None:
+                mask &= part[key_col] == kid
+            if lo is not None:
+                mask &= part[date_col] >= lo
+            if hi is not None:
+                mask &= part[date_col] <= hi
+            for c in columns:
+                out[c].append(part[c][mask])
+        return {c: np.concatenate(v) if v else np.empty(0, dtype=SCHEMAS[table][c]) for c, v in out.items()}
+
+
+_STORE: Dict[str, SearchStore] = {}
+_STORE_LOCK = threading.Lock()
+
+
+def get_store() -> Optional[SearchStore]:
+    """Return the process-wide store rooted at `SEARCH_STORE_DIR`, or None when unset.
+
+    Also None, with a warning, when another process is already writing there.
+    """
+    root = os.environ.get('SEARCH_STORE_DIR')
+    if not root:
+        return None
+    if root not in _STORE:
+        with _STORE_LOCK:
+            if root not in _STORE:
+                store = SearchStore(root)
+                try:
+                    store.claim()
+                except RuntimeError as e:
+                    warnings.warn(f'{e}; search results will not be archived')
+                    store = None
+                else:
+                    atexit.register(store.flush)
+                _STORE[root] = store
+    return _STORE[root]
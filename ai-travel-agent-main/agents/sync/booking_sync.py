@@ -1,28 +1,188 @@
-from typing import Dict, Any
-from agents.tools.flight_status import flight_status_tool
-from agents.tools.hotels_finder import hotels_finder
+import sys
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
-"""Simple booking synchronizer.
+from agents.tools.gateway import BACKGROUND, priority
+
+"""Booking synchronizer.
 
 This module demonstrates cross-service data synchronization: when a flight
 is delayed beyond a threshold, we mark linked hotel bookings for recheck and
 generate recommended actions.
+
+`BookingSync` is the stateful engine. It keeps the last-known (status,
+delay) of every tracked flight and an index from flight to linked bookings.
+Each status observation, whether polled or pushed by a webhook through
+`observe`, is diffed against that store. Actions are generated only for the
+bookings of flights whose status or delay changed, so the work and output of
+a cycle scale with the number of changes rather than the number of bookings.
+Bookings linked to a flight whose state is already known are evaluated
+against it at the flight's next observation, changed or not.
 """
 
 
+# Delays above this many minutes put linked hotel bookings on hold.
+DELAY_THRESHOLD_MIN = 60
+
+# Last-known state of a flight: (interned status, delay in minutes).
+FlightState = Tuple[Optional[str], int]
+
+
+def flight_key(flight_info: Dict[str, Any]) -> str:
+    """Index key for a flight: normalized flight number and date, e.g. 'AA95|2025-10-01'."""
+    number = ''.join((flight_info.get('flight_number') or '').split()).upper()
+    return f"{number}|{flight_info.get('date') or ''}"
+
+
+def fetch_flight_status(flight_info: Dict[str, Any]) -> Dict[str, Any]:
+    """Run `flight_status_tool` for `flight_info` as background work."""
+    from agents.tools.flight_status import flight_status_tool
+
+    with priority(BACKGROUND):
+        return flight_status_tool.invoke({'params': {
+            k: flight_info.get(k) for k in ('airline', 'flight_number', 'date')}})
+
+
+def _state(status: Dict[str, Any]) -> FlightState:
+    label = status.get('status')
+    return (sys.intern(label.lower()) if isinstance(label, str) else None,
+            int(status.get('estimated_delay_minutes') or 0))
+
+
+def _actions(previous: Optional[FlightState], current: FlightState, booking: Dict[str, Any]) -> List[Dict[str, Any]]:
+    booking_id = booking.get('id')
+    was_cancelled = previous is not None and previous[0] == 'cancelled'
+    was_delayed = previous is not None and previous[1] > DELAY_THRESHOLD_MIN
+    if current[0] == 'cancelled':
+        if was_cancelled:
+            return []
+        return [{'action': 'notify_user', 'message': 'Flight cancelled; rebook and review the hotel booking.'},
+                {'action': 'hold_or_cancel', 'booking_id': booking_id}]
+    if current[1] > DELAY_THRESHOLD_MIN:
+        if not was_delayed:
+            return [{'action': 'notify_user', 'message': 'Flight delayed >60 mins; consider adjusting hotel.'},
+                    {'action': 'hold_or_cancel', 'booking_id': booking_id}]
+        return [{'action': 'notify_user', 'message': f'Flight delay now {current[1]} mins.'}]
+    if was_delayed or was_cancelled:
+        return [{'action': 'notify_user', 'message': 'Flight back within 60 mins of schedule.'},
+                {'action': 'release_hold', 'booking_id': booking_id}]
+    return []
+
+
+class BookingSync:
+
+    def __init__(self, fetch: Callable[[Dict[str, Any]], Dict[str, Any]] = fetch_flight_status,
+                 notify: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.fetch = fetch
+        self.notify = notify
+        self._lock = threading.Lock()
+        self._flights: Dict[str, Dict[str, Any]] = {}      # flight key -> flight_info
+        self._last: Dict[str, FlightState] = {}             # flight key -> last-known state
+        self._by_flight: Dict[str, Set[Any]] = {}           # flight key -> booking ids
+        self._bookings: Dict[Any, Tuple[str, Dict[str, Any]]] = {}  # booking id -> (flight key, booking)
+        # Bookings linked after their flight's state was known, not yet evaluated against it.
+        self._pending: Dict[str, Set[Any]] = {}
+        self.stats = {'polled': 0, 'changes': 0, 'events': 0, 'errors': 0}
+
+    def __len__(self):
+        return len(self._bookings)
+
+    def link(self, flight_info: Dict[str, Any], booking_reference: Dict[str, Any]) -> str:
+        """Track hotel booking `booking_reference` (needs an 'id') against a flight; returns the flight key."""
+        key = flight_key(flight_info)
+        booking_id = booking_reference['id']
+        with self._lock:
+            self._unlink(booking_id)
+            self._flights.setdefault(key, dict(flight_info))
+            self._by_flight.setdefault(key, set()).add(booking_id)
+            self._bookings[booking_id] = (key, booking_reference)
+            if key in self._last:
+                # The flight may already be delayed or cancelled; act on it at the next observation.
+                self._pending.setdefault(key, set()).add(booking_id)
+        return key
+
+    def unlink(self, booking_id: Any):
+        with self._lock:
+            self._unlink(booking_id)
+
+    def _unlink(self, booking_id: Any):
+        entry = self._bookings.pop(booking_id, None)
+        if entry is None:
+            return
+        bookings = self._by_flight[entry[0]]
+        bookings.discard(booking_id)
+        pending = self._pending.get(entry[0])
+        if pending is not None:
+            pending.discard(booking_id)
+            if not pending:
+                del self._pending[entry[0]]
+        if not bookings:
+            # No booking left on the flight: stop tracking it.
+            del self._by_flight[entry[0]]
+            self._flights.pop(entry[0], None)
+            self._last.pop(entry[0], None)
+            self._pending.pop(entry[0], None)
+
+    def observe(self, key: str, status: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Apply a status update for flight `key` (polled or pushed); returns the events it causes."""
+        current = _state(status)
+        with self._lock:
+            if key not in self._by_flight:
+                return []
+            previous = self._last.get(key)
+            pending = self._pending.pop(key, set())
+            if previous == current:
+                # Unchanged: only bookings linked since the last observation need a look.
+                ids = pending
+            else:
+                self._last[key] = current
+                self.stats['changes'] += 1
+                ids = self._by_flight[key]
+            bookings = [(self._bookings[b][1], None if b in pending else previous) for b in ids]
+        events = []
+        for booking, before in bookings:
+            actions = _actions(before, current, booking)
+            if actions:
+                events.append({'flight': key, 'booking_id': booking.get('id'), 'flight_status': status,
+                               'previous': {'status': before[0], 'delay_minutes': before[1]} if before else None,
+                               'suggested_actions': actions})
+        self.stats['events'] += len(events)
+        if self.notify is not None:
+            for event in events:
+                self.notify(event)
+        return events
+
+    def poll(self, keys: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Fetch the status of each tracked flight (or of `keys`) once and return the change events."""
+        with self._lock:
+            flights = [(k, self._flights[k]) for k in (self._flights if keys is None else keys) if k in self._flights]
+        events = []
+        for key, info in flights:
+            try:
+                status = self.fetch(info)
+            except Exception:
+                self.stats['errors'] += 1
+                continue
+            self.stats['polled'] += 1
+            events.extend(self.observe(key, status))
+        return events
+
+    def run_forever(self, stop: threading.Event, poll_seconds: float = 300.0):
+        """Poll until `stop` is set; intended for a background thread."""
+        while not stop.is_set():
+            self.poll()
+            stop.wait(poll_seconds)
+
+
 def check_and_sync(flight_info: Dict[str, Any], booking_reference: Dict[str, Any]):
     """Check flight status and return suggested hotel actions.
 
     flight_info expects keys: airline, flight_number, date
     booking_reference is the hotel booking metadata (id, check_in, check_out)
+
+    Stateless one-off check; use `BookingSync` to be told only about changes.
     """
-    status = flight_status_tool(type('P', (object,), dict(**flight_info)))
+    status = fetch_flight_status(flight_info)
     # status is a dict with 'status' and 'estimated_delay_minutes'
-    delay = status.get('estimated_delay_minutes') or 0
-    actions = []
-    if delay and delay > 60:
-        actions.append({'action': 'notify_user', 'message': 'Flight delayed >60 mins; consider adjusting hotel.'})
-        actions.append({'action': 'hold_or_cancel', 'booking_id': booking_reference.get('id')})
-    else:
-        actions.append({'action': 'no_change'})
-    return {'flight_status': status, 'suggested_actions': actions}
+    actions = _actions(None, _state(status), booking_reference)
+    return {'flight_status': status, 'suggested_actions': actions or [{'action': 'no_change'}]}
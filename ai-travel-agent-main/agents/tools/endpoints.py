@@ -0,0 +1,140 @@
+import os
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+from agents.tools.gateway import get_gateway, request_key
+
+
+"""Base URLs for the external travel APIs used by the tools.
+
+Each provider can be pointed somewhere else through an environment variable,
+e.g. the local stand-in server in `benchmarks/mock_api_server.py` for load
+testing:
+
+- `SERPAPI_BASE_URL` (default `https://serpapi.com`) — flights and hotels;
+- `OPENWEATHER_BASE_URL` (default `https://api.openweathermap.org`) — weather;
+- `AVIATIONSTACK_BASE_URL` (default `http://api.aviationstack.com`) — flight status.
+
+Requests are made through the shared gateway (`agents/tools/gateway.py`).
+SerpAPI results are also kept in the encrypted payload cache
+(`agents/storage/payload_cache.py`) when `PAYLOAD_CACHE_DIR` is set, for
+`PAYLOAD_CACHE_TTL_S` seconds (default 3600).
+"""
+
+
+DEFAULT_BASE_URLS = {
+    'serpapi': 'https://serpapi.com',
+    'openweather': 'https://api.openweathermap.org',
+    'aviationstack': 'http://api.aviationstack.com',
+}
+
+_ENV_VARS = {
+    'serpapi': 'SERPAPI_BASE_URL',
+    'openweather': 'OPENWEATHER_BASE_URL',
+    'aviationstack': 'AVIATIONSTACK_BASE_URL',
+}
+
+_SERPAPI_CLIENTS: Dict[str, Any] = {}
+
+# Retries after a 429 that got past the gateway's own rate limit (e.g. quota shared with other hosts).
+_MAX_RETRIES = 2
+
+
+def base_url(provider: str) -> str:
+    return (os.environ.get(_ENV_VARS[provider]) or DEFAULT_BASE_URLS[provider]).rstrip('/')
+
+
+def url(provider: str, path: str) -> str:
+    return base_url(provider) + '/' + path.lstrip('/')
+
+
+def _serpapi_call(base: str, params: Dict[str, Any]):
+    import serpapi
+
+    if base == DEFAULT_BASE_URLS['serpapi']:
+        return serpapi.search(params)
+    client = _SERPAPI_CLIENTS.get(base)
+    if client is None:
+        client = serpapi.Client(api_key=params.get('api_key'))
+        client.BASE_DOMAIN = base
+        _SERPAPI_CLIENTS[base] = client
+    return client.search(dict(params))
+
+
+def serpapi_search(params: Dict[str, Any]):
+    """Run a SerpAPI search against the configured base URL.
+
+    Uses `serpapi.search` for the default endpoint and a client bound to
+    `SERPAPI_BASE_URL` otherwise; both return an object with `.data`.
+    Identical concurrent searches share one call; treat the result as read-only.
+    A payload cache hit is answered without entering the gateway, so it
+    neither waits for nor spends a rate-limit token.
+    """
+    base = base_url('serpapi')
+    cache, key = _payload_cache(base, params)
+    data = _cache_get(cache, key)
+    if data is not None:
+        return SimpleNamespace(data=data)
+    search = get_gateway().call('serpapi', request_key(base, params), lambda: _serpapi_call(base, params))
+    _cache_put(cache, key, search)
+    return search
+
+
+# Results persist in the encrypted payload cache when PAYLOAD_CACHE_DIR is set; never fail a search over it.
+
+def _payload_cache(base: str, params: Dict[str, Any]):
+    try:
+        from agents.storage.payload_cache import get_cache
+
+        cache = get_cache()
+    except Exception:
+        return None, None
+    if cache is None:
+        return None, None
+    return cache, request_key(base, {k: v for k, v in params.items() if k != 'api_key'})
+
+
+def _cache_get(cache, key: Optional[str]) -> Any:
+    if cache is None:
+        return None
+    try:
+        return cache.get_json(key, max_age_s=float(os.environ.get('PAYLOAD_CACHE_TTL_S', 3600)))
+    except Exception:
+        return None
+
+
+def _cache_put(cache, key: Optional[str], search):
+    if cache is None:
+        return
+    try:
+        cache.put_json(key, search.data)
+    except Exception:
+        pass
+
+
+def _retry_after(resp, attempt: int) -> float:
+    try:
+        return min(10.0, float(resp.headers.get('Retry-After')))
+    except (TypeError, ValueError, AttributeError):
+        return min(10.0, 0.5 * 2 ** attempt)
+
+
+def http_get(provider: str, path: str, params: Optional[Dict[str, Any]] = None, timeout: float = 10):
+    """GET `path` from `provider` through the gateway, retrying briefly on 429.
+
+    Returns the `requests` response, shared with identical concurrent callers.
+    """
+    import requests
+
+    target = url(provider, path)
+
+    def fetch():
+        for attempt in range(_MAX_RETRIES + 1):
+            resp = requests.get(target, params=params, timeout=timeout)
+            if getattr(resp, 'status_code', 200) != 429 or attempt == _MAX_RETRIES:
+                return resp
+            time.sleep(_retry_after(resp, attempt))
+        return resp
+
+    return get_gateway().call(provider, request_key(target, params), fetch)
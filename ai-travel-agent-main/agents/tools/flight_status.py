@@ -1,9 +1,10 @@
 import os
 from typing import Optional
-import requests
 from pydantic import BaseModel, Field
 from langchain_core.tools import tool
 
+from agents.tools.endpoints import http_get
+
 
 class FlightStatusInput(BaseModel):
     airline: Optional[str] = Field(None)
@@ -24,7 +25,7 @@ def flight_status_tool(params: FlightStatusInput):
     api_key = os.environ.get('AVIATIONSTACK_API_KEY') or os.environ.get('FLIGHTSTATUS_API_KEY')
     if api_key and params.flight_number:
         try:
-            resp = requests.get('http://api.aviationstack.com/v1/flights', params={
+            resp = http_get('aviationstack', '/v1/flights', params={
                 'access_key': api_key,
                 'flight_iata': params.flight_number
             }, timeout=10)
@@ -38,7 +39,7 @@ def flight_status_tool(params: FlightStatusInput):
                     'flight_number': params.flight_number,
                     'date': params.date or f.get('flight_date'),
                     'status': f.get('flight_status'),
-                    'estimated_delay_minutes': None
+                    'estimated_delay_minutes': (f.get('departure') or {}).get('delay')
                 }
         except Exception:
             pass
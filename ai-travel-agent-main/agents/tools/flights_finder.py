@@ -2,10 +2,12 @@ import os
 from typing import Optional
 
 # from pydantic import BaseModel, Field
-import serpapi
 from pydantic import BaseModel, Field
 from langchain_core.tools import tool
 
+from agents.tools.endpoints import serpapi_search
+from agents.tools.prefetch import record
+
 
 class FlightsInput(BaseModel):
     departure_airport: Optional[str] = Field(description='Departure airport code (IATA)')
@@ -22,6 +24,21 @@ class FlightsInputSchema(BaseModel):
     params: FlightsInput
 
 
+def _record(params, results):
+    # Feed the price history and the search archive; never fail the search over it.
+    try:
+        # NumPy-backed; imported here to keep the tool cheap to import.
+        from agents.pricing.price_forecast import record_flight_prices
+        from agents.storage.search_store import get_store
+
+        record_flight_prices(params['departure_id'], params['arrival_id'], params['outbound_date'], results)
+        store = get_store()
+        if store is not None:
+            store.add_flights(params, results)
+    except Exception:
+        pass
+
+
 @tool(args_schema=FlightsInputSchema)
 def flights_finder(params: FlightsInput):
     '''
@@ -49,8 +66,10 @@ def flights_finder(params: FlightsInput):
     }
 
     try:
-        search = serpapi.search(params)
+        search = serpapi_search(params)
         results = search.data['best_flights']
     except Exception as e:
         results = str(e)
+    else:
+        record(_record, params, results)
     return results
@@ -0,0 +1,248 @@
+import contextlib
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from agents.tools.ratelimit import TokenBucket
+from agents.tracing.tracer import span
+
+
+"""Shared outbound gateway for the external travel APIs.
+
+Every SerpAPI, OpenWeatherMap and AviationStack request from the tools goes
+through one process-wide `Gateway`, which:
+
+- coalesces concurrent identical requests (single flight): the first caller
+  makes the call, the others wait for and share its result;
+- applies a token-bucket rate limit per provider, so bursts queue instead of
+  burning quota and coming back as 429s;
+- serves queued callers by priority class, so interactive requests from chat
+  sessions go ahead of background work (price watches, booking sync).
+
+Background code marks its requests with `with priority(BACKGROUND): ...`.
+`Gateway.stats()` reports queueing delay and the calls saved by coalescing.
+
+Rate limits are requests per second, overridable per provider with
+`GATEWAY_RATE_<PROVIDER>=rate[:burst]` (e.g. `GATEWAY_RATE_SERPAPI=2:5`);
+a rate of 0 disables limiting for that provider.
+"""
+
+
+INTERACTIVE = 0
+# Speculative prefetches: ahead of background work, behind requests a user is waiting on.
+SPECULATIVE = 5
+BACKGROUND = 10
+
+DEFAULT_LIMITS = {
+    'serpapi': (5.0, 10.0),
+    'openweather': (1.0, 10.0),
+    'aviationstack': (1.0, 5.0),
+}
+
+# Queueing delays kept per provider for percentiles.
+_WAIT_SAMPLES = 1000
+
+_LOCAL = threading.local()
+
+
+class GatewayTimeout(Exception):
+    """Raised when a request waits longer than its deadline for a rate-limit slot."""
+
+
+@contextlib.contextmanager
+def priority(level: int):
+    """Run the enclosed requests of this thread at priority `level` (lower goes first)."""
+    previous = getattr(_LOCAL, 'priority', INTERACTIVE)
+    _LOCAL.priority = level
+    try:
+        yield
+    finally:
+        _LOCAL.priority = previous
+
+
+def current_priority() -> int:
+    return getattr(_LOCAL, 'priority', INTERACTIVE)
+
+
+def request_key(*parts: Any) -> str:
+    return json.dumps(parts, sort_keys=True, default=str)
+
+
+class _Limiter:
+    """Token bucket whose waiters are served in (priority, arrival) order."""
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float]):
+        self.bucket = TokenBucket(rate * 3600.0, burst=burst, clock=clock)
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._waiters: list = []
+        self._seq = itertools.count()
+
+    def acquire(self, level: int, timeout: Optional[float] = None):
+        entry = (level, next(self._seq))
+        deadline = None if timeout is None else self._clock() + timeout
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    head = self._waiters[0] == entry
+                    if head and self.bucket.take():
+                        heapq.heappop(self._waiters)
+                        self._cond.notify_all()
+                        return
+                    # Only the head knows when it can go; the rest sleep until notified.
+                    wait = (1.0 - self.bucket.tokens) / self.bucket.rate if head else None
+                    if deadline is not None:
+                        remaining = deadline - self._clock()
+                        if remaining <= 0:
+                            raise GatewayTimeout('rate-limit queue wait exceeded')
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            except BaseException:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                    self._cond.notify_all()
+                raise
+
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error', 'followers')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+class _ProviderStats:
+    __slots__ = ('calls', 'coalesced', 'errors', 'waits_ms', 'wait_total_ms')
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.waits_ms: deque = deque(maxlen=_WAIT_SAMPLES)
+        self.wait_total_ms = 0.0
+
+
+class Gateway:
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, float]]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self._limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self._clock = clock
+        self._limiters: Dict[str, Optional[_Limiter]] = {}
+        self._inflight: Dict[Tuple[str, str], _Flight] = {}
+        self._stats: Dict[str, _ProviderStats] = {}
+        self._lock = threading.Lock()
+
+    def _limiter(self, provider: str) -> Optional[_Limiter]:
+        if provider not in self._limiters:
+            rate, burst = self._limits.get(provider, (0.0, 0.0))
+            self._limiters[provider] = _Limiter(rate, max(1.0, burst), self._clock) if rate > 0 else None
+        return self._limiters[provider]
+
+    def call(self, provider: str, key: str, fn: Callable[[], Any], level: Optional[int] = None,
+             timeout: Optional[float] = None) -> Any:
+        """Run `fn` for request `key` of `provider`, sharing it with identical concurrent callers.
+
+        Exceptions from `fn` are re-raised in every caller waiting on it.
+        """
+        level = current_priority() if level is None else level
+        with self._lock:
+            stats = self._stats.setdefault(provider, _ProviderStats())
+            limiter = self._limiter(provider)
+            flight = self._inflight.get((provider, key))
+            leader = flight is None
+            if leader:
+                flight = self._inflight[(provider, key)] = _Flight()
+            else:
+                flight.followers += 1
+                stats.coalesced += 1
+
+        if not leader:
+            with span(f'gateway.{provider}', coalesced=True):
+                flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        with span(f'gateway.{provider}', coalesced=False, priority=level) as s:
+            try:
+                start = self._clock()
+                if limiter is not None:
+                    limiter.acquire(level, timeout)
+                waited_ms = (self._clock() - start) * 1000.0
+                s.set(queue_ms=round(waited_ms, 3))
+                with self._lock:
+                    stats.calls += 1
+                    stats.waits_ms.append(waited_ms)
+                    stats.wait_total_ms += waited_ms
+                flight.result = fn()
+            except BaseException as e:
+                flight.error = e
+                with self._lock:
+                    stats.errors += 1
+                raise
+            finally:
+                with self._lock:
+                    del self._inflight[(provider, key)]
+                    s.set(followers=flight.followers)
+                flight.done.set()
+        return flight.result
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-provider calls made, calls saved by coalescing, errors and queueing delay."""
+        with self._lock:
+            out = {}
+            for provider, st in self._stats.items():
+                waits = sorted(st.waits_ms)
+                out[provider] = {
+                    'calls': st.calls,
+                    'coalesced': st.coalesced,
+                    'errors': st.errors,
+                    'queue_ms_mean': st.wait_total_ms / st.calls if st.calls else 0.0,
+                    'queue_ms_p50': waits[len(waits) // 2] if waits else 0.0,
+                    'queue_ms_p99': waits[min(len(waits) - 1, int(len(waits) * 0.99))] if waits else 0.0,
+                    'queue_ms_max': waits[-1] if waits else 0.0,
+                }
+            return out
+
+
+def _limits_from_env() -> Dict[str, Tuple[float, float]]:
+    limits = dict(DEFAULT_LIMITS)
+    for provider in list(limits):
+        raw = os.environ.get(f'GATEWAY_RATE_{provider.upper()}')
+        if raw:
+            rate, _, burst = raw.partition(':')
+            limits[provider] = (float(rate), float(burst or max(1.0, float(rate))))
+    return limits
+
+
+_GATEWAY: Dict[str, Gateway] = {}
+_GATEWAY_LOCK = threading.Lock()
+
+
+def configure(limits: Optional[Dict[str, Tuple[float, float]]] = None) -> Gateway:
+    """Replace the process-wide gateway, e.g. `configure({})` for no rate limits in benchmarks."""
+    with _GATEWAY_LOCK:
+        gw = _GATEWAY['default'] = Gateway(_limits_from_env() if limits is None else limits)
+    return gw
+
+
+def get_gateway() -> Gateway:
+    """Process-wide gateway used by the tools."""
+    gw = _GATEWAY.get('default')
+    if gw is None:
+        with _GATEWAY_LOCK:
+            gw = _GATEWAY.get('default')
+            if gw is None:
+                gw = _GATEWAY['default'] = Gateway(_limits_from_env())
+    return gw
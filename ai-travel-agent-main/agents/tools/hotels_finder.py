@@ -1,12 +1,31 @@
 import os
-from typing import Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
-import serpapi
 from pydantic import BaseModel, Field
 from langchain_core.tools import tool
 
+from agents.optimizer.options import HotelOption, hotel_options
+from agents.tools.endpoints import base_url, serpapi_search
+from agents.tools.gateway import request_key
+from agents.tools.prefetch import record
+
 # from pydantic import BaseModel, Field
 
+# Properties returned to the model by the tool; more pages are fetched only by code that needs them.
+TOOL_RESULTS = 5
+# Fetched pages are reused for this long (matches the tool's ttl_s in agents/tools/registry.py).
+# A cached page keeps the raw properties the tool returns plus compact records for all of them,
+# and the recording of its prices, held back while the page only answered a prefetch.
+PAGE_TTL_S = 1800
+_MAX_PAGES = 256
+
+_Page = Tuple[float, Callable[[], None], List[Dict[str, Any]], List[HotelOption], Optional[str]]
+_PAGES: 'OrderedDict[str, _Page]' = OrderedDict()
+_LOCK = threading.Lock()
+
 
 class HotelsInput(BaseModel):
     q: str = Field(description='Location of the hotel')
@@ -24,16 +43,8 @@ class HotelsInputSchema(BaseModel):
     params: HotelsInput
 
 
-@tool(args_schema=HotelsInputSchema)
-def hotels_finder(params: HotelsInput):
-    '''
-    Find hotels using the Google Hotels engine.
-
-    Returns:
-        dict: Hotel search results.
-    '''
-
-    params = {
+def search_params(params: HotelsInput) -> Dict[str, Any]:
+    return {
         'api_key': os.environ.get('SERPAPI_API_KEY'),
         'engine': 'google_hotels',
         'hl': 'en',
@@ -49,6 +60,84 @@ def hotels_finder(params: HotelsInput):
         'hotel_class': params.hotel_class
     }
 
-    search = serpapi.search(params)
+
+def _record(params: Dict[str, Any], properties: List[Dict[str, Any]]):
+    # Feed the price history and the search archive; never fail the search over it.
+    try:
+        # NumPy-backed; imported here to keep the tool cheap to import.
+        from agents.pricing.price_forecast import record_hotel_prices
+        from agents.storage.search_store import get_store
+
+        record_hotel_prices(params['check_in_date'], properties)
+        store = get_store()
+        if store is not None:
+            store.add_hotels(params, properties)
+    except Exception:
+        pass
+
+
+def _page(params: Dict[str, Any], token: Optional[str]):
+    key = request_key(base_url('serpapi'), {k: v for k, v in params.items() if k != 'api_key'}, token)
+    with _LOCK:
+        hit = _PAGES.get(key)
+        fresh = hit is not None and time.monotonic() - hit[0] <= PAGE_TTL_S
+        if fresh:
+            _PAGES.move_to_end(key)
+    if fresh:
+        # Keeps the prices of a page a prefetch fetched once a real call reads it.
+        record(hit[1])
+        return hit[2:]
+    search = serpapi_search(dict(params, next_page_token=token) if token else params)
     results = search.data
-    return results['properties'][:5]
+    properties = results.get('properties') or []
+    next_token = (results.get('serpapi_pagination') or {}).get('next_page_token')
+    recorded = record(_record, params, properties)
+    page = (properties[:TOOL_RESULTS], hotel_options(properties), next_token)
+    with _LOCK:
+        _PAGES[key] = (time.monotonic(), recorded) + page
+        while len(_PAGES) > _MAX_PAGES:
+            _PAGES.popitem(last=False)
+    return page
+
+
+def fetch_page(params: Dict[str, Any], token: Optional[str] = None) -> Tuple[List[HotelOption], Optional[str]]:
+    """One page of properties as records and the token of the next page (None on the last page).
+
+    Pages are cached for `PAGE_TTL_S`, so walking the same search again costs no API calls.
+    """
+    _, options, next_token = _page(params, token)
+    return options, next_token
+
+
+def clear_page_cache():
+    with _LOCK:
+        _PAGES.clear()
+
+
+def hotel_pages(params: Dict[str, Any], max_pages: Optional[int] = None) -> Iterator[List[HotelOption]]:
+    """Lazily yield pages of properties, requesting the next page only when the caller asks for it."""
+    token, pages = None, 0
+    while max_pages is None or pages < max_pages:
+        properties, token = fetch_page(params, token)
+        pages += 1
+        yield properties
+        if not token:
+            return
+
+
+def iter_hotels(params: Dict[str, Any], max_pages: Optional[int] = None) -> Iterator[HotelOption]:
+    """Lazily yield properties across pages."""
+    for page in hotel_pages(params, max_pages):
+        yield from page
+
+
+@tool(args_schema=HotelsInputSchema)
+def hotels_finder(params: HotelsInput):
+    '''
+    Find hotels using the Google Hotels engine.
+
+    Returns:
+        dict: Hotel search results.
+    '''
+    properties, _, _ = _page(search_params(params), None)
+    return properties
@@ -0,0 +1,272 @@
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from agents.tools.gateway import SPECULATIVE, priority
+from agents.tools.registry import TurnCache, call_key, get_tool
+from agents.tracing.tracer import span
+
+
+"""Speculative prefetch of the searches a travel query is likely to need.
+
+While the LLM plans its first tool calls, `prefetch()` parses the user's
+message (origin, destination, dates, travellers, hotel class) and starts the
+matching flight and hotel searches on a small thread pool, at gateway
+priority `SPECULATIVE` so they never delay requests a user is waiting on.
+The futures are parked in the turn cache (`TurnCache.speculative`); when the
+LLM then asks for the same call, `invoke_tool` takes the running or finished
+prefetch instead of starting a new request.
+
+Predictions that do not exactly match a later call (after schema
+validation) are never used, so a wrong guess costs quota but not
+correctness. `Prefetch.finish()` cancels what has not started; prefetches
+that answered a tool call count as used, the rest (unclaimed or failed) as
+wasted. `stats()` reports launches, hits and the hit rate.
+
+Tools hand what they would keep about a search (price history, search
+archive) to `record()`. During a prefetch that is held back and only kept
+by `finish()` for the prefetches a tool call used, so guesses nobody asked
+for leave no trace in the stored data.
+
+Set `AGENT_PREFETCH=0` to turn prefetching off.
+"""
+
+
+# Flights and a hotel search per query; more would mostly be wasted quota.
+_MAX_WORKERS = 4
+
+_MONTHS = {m: i + 1 for i, m in enumerate(
+    ('january', 'february', 'march', 'april', 'may', 'june', 'july', 'august', 'september', 'october',
+     'november', 'december'))}
+_MONTHS.update({m[:3]: i for m, i in list(_MONTHS.items())})
+_MONTH_RE = '(' + '|'.join(sorted(_MONTHS, key=len, reverse=True)) + r')\.?'
+
+# City name -> main airport, for the cities the agent is most often asked about.
+CITY_AIRPORTS = {
+    'madrid': 'MAD', 'barcelona': 'BCN', 'new york': 'JFK', 'london': 'LHR', 'paris': 'CDG', 'rome': 'FCO',
+    'berlin': 'BER', 'amsterdam': 'AMS', 'lisbon': 'LIS', 'tokyo': 'HND', 'los angeles': 'LAX',
+    'san francisco': 'SFO', 'chicago': 'ORD', 'miami': 'MIA', 'boston': 'BOS', 'dubai': 'DXB',
+    'singapore': 'SIN', 'sydney': 'SYD', 'toronto': 'YYZ', 'frankfurt': 'FRA', 'munich': 'MUC',
+    'dublin': 'DUB', 'vienna': 'VIE', 'zurich': 'ZRH', 'istanbul': 'IST',
+}
+_AIRPORT_CITIES = {code: city for city, code in CITY_AIRPORTS.items()}
+# IATA codes are only recognised in capitals, so 'to the' is not read as an airport.
+_CITY_RE = '(' + '|'.join(sorted(CITY_AIRPORTS, key=len, reverse=True)) + r'|(?-i:[A-Z]{3}))\b'
+
+_HOTEL_WORDS = re.compile(r'\b(hotels?|stay|accommodations?|rooms?|trip|itinerary|plan)\b', re.I)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_LOCK = threading.Lock()
+_STATS = {'launched': 0, 'used': 0, 'wasted': 0, 'failed': 0}
+# Records held back by the prefetch running on this thread.
+_SPECULATING = threading.local()
+
+
+def _resolve_year(month: int, day: int, year: Optional[str], today: date) -> Optional[date]:
+    try:
+        when = date(int(year) if year else today.year, month, day)
+    except ValueError:
+        return None
+    if not year and when < today:
+        when = when.replace(year=today.year + 1)
+    return when
+
+
+def parse_dates(text: str, today: Optional[date] = None) -> Tuple[Optional[str], Optional[str]]:
+    """(outbound, return) as YYYY-MM-DD from 'October 1-7', '3-6 Nov', ISO dates or a single date."""
+    today = today or date.today()
+    iso = re.findall(r'\b(\d{4}-\d{2}-\d{2})\b', text)
+    if iso:
+        return iso[0], iso[1] if len(iso) > 1 else None
+    year = r'(?:,?\s+(\d{4}))?'
+    m = re.search(_MONTH_RE + r'\s+(\d{1,2})(?:st|nd|rd|th)?\b(?:\s*(?:-|–|to|until)\s*(\d{1,2})\b)?' + year,
+                  text, re.I)
+    if m:
+        month, first, last, y = _MONTHS[m.group(1).lower()], int(m.group(2)), m.group(3), m.group(4)
+    else:
+        m = re.search(r'\b(\d{1,2})(?:st|nd|rd|th)?(?:\s*(?:-|–|to|until)\s*(\d{1,2}))?\s+(?:of\s+)?' + _MONTH_RE
+                      + year, text, re.I)
+        if not m:
+            return None, None
+        month, first, last, y = _MONTHS[m.group(3).lower()], int(m.group(1)), m.group(2), m.group(4)
+    outbound = _resolve_year(month, first, y, today)
+    if outbound is None:
+        return None, None
+    back = None
+    if last:
+        back = outbound.replace(day=int(last)) if int(last) >= first else None
+        if back is None:  # 'October 28-3' runs into the next month
+            back = (outbound.replace(day=1) + timedelta(days=32)).replace(day=int(last))
+    return outbound.isoformat(), back.isoformat() if back else None
+
+
+def _place(text: str, words: str) -> Optional[str]:
+    """First known city (lower case) or IATA code following one of `words`."""
+    for m in re.finditer(r'\b(?:' + words + r')\s+' + _CITY_RE, text, re.I):
+        place = m.group(1)
+        if place.lower() in CITY_AIRPORTS:
+            return place.lower()
+        if place in _AIRPORT_CITIES or place.isupper():
+            return place
+    return None
+
+
+def parse_query(text: str, today: Optional[date] = None) -> Dict[str, Any]:
+    """Trip details mentioned in a free-text query; missing ones are None."""
+    outbound, back = parse_dates(text, today)
+    origin = _place(text, 'from')
+    destination = _place(text, 'to|in|visit|visiting')
+    adults = re.search(r'\b(\d+)\s+(?:adults?|people|persons|travell?ers)\b', text, re.I)
+    stars = re.search(r'\b([1-5])[- ]?stars?\b', text, re.I)
+    return {
+        'origin': origin,
+        'destination': destination,
+        'outbound_date': outbound,
+        'return_date': back,
+        'adults': int(adults.group(1)) if adults else 1,
+        'hotel_class': stars.group(1) if stars else None,
+        'wants_hotels': bool(_HOTEL_WORDS.search(text)),
+    }
+
+
+def _airport(place: Optional[str]) -> Optional[str]:
+    if place is None:
+        return None
+    return place if place in _AIRPORT_CITIES else CITY_AIRPORTS.get(place)
+
+
+def _city(place: Optional[str]) -> Optional[str]:
+    name = _AIRPORT_CITIES.get(place, place)
+    return name.title() if name else None
+
+
+def predict_calls(query: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Tool calls (name, args) the planner is likely to make for a parsed query."""
+    calls = []
+    if not query['outbound_date']:
+        return calls
+    departure, arrival = _airport(query['origin']), _airport(query['destination'])
+    if departure and arrival:
+        calls.append(('flights_finder', {'params': {
+            'departure_airport': departure, 'arrival_airport': arrival, 'outbound_date': query['outbound_date'],
+            'return_date': query['return_date'], 'adults': query['adults']}}))
+    if query['wants_hotels'] and query['destination'] and query['return_date']:
+        calls.append(('hotels_finder', {'params': {
+            'q': _city(query['destination']), 'check_in_date': query['outbound_date'],
+            'check_out_date': query['return_date'], 'adults': query['adults'],
+            'hotel_class': query['hotel_class']}}))
+    return calls
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    with _LOCK:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_MAX_WORKERS, thread_name_prefix='prefetch')
+        return _executor
+
+
+class _Once:
+    __slots__ = ('fn', 'args', 'lock')
+
+    def __init__(self, fn: Callable[..., Any], args: Tuple[Any, ...]):
+        self.fn = fn
+        self.args = args
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            fn, self.fn = self.fn, None
+            if fn is not None:
+                fn(*self.args)
+
+
+def record(fn: Callable[..., Any], *args: Any) -> Callable[[], None]:
+    """Run `fn(*args)` now, or, inside a prefetch, only once a tool call uses the prefetch.
+
+    Returns a callable that runs it if it has not run yet, for code that keeps
+    what was fetched and may later serve it to a real call.
+    """
+    once = _Once(fn, args)
+    pending = getattr(_SPECULATING, 'records', None)
+    if pending is None:
+        once()
+    else:
+        pending.append(once)
+    return once
+
+
+def _run(name: str, args: Dict[str, Any], records: List[Callable[[], None]]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    _SPECULATING.records = records
+    try:
+        with priority(SPECULATIVE), span(f'tool_prefetch.{name}'):
+            try:
+                value = get_tool(name).invoke(args)
+            except Exception:
+                with _LOCK:
+                    _STATS['failed'] += 1
+                raise
+    finally:
+        _SPECULATING.records = None
+    return value, (time.perf_counter() - start) * 1000.0
+
+
+class Prefetch:
+    """The speculative calls started for one turn."""
+
+    def __init__(self, cache: TurnCache, futures: Dict[str, Future],
+                 records: Optional[Dict[str, List[Callable[[], None]]]] = None):
+        self.cache = cache
+        self.futures = futures
+        self.records = records or {}
+
+    def finish(self) -> int:
+        """Cancel or disown the prefetches the turn did not use; returns how many were wasted."""
+        leftover = self.cache.drain_speculative()
+        for future in leftover:
+            future.cancel()
+        # A claimed prefetch that failed did not answer the call; the tool ran again instead.
+        unclaimed = {id(f) for f in leftover}
+        used = [key for key, f in self.futures.items()
+                if id(f) not in unclaimed and f.done() and not f.cancelled() and f.exception() is None]
+        for key in used:
+            for keep in self.records.get(key, ()):
+                keep()
+        wasted = len(self.futures) - len(used)
+        with _LOCK:
+            _STATS['wasted'] += wasted
+            _STATS['used'] += len(used)
+        return wasted
+
+
+def prefetch(text: str, cache: TurnCache, today: Optional[date] = None) -> Prefetch:
+    """Start the searches `text` is likely to need and park them in `cache`."""
+    futures: Dict[str, Future] = {}
+    records: Dict[str, List[Callable[[], None]]] = {}
+    if os.environ.get('AGENT_PREFETCH', '1') == '0':
+        return Prefetch(cache, futures)
+    for name, args in predict_calls(parse_query(text, today)):
+        key = call_key(name, args)
+        pending: List[Callable[[], None]] = []
+        future = _pool().submit(_run, name, args, pending)
+        if cache.add_speculative(key, future):
+            futures[key] = future
+            records[key] = pending
+        else:
+            future.cancel()
+    with _LOCK:
+        _STATS['launched'] += len(futures)
+    return Prefetch(cache, futures, records)
+
+
+def stats() -> Dict[str, float]:
+    with _LOCK:
+        out = dict(_STATS)
+    settled = out['used'] + out['wasted']
+    out['hit_rate'] = out['used'] / settled if settled else 0.0
+    return out
@@ -0,0 +1,30 @@
+import time
+from typing import Callable, Optional
+
+
+"""Rate limiting primitives shared by the gateway, the price-watch scheduler
+and the mock API server.
+
+Kept free of heavy imports so the tools can load it at import time.
+"""
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate_per_hour`."""
+
+    def __init__(self, rate_per_hour: float, burst: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate = rate_per_hour / 3600.0
+        self.capacity = burst if burst is not None else max(1.0, rate_per_hour / 60.0)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._last = clock()
+
+    def take(self) -> bool:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
@@ -0,0 +1,276 @@
+import contextlib
+import importlib
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from agents.tracing.tracer import span
+
+
+"""Lazy registry of the tools exposed to the LLM.
+
+Tools are listed by name and import path; a tool's module (and whatever it
+imports) is loaded the first time the tool is looked up, so importing the
+agent does not pay for every tool up front.
+
+Each tool also declares what it costs: expected latency, external API calls
+per invocation, how long its results stay fresh (`ttl_s`, 0 = not reused)
+and which other tools its result already covers. The agent uses this to:
+
+- reuse results within a user turn: `invoke_tool` answers a call from the
+  turn cache when the same tool already ran with equivalent arguments,
+  including the sub-searches `itinerary_builder` made;
+- tell the planner which tools are slow, costly or redundant (`planner_hints`);
+- keep live per-tool latency statistics (`latency_stats`).
+"""
+
+
+class ToolSpec:
+    __slots__ = ('name', 'path', 'latency_ms', 'api_calls', 'ttl_s', 'covers', 'summary')
+
+    def __init__(self, name: str, path: str, latency_ms: float, api_calls: int, ttl_s: float,
+                 covers: Tuple[str, ...] = (), summary: str = ''):
+        self.name = name
+        self.path = path
+        self.latency_ms = latency_ms
+        self.api_calls = api_calls
+        self.ttl_s = ttl_s
+        self.covers = covers
+        self.summary = summary
+
+    @property
+    def cacheable(self) -> bool:
+        return self.ttl_s > 0
+
+
+TOOL_SPECS = {spec.name: spec for spec in (
+    ToolSpec('flights_finder', 'agents.tools.flights_finder', latency_ms=2500, api_calls=1, ttl_s=900),
+    ToolSpec('hotels_finder', 'agents.tools.hotels_finder', latency_ms=2500, api_calls=1, ttl_s=1800),
+    ToolSpec('weather_tool', 'agents.tools.weather', latency_ms=300, api_calls=1, ttl_s=1800),
+    ToolSpec('flight_status_tool', 'agents.tools.flight_status', latency_ms=400, api_calls=1, ttl_s=120),
+    ToolSpec('itinerary_builder', 'agents.itinerary.itinerary_builder', latency_ms=5500, api_calls=3, ttl_s=0,
+             covers=('flights_finder', 'hotels_finder', 'weather_tool'),
+             summary='searches flights, hotels and weather for the trip and picks options within budget'),
+)}
+
+_LOADED: Dict[str, Any] = {}
+_LOCK = threading.Lock()
+
+# Latency samples kept per tool for percentiles.
+_LATENCY_SAMPLES = 500
+_LATENCIES: Dict[str, deque] = {}
+_COUNTS: Dict[str, Dict[str, int]] = {}
+
+# Open turn caches, oldest first; bounded so abandoned sessions do not accumulate.
+_MAX_TURNS = 1024
+_TURNS: 'OrderedDict[Any, TurnCache]' = OrderedDict()
+_LOCAL = threading.local()
+
+
+def tool_names() -> List[str]:
+    return list(TOOL_SPECS)
+
+
+def get_spec(name: str) -> Optional[ToolSpec]:
+    return TOOL_SPECS.get(name)
+
+
+def get_tool(name: str) -> Optional[Any]:
+    """Return the tool called `name`, importing its module on first use; None if unknown."""
+    tool = _LOADED.get(name)
+    if tool is None and name in TOOL_SPECS:
+        with _LOCK:
+            tool = _LOADED.get(name)
+            if tool is None:
+                tool = _LOADED[name] = getattr(importlib.import_module(TOOL_SPECS[name].path), name)
+    return tool
+
+
+def all_tools() -> List[Any]:
+    return [get_tool(name) for name in TOOL_SPECS]
+
+
+class TurnCache:
+    """Results of the tool calls made while answering one user message.
+
+    `speculative` holds futures for calls started ahead of time (see
+    `agents/tools/prefetch.py`); each resolves to `(result, exec_ms)`.
+    """
+    __slots__ = ('entries', 'speculative', '_lock')
+
+    def __init__(self):
+        self.entries: Dict[str, Tuple[float, Any]] = {}
+        self.speculative: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, ttl_s: float) -> Tuple[bool, Any]:
+        with self._lock:
+            hit = self.entries.get(key)
+        if hit is None or time.monotonic() - hit[0] > ttl_s:
+            return False, None
+        return True, hit[1]
+
+    def put(self, key: str, value: Any):
+        with self._lock:
+            self.entries[key] = (time.monotonic(), value)
+
+    def add_speculative(self, key: str, future: Future) -> bool:
+        with self._lock:
+            if key in self.entries or key in self.speculative:
+                return False
+            self.speculative[key] = future
+            return True
+
+    def take_speculative(self, key: str) -> Optional[Future]:
+        with self._lock:
+            return self.speculative.pop(key, None)
+
+    def drain_speculative(self) -> List[Future]:
+        """Remove and return the speculative calls nobody asked for."""
+        with self._lock:
+            futures = list(self.speculative.values())
+            self.speculative.clear()
+            return futures
+
+
+def turn_cache(turn_id: Any) -> TurnCache:
+    """The cache for `turn_id` (e.g. thread id and message index), created on first use."""
+    with _LOCK:
+        cache = _TURNS.get(turn_id)
+        if cache is None:
+            cache = _TURNS[turn_id] = TurnCache()
+            while len(_TURNS) > _MAX_TURNS:
+                _TURNS.popitem(last=False)
+        else:
+            _TURNS.move_to_end(turn_id)
+        return cache
+
+
+@contextlib.contextmanager
+def turn_scope(cache: Optional[TurnCache]):
+    """Serve `invoke_tool` calls on this thread from `cache` while the block runs."""
+    previous = getattr(_LOCAL, 'cache', None)
+    _LOCAL.cache = cache
+    try:
+        yield cache
+    finally:
+        _LOCAL.cache = previous
+
+
+def _plain(value: Any) -> Any:
+    if hasattr(value, 'model_dump'):
+        return value.model_dump(mode='json')
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    return value
+
+
+def call_key(name: str, args: Dict[str, Any]) -> str:
+    """Canonical form of a call: arguments validated against the tool schema, defaults filled in."""
+    tool = get_tool(name)
+    try:
+        args = tool.args_schema.model_validate(args).model_dump(mode='json')
+    except Exception:
+        args = _plain(args)
+    return name + ':' + json.dumps(args, sort_keys=True, default=str)
+
+
+def _new_counts() -> Dict[str, float]:
+    return {'calls': 0, 'reused': 0, 'errors': 0, 'prefetched': 0, 'prefetch_saved_ms': 0.0}
+
+
+def _count(name: str, field: str, amount: float = 1):
+    counts = _COUNTS.setdefault(name, _new_counts())
+    counts[field] += amount
+
+
+def _from_speculative(name: str, future: Future) -> Tuple[bool, Any]:
+    # A speculative call that failed is simply ignored; the caller runs the tool itself.
+    start = time.perf_counter()
+    try:
+        value, exec_ms = future.result()
+    except Exception:
+        return False, None
+    waited_ms = (time.perf_counter() - start) * 1000.0
+    with _LOCK:
+        _count(name, 'prefetched')
+        _count(name, 'prefetch_saved_ms', max(0.0, exec_ms - waited_ms))
+    return True, value
+
+
+def invoke_tool(name: str, args: Dict[str, Any]) -> Any:
+    """Invoke tool `name`, reusing an equivalent result from the current turn when allowed."""
+    spec = TOOL_SPECS[name]
+    cache = getattr(_LOCAL, 'cache', None)
+    key = call_key(name, args) if cache is not None and spec.cacheable else None
+    if key is not None:
+        hit, value = cache.get(key, spec.ttl_s)
+        if hit:
+            with _LOCK:
+                _count(name, 'reused')
+            return value
+        future = cache.take_speculative(key)
+        if future is not None:
+            hit, value = _from_speculative(name, future)
+            if hit:
+                cache.put(key, value)
+                return value
+
+    start = time.perf_counter()
+    try:
+        with span(f'tool_exec.{name}'):
+            value = get_tool(name).invoke(args)
+    except Exception:
+        with _LOCK:
+            _count(name, 'errors')
+        raise
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+    with _LOCK:
+        _count(name, 'calls')
+        _LATENCIES.setdefault(name, deque(maxlen=_LATENCY_SAMPLES)).append(elapsed_ms)
+    if key is not None:
+        cache.put(key, value)
+    return value
+
+
+def execution_order(names: Iterable[str]) -> List[int]:
+    """Indices of `names` with covering tools first, so their sub-results can serve the rest."""
+    names = list(names)
+    return sorted(range(len(names)), key=lambda i: -len(getattr(TOOL_SPECS.get(names[i]), 'covers', ())))
+
+
+def latency_stats() -> Dict[str, Dict[str, float]]:
+    """Live per-tool latency (ms), call counts and prefetch hits since start-up."""
+    with _LOCK:
+        out = {}
+        for name in TOOL_SPECS:
+            samples = sorted(_LATENCIES.get(name, ()))
+            counts = _COUNTS.get(name) or _new_counts()
+            out[name] = dict(counts, samples=len(samples),
+                             p50_ms=samples[len(samples) // 2] if samples else None,
+                             p95_ms=samples[min(len(samples) - 1, int(len(samples) * 0.95))] if samples else None)
+        return out
+
+
+def _rough_seconds(ms: float) -> str:
+    # Coarse buckets keep the hint text, and so the prompt prefix, stable between calls.
+    return '<1s' if ms < 1000 else f'~{round(ms / 1000.0)}s'
+
+
+def planner_hints(min_samples: int = 5) -> str:
+    """Prompt text describing each tool's latency, API cost and overlap with other tools."""
+    stats = latency_stats()
+    lines = ['Tool costs (prefer the cheapest set of calls that answers the request):']
+    for name, spec in TOOL_SPECS.items():
+        st = stats[name]
+        latency = st['p50_ms'] if st['samples'] >= min_samples else spec.latency_ms
+        line = f'- {name}: {_rough_seconds(latency)}, {spec.api_calls} API call{"s" if spec.api_calls > 1 else ""}'
+        if spec.covers:
+            line += (f'; {spec.summary}. Its result already covers {", ".join(spec.covers)} for the same trip, '
+                     'so do not also call those for that trip in the same turn unless more options are needed')
+        lines.append(line + '.')
+    lines.append('Results repeated with the same arguments within a turn are served from cache.')
+    return '\n'.join(lines)
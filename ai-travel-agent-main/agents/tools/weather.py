@@ -1,51 +1,218 @@
+import datetime
 import os
-from typing import Optional
-import requests
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
 from pydantic import BaseModel, Field
 from langchain_core.tools import tool
 
+from agents.tools.endpoints import http_get
+
+
+"""Weather lookups answered from a (city, day) forecast grid.
+
+One call to the OpenWeatherMap 5 day / 3 hour forecast returns every day the
+provider can forecast for a city. Its points are summarised per local day and
+stored as grid cells keyed by (normalized city, day), so a whole trip, a
+second question about another date, or many users heading to the same city
+are answered from the grid without further calls.
+
+Cells expire sooner the nearer their day is, since the provider revises near
+forecasts more often than it updates distant ones (`cell_ttl_s`). Days the
+last fetch did not cover (past days, or beyond its ~5 day horizon) are
+reported without a forecast until that fetch is `FORECAST_TTL_S` old, instead
+of calling again. Concurrent fetches for the same city are coalesced by the
+gateway.
+"""
+
+
+# How long a fetch's horizon is trusted: days outside it are not re-requested before then.
+FORECAST_TTL_S = 3600
+# Cell TTL by days ahead of today; later days use the last entry.
+_CELL_TTL_S = (3600, 3 * 3600, 3 * 3600, 6 * 3600)
+_PAST_TTL_S = 24 * 3600
+_MAX_CELLS = 4096
+
+_GRID: 'OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]' = OrderedDict()
+# city -> (expires, first day, last day) of its last fetch.
+_HORIZON: Dict[str, Tuple[float, str, str]] = {}
+_STATS = {'cell_hits': 0, 'cell_misses': 0, 'fetches': 0}
+_LOCK = threading.Lock()
+
 
 class WeatherInput(BaseModel):
     location: str = Field(description='City or lat/lon for weather lookup')
     date: Optional[str] = Field(None, description='YYYY-MM-DD (optional)')
+    end_date: Optional[str] = Field(None, description='YYYY-MM-DD, last day of a date range (optional)')
 
 
 class WeatherInputSchema(BaseModel):
     params: WeatherInput
 
 
+def normalize_city(location: str) -> str:
+    """Grid key for a location: accents stripped, case-folded, whitespace collapsed."""
+    text = unicodedata.normalize('NFKD', location)
+    text = ''.join(c for c in text if not unicodedata.combining(c)).casefold()
+    return ','.join(' '.join(part.split()) for part in text.split(','))
+
+
+def cell_ttl_s(day: str, today: Optional[datetime.date] = None) -> float:
+    lead = (datetime.date.fromisoformat(day) - (today or datetime.date.today())).days
+    if lead < 0:
+        return _PAST_TTL_S
+    return _CELL_TTL_S[min(lead, len(_CELL_TTL_S) - 1)]
+
+
+def daily_summaries(data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Per local day summaries of a forecast response, keyed by YYYY-MM-DD."""
+    offset = datetime.timedelta(seconds=(data.get('city') or {}).get('timezone') or 0)
+    points: Dict[str, List[Tuple[datetime.datetime, Dict[str, Any]]]] = {}
+    for point in data.get('list') or []:
+        if 'dt' not in point:
+            continue
+        when = datetime.datetime.fromtimestamp(point['dt'], datetime.timezone.utc) + offset
+        points.setdefault(when.date().isoformat(), []).append((when, point))
+
+    days = {}
+    for day, entries in points.items():
+        temps = [p['main']['temp'] for _, p in entries if (p.get('main') or {}).get('temp') is not None]
+        pops = [p['pop'] for _, p in entries if p.get('pop') is not None]
+        descriptions = Counter((p.get('weather') or [{}])[0].get('description') for _, p in entries)
+        # Prefer the description nearest midday; otherwise the most common one.
+        midday = min(entries, key=lambda e: abs(e[0].hour - 12))
+        forecast = (midday[1].get('weather') or [{}])[0].get('description') or descriptions.most_common(1)[0][0]
+        days[day] = {
+            'date': day,
+            'forecast': forecast,
+            'temperature_c': round(sum(temps) / len(temps), 1) if temps else None,
+            'temp_min_c': min(temps) if temps else None,
+            'temp_max_c': max(temps) if temps else None,
+            'precipitation_chance_pct': round(max(pops) * 100) if pops else None,
+        }
+    return days
+
+
+def _days(start: str, end: Optional[str]) -> List[str]:
+    first = datetime.date.fromisoformat(start)
+    last = datetime.date.fromisoformat(end) if end else first
+    return [(first + datetime.timedelta(days=i)).isoformat() for i in range((last - first).days + 1)]
+
+
+def _lookup(city: str, days: List[str], now: float) -> Tuple[Dict[str, Dict[str, Any]], bool]:
+    """(fresh cells, whether a fetch is needed) for `days` of `city`."""
+    found = {}
+    with _LOCK:
+        horizon = _HORIZON.get(city)
+        if horizon is not None and horizon[0] <= now:
+            horizon = None
+        fetch = False
+        for day in days:
+            cell = _GRID.get((city, day))
+            if cell is not None and cell[0] > now:
+                _GRID.move_to_end((city, day))
+                found[day] = cell[1]
+                _STATS['cell_hits'] += 1
+                continue
+            _STATS['cell_misses'] += 1
+            # A missing day outside a fresh fetch's horizon is not worth another call.
+            if horizon is None or horizon[1] <= day <= horizon[2]:
+                fetch = True
+    return found, fetch
+
+
+def _store(city: str, summaries: Dict[str, Dict[str, Any]], now: float, today: Optional[datetime.date]):
+    with _LOCK:
+        _STATS['fetches'] += 1
+        if summaries:
+            _HORIZON[city] = (now + FORECAST_TTL_S, min(summaries), max(summaries))
+        for day, summary in summaries.items():
+            _GRID[(city, day)] = (now + cell_ttl_s(day, today), summary)
+            _GRID.move_to_end((city, day))
+        while len(_GRID) > _MAX_CELLS:
+            _GRID.popitem(last=False)
+
+
+def forecast_range(location: str, start: str, end: Optional[str], api_key: str,
+                   today: Optional[datetime.date] = None) -> List[Dict[str, Any]]:
+    """Daily forecasts for `start`..`end` (inclusive) at `location`, fetching at most once.
+
+    Days the provider cannot forecast are returned with `forecast` None. Raises
+    if a needed fetch fails.
+    """
+    city, days, now = normalize_city(location), _days(start, end), time.time()
+    found, fetch = _lookup(city, days, now)
+    if fetch:
+        # The normalized name, so spellings of one city share the gateway's in-flight request too.
+        resp = http_get('openweather', '/data/2.5/forecast', params={
+            'q': city,
+            'appid': api_key,
+            'units': 'metric'
+        }, timeout=10)
+        resp.raise_for_status()
+        summaries = daily_summaries(resp.json())
+        _store(city, summaries, now, today)
+        found.update((day, summaries[day]) for day in days if day in summaries)
+
+    out = []
+    for day in days:
+        summary = found.get(day)
+        if summary is None:
+            summary = {'date': day, 'forecast': None, 'temperature_c': None, 'temp_min_c': None,
+                       'temp_max_c': None, 'precipitation_chance_pct': None,
+                       'note': 'outside the provider forecast window'}
+        out.append(dict(summary, location=location))
+    return out
+
+
+def clear_grid():
+    with _LOCK:
+        _GRID.clear()
+        _HORIZON.clear()
+
+
+def grid_stats() -> Dict[str, int]:
+    with _LOCK:
+        return dict(_STATS, cells=len(_GRID))
+
+
+def _stub(location: str, day: str) -> Dict[str, Any]:
+    # Fallback conservative stub
+    return {
+        'location': location,
+        'date': day,
+        'forecast': 'Partly cloudy',
+        'temperature_c': 23,
+        'precipitation_chance_pct': 10
+    }
+
+
 @tool(args_schema=WeatherInputSchema)
 def weather_tool(params: WeatherInput):
-    """Weather tool: uses OpenWeatherMap current weather API when WEATHER_API_KEY is set.
+    """Weather tool: daily OpenWeatherMap forecasts when WEATHER_API_KEY is set.
 
-    If the API key is not set or the call fails, returns a conservative static stub.
+    Gives the forecast for `date` (default today), or one entry per day under
+    'days' when `end_date` is also given. If the API key is not set or the call
+    fails, returns a conservative static stub.
     """
+    start = params.date or datetime.date.today().isoformat()
     api_key = os.environ.get('WEATHER_API_KEY') or os.environ.get('OPENWEATHER_API_KEY')
+    days = None
     if api_key:
         try:
-            # Use current weather endpoint for city name lookups
-            resp = requests.get('https://api.openweathermap.org/data/2.5/weather', params={
-                'q': params.location,
-                'appid': api_key,
-                'units': 'metric'
-            }, timeout=10)
-            resp.raise_for_status()
-            data = resp.json()
-            return {
-                'location': params.location,
-                'date': params.date or data.get('dt'),
-                'forecast': data.get('weather', [{}])[0].get('description'),
-                'temperature_c': data.get('main', {}).get('temp'),
-                'precipitation_chance_pct': None
-            }
+            days = forecast_range(params.location, start, params.end_date, api_key)
         except Exception:
             pass
+    if days is None:
+        try:
+            dates = _days(start, params.end_date)
+        except ValueError:  # not YYYY-MM-DD
+            dates = [start]
+        days = [_stub(params.location, day) for day in dates] or [_stub(params.location, start)]
 
-    # Fallback conservative stub
-    return {
-        'location': params.location,
-        'date': params.date or '2025-10-16',
-        'forecast': 'Partly cloudy',
-        'temperature_c': 23,
-        'precipitation_chance_pct': 10
-    }
+    if params.end_date is None:
+        return days[0]
+    return {'location': params.location, 'start_date': start, 'end_date': params.end_date, 'days': days}
@@ -0,0 +1,307 @@
+import contextlib
+import functools
+import importlib
+import json
+import os
+import random
+import threading
+import time
+import warnings
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+
+"""Low-overhead span tracing for the VoyageVerse agent graph.
+
+Spans are recorded for LangGraph nodes, tool invocations, PII masking and
+LLM requests. Sampling is decided once per trace (at the root span) so a
+sampled-out request pays only for a thread-local lookup per span. Finished
+spans are kept in a bounded in-memory buffer and can be exported as
+Chrome-trace JSON (chrome://tracing, Perfetto) or posted as OTLP/HTTP JSON
+to a local collector. With an exporter configured, the spans of every
+finished sampled trace are also handed to it on a background thread.
+
+Environment variables:
+- `TRACE_ENABLED` — set to `0` to disable tracing entirely (default `1`).
+- `TRACE_SAMPLE_RATE` — fraction of root spans to record (default `1.0`).
+- `TRACE_MAX_SPANS` — size of the in-memory span buffer (default `10000`).
+- `TRACE_CPU_TIME` — set to `1` to also record per-span thread CPU time.
+- `OTEL_EXPORTER_OTLP_ENDPOINT` — collector base URL for `export_otlp`.
+- `TRACE_EXPORTER` — export each finished trace: `otlp` (to the collector
+  above), `chrome` (one `trace-<trace id>.json` per trace in
+  `TRACE_EXPORT_DIR`, default the working directory) or `module:function`,
+  called with the trace's spans. Unset by default; see `set_exporter`. A
+  setting that cannot be resolved is reported once with a warning and
+  counted in `export_errors()`.
+"""
+
+
+_CONFIG = {
+    'enabled': os.environ.get('TRACE_ENABLED', '1') != '0',
+    'sample_rate': float(os.environ.get('TRACE_SAMPLE_RATE', '1.0')),
+    'cpu_time': os.environ.get('TRACE_CPU_TIME', '0') == '1',
+}
+# Resolved from TRACE_EXPORTER on first use (it may name a module that imports this one).
+_EXPORT: Dict[str, Any] = {'spec': os.environ.get('TRACE_EXPORTER', ''), 'fn': None, 'pool': None, 'errors': 0}
+_EXPORT_LOCK = threading.Lock()
+_SPANS: deque = deque(maxlen=int(os.environ.get('TRACE_MAX_SPANS', '10000')))
+_LOCAL = threading.local()
+# perf_counter is monotonic and cheap; the offset converts it to unix time for OTLP.
+_EPOCH_OFFSET_NS = time.time_ns() - time.perf_counter_ns()
+_SERVICE_NAME = 'voyageverse-agent'
+
+
+class Span:
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'start_ns', 'end_ns', 'cpu_start_ns', 'cpu_ns',
+                 'thread_id', 'attrs')
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attrs: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f'{random.getrandbits(64):016x}'
+        self.parent_id = parent_id
+        self.thread_id = threading.get_ident()
+        self.attrs = attrs
+        self.end_ns = 0
+        self.cpu_ns = 0
+        self.cpu_start_ns = time.thread_time_ns() if _CONFIG['cpu_time'] else 0
+        self.start_ns = time.perf_counter_ns()
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class _NoopSpan:
+    """Returned for sampled-out or disabled traces; accepts and drops attributes."""
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+# Marker pushed on the stack when a root span was sampled out, so children skip too.
+_SKIPPED = object()
+
+
+def configure(enabled: Optional[bool] = None, sample_rate: Optional[float] = None, cpu_time: Optional[bool] = None):
+    if enabled is not None:
+        _CONFIG['enabled'] = enabled
+    if sample_rate is not None:
+        _CONFIG['sample_rate'] = max(0.0, min(1.0, sample_rate))
+    if cpu_time is not None:
+        _CONFIG['cpu_time'] = cpu_time
+
+
+def _stack() -> list:
+    stack = getattr(_LOCAL, 'stack', None)
+    if stack is None:
+        stack = _LOCAL.stack = []
+    return stack
+
+
+@contextlib.contextmanager
+def span(name: str, **attrs):
+    """Record a timed span around the enclosed block.
+
+    Nested spans on the same thread become children of the enclosing span.
+    Yields a span object whose `set(**attrs)` adds attributes such as token
+    counts or payload sizes once they are known.
+    """
+    if not _CONFIG['enabled']:
+        yield _NOOP
+        return
+    stack = _stack()
+    parent = stack[-1] if stack else None
+    if parent is _SKIPPED:
+        yield _NOOP
+        return
+    if parent is None and random.random() >= _CONFIG['sample_rate']:
+        stack.append(_SKIPPED)
+        try:
+            yield _NOOP
+        finally:
+            stack.pop()
+        return
+
+    if parent is None:
+        s = Span(name, f'{random.getrandbits(128):032x}', None, attrs)
+        _LOCAL.trace = [] if _exporter() is not None else None
+    else:
+        s = Span(name, parent.trace_id, parent.span_id, attrs)
+    stack.append(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.attrs['error'] = type(e).__name__
+        raise
+    finally:
+        s.end_ns = time.perf_counter_ns()
+        if s.cpu_start_ns:
+            s.cpu_ns = time.thread_time_ns() - s.cpu_start_ns
+        stack.pop()
+        _SPANS.append(s)
+        trace = getattr(_LOCAL, 'trace', None)
+        if trace is not None:
+            trace.append(s)
+            if parent is None:
+                _LOCAL.trace = None
+                _submit(trace)
+
+
+def set_exporter(fn: Optional[Callable[[List[Span]], Any]]):
+    """Hand the spans of each finished sampled trace to `fn` (None to stop); overrides `TRACE_EXPORTER`."""
+    _EXPORT['spec'], _EXPORT['fn'] = '', fn
+
+
+def _exporter() -> Optional[Callable[[List[Span]], Any]]:
+    if _EXPORT['fn'] is None and _EXPORT['spec']:
+        spec, _EXPORT['spec'] = _EXPORT['spec'], ''
+        if spec == 'otlp':
+            _EXPORT['fn'] = lambda spans: export_otlp(spans=spans)
+        elif spec == 'chrome':
+            directory = os.environ.get('TRACE_EXPORT_DIR', '.')
+            _EXPORT['fn'] = lambda spans: export_chrome_trace(
+                os.path.join(directory, f'trace-{spans[-1].trace_id}.json'), spans)
+        else:
+            # A bad setting must not fail the request that happens to resolve it: warn once and trace in memory.
+            module, _, attr = spec.partition(':')
+            try:
+                fn = getattr(importlib.import_module(module), attr)
+                if not callable(fn):
+                    raise TypeError(f'{attr!r} is not callable')
+            except Exception as e:
+                _EXPORT['errors'] += 1
+                warnings.warn(f'TRACE_EXPORTER={spec!r} cannot be used ({e!r}); traces will not be exported')
+            else:
+                _EXPORT['fn'] = fn
+    return _EXPORT['fn']
+
+
+def export_errors() -> int:
+    """Traces that could not be exported, plus exporter settings that could not be resolved."""
+    return _EXPORT['errors']
+
+
+def _export(fn: Callable[[List[Span]], Any], spans: List[Span]):
+    try:
+        fn(spans)
+    except Exception:  # an unreachable collector must never fail a request
+        _EXPORT['errors'] += 1
+
+
+def _submit(spans: List[Span]):
+    fn = _exporter()
+    if fn is None:
+        return
+    if _EXPORT['pool'] is None:
+        from concurrent.futures import ThreadPoolExecutor
+        with _EXPORT_LOCK:
+            if _EXPORT['pool'] is None:
+                _EXPORT['pool'] = ThreadPoolExecutor(1, thread_name_prefix='trace-export')
+    _EXPORT['pool'].submit(_export, fn, spans)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator form of `span`; the span name defaults to the function name."""
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def payload_size(obj: Any) -> int:
+    """Approximate payload size in characters, as sent to the LLM."""
+    try:
+        return len(obj) if isinstance(obj, (str, bytes)) else len(str(obj))
+    except Exception:
+        return 0
+
+
+def finished_spans() -> List[Span]:
+    return list(_SPANS)
+
+
+def clear():
+    _SPANS.clear()
+
+
+def to_chrome_trace(spans: Optional[List[Span]] = None) -> Dict[str, Any]:
+    """Return spans in the Chrome trace-event format (complete 'X' events)."""
+    spans = finished_spans() if spans is None else spans
+    pid = os.getpid()
+    events = []
+    for s in spans:
+        events.append({
+            'name': s.name,
+            'cat': s.name.split('.', 1)[0],
+            'ph': 'X',
+            'ts': s.start_ns / 1000.0,
+            'dur': (s.end_ns - s.start_ns) / 1000.0,
+            'pid': pid,
+            'tid': s.thread_id,
+            'args': dict(s.attrs, trace_id=s.trace_id, span_id=s.span_id, parent_id=s.parent_id),
+        })
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def export_chrome_trace(outfile: str = 'trace.json', spans: Optional[List[Span]] = None) -> str:
+    with open(outfile, 'w', encoding='utf-8') as f:
+        json.dump(to_chrome_trace(spans), f)
+    return outfile
+
+
+def _otlp_value(v: Any) -> Dict[str, Any]:
+    if isinstance(v, bool):
+        return {'boolValue': v}
+    if isinstance(v, int):
+        return {'intValue': str(v)}
+    if isinstance(v, float):
+        return {'doubleValue': v}
+    return {'stringValue': str(v)}
+
+
+def to_otlp(spans: Optional[List[Span]] = None) -> Dict[str, Any]:
+    """Return spans as an OTLP/HTTP JSON `ExportTraceServiceRequest` body."""
+    spans = finished_spans() if spans is None else spans
+    otlp_spans = []
+    for s in spans:
+        item = {
+            'traceId': s.trace_id,
+            'spanId': s.span_id,
+            'name': s.name,
+            'kind': 1,
+            'startTimeUnixNano': str(s.start_ns + _EPOCH_OFFSET_NS),
+            'endTimeUnixNano': str(s.end_ns + _EPOCH_OFFSET_NS),
+            'attributes': [{'key': k, 'value': _otlp_value(v)} for k, v in s.attrs.items()],
+        }
+        if s.parent_id:
+            item['parentSpanId'] = s.parent_id
+        if 'error' in s.attrs:
+            item['status'] = {'code': 2, 'message': str(s.attrs['error'])}
+        otlp_spans.append(item)
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': _SERVICE_NAME}}]},
+            'scopeSpans': [{'scope': {'name': 'agents.tracing'}, 'spans': otlp_spans}],
+        }]
+    }
+
+
+def export_otlp(endpoint: Optional[str] = None, spans: Optional[List[Span]] = None, timeout: float = 5.0) -> int:
+    """POST spans to an OTLP/HTTP collector and return the HTTP status code."""
+    import requests
+
+    base = endpoint or os.environ.get('OTEL_EXPORTER_OTLP_ENDPOINT', 'http://localhost:4318')
+    url = base if base.endswith('/v1/traces') else base.rstrip('/') + '/v1/traces'
+    resp = requests.post(url, json=to_otlp(spans), timeout=timeout)
+    return resp.status_code
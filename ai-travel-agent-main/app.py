@@ -1,24 +1,22 @@
 # pylint: disable = invalid-name
-import os
 import uuid
 
 import streamlit as st
 from langchain_core.messages import HumanMessage
 
-from agents.agent import Agent
+from agents.agent import Agent, get_agent
 
 
-def populate_envs(sender_email, receiver_email, subject):
-    os.environ['FROM_EMAIL'] = sender_email
-    os.environ['TO_EMAIL'] = receiver_email
-    os.environ['EMAIL_SUBJECT'] = subject
+def email_config(sender_email, receiver_email, subject, thread_id):
+    # Passed with the run rather than set in os.environ, which every session of the process shares.
+    return {'configurable': {'thread_id': thread_id, 'from_email': sender_email, 'to_email': receiver_email,
+                             'email_subject': subject}}
 
 
 def send_email(sender_email, receiver_email, subject, thread_id):
     try:
-        populate_envs(sender_email, receiver_email, subject)
-        config = {'configurable': {'thread_id': thread_id}}
-        st.session_state.agent.graph.invoke(None, config=config)
+        config = email_config(sender_email, receiver_email, subject, thread_id)
+        shared_agent().invoke(None, config)
         st.success('Email sent successfully!')
         # Clear session state
         for key in ['travel_info', 'thread_id']:
@@ -27,9 +25,10 @@ def send_email(sender_email, receiver_email, subject, thread_id):
         st.error(f'Error sending email: {e}')
 
 
-def initialize_agent():
-    if 'agent' not in st.session_state:
-        st.session_state.agent = Agent()
+@st.cache_resource
+def shared_agent() -> Agent:
+    """One agent for every browser session of this process; sessions differ only by `thread_id`."""
+    return get_agent()
 
 
 def render_custom_css():
@@ -96,7 +95,13 @@ def process_query(user_input):
             messages = [HumanMessage(content=user_input)]
             config = {'configurable': {'thread_id': thread_id}}
 
-            result = st.session_state.agent.graph.invoke({'messages': messages}, config=config)
+            # Likely flight and hotel searches start while the model plans its first tool calls.
+            agent = shared_agent()
+            prefetch = agent.prefetch(user_input, config)
+            try:
+                result = agent.invoke({'messages': messages}, config)
+            finally:
+                prefetch.finish()
 
             st.subheader('Travel Information')
             st.write(result['messages'][-1].content)
@@ -126,7 +131,6 @@ def render_email_form():
 
 
 def main():
-    initialize_agent()
     render_custom_css()
     user_input = render_ui()
 
@@ -0,0 +1,85 @@
+"""Throughput benchmark for `agents/security/encryption.py`.
+
+Measures records/second for booking-sized records encrypted one call at a
+time with a freshly built cipher (the old behaviour), with the cached cipher,
+and in batches through `encrypt_many`/`decrypt_many` at several thread
+counts, plus MB/second for chunked file encryption and decryption.
+
+Usage (from the project directory):
+    python -m benchmarks.crypto_bench
+    python -m benchmarks.crypto_bench --records 50000 --record-bytes 2048 --file-mb 256 --workers 1 4 8
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+from unittest import mock
+
+from cryptography.fernet import Fernet
+
+from agents.security import encryption
+
+
+def _rate(count: float, fn) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return count / elapsed if elapsed else float('inf')
+
+
+def run(records: int = 20000, record_bytes: int = 1024, file_mb: int = 64,
+        workers: List[int] = (1, 2, 4, 8)) -> Dict[str, Any]:
+    items = [os.urandom(record_bytes) for _ in range(records)]
+    report: Dict[str, Any] = {'records': records, 'record_bytes': record_bytes, 'file_mb': file_mb}
+    with mock.patch.dict(os.environ, {'FERNET_KEY': Fernet.generate_key().decode()}):
+        key = os.environ['FERNET_KEY'].encode()
+        sample = items[:max(1, records // 10)]
+        report['per_call_new_cipher_rps'] = _rate(len(sample), lambda: [Fernet(key).encrypt(i) for i in sample])
+        report['per_call_cached_rps'] = _rate(records, lambda: [encryption.encrypt_bytes(i) for i in items])
+        tokens = encryption.encrypt_many(items)
+        report['encrypt_many_rps'] = {w: _rate(records, lambda: encryption.encrypt_many(items, workers=w))
+                                      for w in workers}
+        report['decrypt_many_rps'] = {w: _rate(records, lambda: encryption.decrypt_many(tokens, workers=w))
+                                      for w in workers}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            plain, sealed, opened = (os.path.join(tmp, n) for n in ('plain.bin', 'sealed.bin', 'opened.bin'))
+            with open(plain, 'wb') as f:
+                block = os.urandom(1 << 20)
+                for _ in range(file_mb):
+                    f.write(block)
+            report['stream_encrypt_mb_s'] = _rate(file_mb, lambda: encryption.encrypt_file(plain, sealed))
+            report['stream_decrypt_mb_s'] = _rate(file_mb, lambda: encryption.decrypt_file(sealed, opened))
+            report['stream_overhead'] = os.path.getsize(sealed) / os.path.getsize(plain)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--record-bytes', type=int, default=1024)
+    parser.add_argument('--file-mb', type=int, default=64)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args(argv)
+
+    report = run(args.records, args.record_bytes, args.file_mb, args.workers)
+    print(f"{report['records']} records x {report['record_bytes']} bytes")
+    print(f"  new cipher per call: {report['per_call_new_cipher_rps']:>10.0f} records/s")
+    print(f"  cached cipher:       {report['per_call_cached_rps']:>10.0f} records/s")
+    for w in args.workers:
+        print(f"  encrypt_many x{w:<3}   {report['encrypt_many_rps'][w]:>10.0f} records/s   "
+              f"decrypt_many {report['decrypt_many_rps'][w]:>10.0f} records/s")
+    print(f"{report['file_mb']} MB file: encrypt {report['stream_encrypt_mb_s']:.0f} MB/s, "
+          f"decrypt {report['stream_decrypt_mb_s']:.0f} MB/s, size x{report['stream_overhead']:.2f}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Training speed and recall benchmark for federated matrix factorization.
+
+Builds synthetic implicit-feedback data (`fed_mf.synthetic_interactions`),
+holds out one interaction per user (`fed_mf.hold_out`) and trains item
+factors with `agents/federated/fed_mf.py` at several process-pool sizes,
+reporting rounds/second. Recall@k on the held-out items is compared with a user-based
+kNN baseline built on `agents/recommender/collaborative.build_model` (items
+scored by the interactions of the nearest users), together with
+recommendations/second for both.
+
+Usage (from the project directory):
+    python -m benchmarks.fed_mf_bench
+    python -m benchmarks.fed_mf_bench --users 5000 --items 1000 --rounds 20 --workers 1 2 4
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from agents.federated import fed_mf
+from agents.recommender.collaborative import build_model
+from agents.recommender.factorized import FactorizedRecommender
+
+
+def knn_top_k(train: np.ndarray, k: int, neighbors: int = 20) -> np.ndarray:
+    model = build_model(train)
+    _, indices = model.kneighbors(train, n_neighbors=neighbors + 1)
+    scores = train[indices[:, 1:]].sum(axis=1)
+    scores[train > 0] = -np.inf
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def run(users: int = 2000, items: int = 500, factors: int = 16, rounds: int = 20, users_per_client: int = 8,
+        k: int = 10, workers: List[int] = (1, 2, 4)) -> Dict[str, Any]:
+    train, held = fed_mf.hold_out(fed_mf.synthetic_interactions(users, items))
+    report: Dict[str, Any] = {'users': users, 'items': items, 'factors': factors, 'rounds': rounds, 'k': k,
+                              'rounds_per_s': {}}
+    item_factors = None
+    for w in workers:
+        clients = fed_mf.make_clients(train, users_per_client)
+        start = time.perf_counter()
+        result = fed_mf.train_federated(clients, items, factors, rounds=rounds, workers=w)
+        report['rounds_per_s'][w] = rounds / (time.perf_counter() - start)
+        item_factors = result['item_factors']
+
+    recommender = FactorizedRecommender(item_factors)
+    start = time.perf_counter()
+    top = recommender.top_k(train, k)
+    report['mf_recs_per_s'] = users / (time.perf_counter() - start)
+    report['mf_recall'] = fed_mf.recall(top, held)
+
+    start = time.perf_counter()
+    top = knn_top_k(train, k)
+    report['knn_recs_per_s'] = users / (time.perf_counter() - start)
+    report['knn_recall'] = fed_mf.recall(top, held)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--items', type=int, default=500)
+    parser.add_argument('--factors', type=int, default=16)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--users-per-client', type=int, default=8)
+    parser.add_argument('-k', type=int, default=10)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args(argv)
+
+    report = run(args.users, args.items, args.factors, args.rounds, args.users_per_client, args.k, args.workers)
+    print(f"{report['users']} users x {report['items']} items, {report['factors']} factors, "
+          f"{report['rounds']} rounds, {-(-report['users'] // args.users_per_client)} clients")
+    for w, rate in report['rounds_per_s'].items():
+        print(f"  workers {w:<3} {rate:8.1f} rounds/s")
+    print(f"recall@{report['k']}: federated MF {report['mf_recall']:.3f} ({report['mf_recs_per_s']:.0f} users/s), "
+          f"kNN {report['knn_recall']:.3f} ({report['knn_recs_per_s']:.0f} users/s)")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""Concurrent load test of the agent graph against the local mock APIs.
+
+Starts `benchmarks/mock_api_server.py` in-process (or uses `--base-url` for
+one already running), points the tools at it through the base URL
+environment variables and drives many planning sessions at once through a
+single shared `Agent`, each with its own `thread_id`. The LLM is replaced by
+the scripted turns from `benchmarks/scenarios.json` with a modelled latency,
+so the run exercises tool I/O, masking and graph overhead under concurrency.
+
+Reports sessions/second, session latency percentiles, tool failures, the
+server's request, 429 and injected-error counts, and the outbound gateway's
+coalescing and queueing statistics. With `--prefetch` each session starts
+its speculative searches (`agents/tools/prefetch.py`) before the graph runs,
+and the report adds prefetch hits, waste and the tool latency they saved.
+
+Usage (from the project directory):
+    python -m benchmarks.load_test --sessions 2000 --concurrency 500 --api-latency-ms 300
+    python -m benchmarks.load_test --rate-limit 100 --error-rate 0.02
+    python -m benchmarks.load_test --api-latency-ms 300 --llm-latency-ms 800 --prefetch
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Any, Dict, List, Optional
+from unittest import mock
+
+from langchain_core.messages import HumanMessage, ToolMessage
+
+from agents.tools import gateway, prefetch, registry
+from benchmarks.mock_api_server import MockConfig, env_for, start_server
+from benchmarks.replay import LatencyModel, ScriptedChatModel
+from benchmarks.run_bench import SCENARIOS_PATH, percentile
+
+# The scripted scenarios plan trips in autumn 2025; prefetch resolves their dates from here.
+SCENARIO_TODAY = date(2025, 9, 1)
+
+
+class _ScriptRouter:
+    """Routes each LLM call to the scripted model of the session's scenario."""
+
+    def __init__(self, scenarios: Dict[str, Any], latency: LatencyModel):
+        self.models = {s['query']: ScriptedChatModel(s['script'], latency) for s in scenarios.values()}
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def invoke(self, messages, *args, **kwargs):
+        query = next(m.content for m in messages if isinstance(m, HumanMessage))
+        return self.models[query].invoke(messages, *args, **kwargs)
+
+
+def run(sessions: int = 200, concurrency: int = 50, llm_latency_ms: float = 0.0,
+        base_url: Optional[str] = None, config: Optional[MockConfig] = None,
+        scenarios: Optional[List[str]] = None, gateway_rate: float = 0.0,
+        use_prefetch: bool = False) -> Dict[str, Any]:
+    from agents.agent import get_agent
+
+    # One shared limit for every provider; 0 measures the server's own 429 behaviour.
+    gw = gateway.configure({p: (gateway_rate, max(1.0, gateway_rate)) for p in gateway.DEFAULT_LIMITS}
+                           if gateway_rate else {})
+
+    all_scenarios = json.loads(SCENARIOS_PATH.read_text(encoding='utf-8'))
+    chosen = {k: v for k, v in all_scenarios.items() if not scenarios or k in scenarios}
+    names = list(chosen)
+    latency = LatencyModel({'openai': {'mean_ms': llm_latency_ms, 'jitter_ms': llm_latency_ms / 4}},
+                           scale=1.0 if llm_latency_ms else 0.0)
+    server = None
+    if base_url:
+        env = {'SERPAPI_BASE_URL': base_url, 'OPENWEATHER_BASE_URL': base_url, 'AVIATIONSTACK_BASE_URL': base_url,
+               'SERPAPI_API_KEY': 'mock', 'WEATHER_API_KEY': 'mock', 'AVIATIONSTACK_API_KEY': 'mock'}
+    else:
+        server = start_server(config=config)
+        env = env_for(server)
+    env['OPENAI_API_KEY'] = 'mock'
+
+    latencies: List[float] = []
+    failures = {'sessions': 0, 'tool_errors': 0}
+    lock = threading.Lock()
+    run_id = uuid.uuid4().hex[:8]
+
+    def one_session(i: int):
+        scenario = chosen[names[i % len(names)]]
+        config = {'configurable': {'thread_id': f'load-{run_id}-{i}'}}
+        start = time.perf_counter()
+        pending = agent.prefetch(scenario['query'], config, today=SCENARIO_TODAY) if use_prefetch else None
+        try:
+            state = agent.invoke({'messages': [HumanMessage(content=scenario['query'])]}, config)
+        except Exception:
+            with lock:
+                failures['sessions'] += 1
+            return
+        finally:
+            if pending is not None:
+                pending.finish()
+        elapsed = (time.perf_counter() - start) * 1000
+        errors = sum(1 for m in state['messages'] if isinstance(m, ToolMessage) and 'error' in str(m.content).lower())
+        with lock:
+            latencies.append(elapsed)
+            failures['tool_errors'] += errors
+
+    prefetch_before = prefetch.stats()
+    saved_before = _prefetch_saved_ms()
+    try:
+        with mock.patch.dict(os.environ, env), \
+                mock.patch('agents.agent.ChatOpenAI', lambda *a, **k: _ScriptRouter(chosen, latency)), \
+                contextlib.redirect_stdout(io.StringIO()):
+            agent = get_agent()
+            wall_start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(one_session, range(sessions)))
+            wall = time.perf_counter() - wall_start
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    return {
+        'sessions': sessions,
+        'concurrency': concurrency,
+        'completed': len(latencies),
+        'failed_sessions': failures['sessions'],
+        'tool_errors': failures['tool_errors'],
+        'wall_s': wall,
+        'sessions_per_s': len(latencies) / wall if wall else 0.0,
+        'latency_ms': {'p50': percentile(latencies, 50), 'p90': percentile(latencies, 90),
+                       'p99': percentile(latencies, 99)},
+        'server': dict(server.stats) if server is not None else None,
+        'gateway': gw.stats(),
+        'prefetch': dict({k: v - prefetch_before[k] for k, v in prefetch.stats().items() if k != 'hit_rate'},
+                         saved_ms=_prefetch_saved_ms() - saved_before) if use_prefetch else None,
+    }
+
+
+def _prefetch_saved_ms() -> float:
+    return sum(st['prefetch_saved_ms'] for st in registry.latency_stats().values())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--scenario', action='append', help='run only the named scenario(s)')
+    parser.add_argument('--llm-latency-ms', type=float, default=0.0)
+    parser.add_argument('--base-url', help='use an already running mock server instead of starting one')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--hotels-per-city', type=int, default=60)
+    parser.add_argument('--api-latency-ms', type=float, default=0.0)
+    parser.add_argument('--latency-dist', choices=['fixed', 'normal', 'lognormal'], default='lognormal')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='mock API requests/second (0 = unlimited)')
+    parser.add_argument('--gateway-rate', type=float, default=0.0,
+                        help='outbound gateway requests/second per provider (0 = unlimited)')
+    parser.add_argument('--prefetch', action='store_true', help='start likely searches before each session runs')
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args(argv)
+
+    config = MockConfig(seed=args.seed, hotels_per_city=args.hotels_per_city, latency_ms=args.api_latency_ms,
+                        latency_dist=args.latency_dist, error_rate=args.error_rate, rate_limit=args.rate_limit)
+    report = run(args.sessions, args.concurrency, args.llm_latency_ms, args.base_url, config, args.scenario,
+                 args.gateway_rate, args.prefetch)
+    lat = report['latency_ms']
+    print(f"{report['completed']}/{report['sessions']} sessions in {report['wall_s']:.1f}s "
+          f"({report['sessions_per_s']:.1f}/s) at concurrency {report['concurrency']}")
+    print(f"latency p50={lat['p50']:.0f}ms p90={lat['p90']:.0f}ms p99={lat['p99']:.0f}ms; "
+          f"failed sessions={report['failed_sessions']} tool errors={report['tool_errors']}")
+    if report['server']:
+        print('mock server:', ', '.join(f'{k}={v}' for k, v in report['server'].items()))
+    for provider, st in report['gateway'].items():
+        print(f"gateway {provider}: calls={st['calls']} coalesced={st['coalesced']} errors={st['errors']} "
+              f"queue p50={st['queue_ms_p50']:.1f}ms p99={st['queue_ms_p99']:.1f}ms")
+    if report['prefetch']:
+        pf = report['prefetch']
+        settled = pf['used'] + pf['wasted']
+        print(f"prefetch: launched={pf['launched']} used={pf['used']} wasted={pf['wasted']} failed={pf['failed']} "
+              f"hit rate={pf['used'] / settled if settled else 0:.0%} tool time saved={pf['saved_ms'] / 1000:.1f}s")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+    return 1 if report['failed_sessions'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
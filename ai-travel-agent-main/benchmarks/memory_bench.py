@@ -0,0 +1,124 @@
+"""Resident memory per Streamlit session, with and without a shared agent.
+
+Each mode runs in a fresh interpreter that opens `--sessions` sessions and
+keeps them alive, as Streamlit keeps `st.session_state`. Every session plans
+one scripted turn (the LLM is replayed and answers without tool calls). The
+report gives RSS growth per extra session:
+
+- `per_session`: the old `app.initialize_agent` behaviour. Every session gets
+  its own tool-bound `ChatOpenAI` client, compiled `StateGraph` and
+  `MemorySaver`, and renders the Mermaid diagram;
+- `shared`: every session uses `agents.agent.get_agent()` and only gets its own
+  `thread_id`.
+
+Usage (from the project directory):
+    python -m benchmarks.memory_bench
+    python -m benchmarks.memory_bench --sessions 500 --json memory.json
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+from typing import Any, Dict, List
+from unittest import mock
+
+from benchmarks.run_bench import BENCH_DIR
+
+PROJECT_DIR = BENCH_DIR.parent
+MODES = ('per_session', 'shared')
+_SCRIPT = [{'content': 'Flights from Madrid to New York start at $702 USD.',
+            'usage': {'input_tokens': 1200, 'output_tokens': 150}}]
+
+
+def rss_bytes() -> int:
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class _PerSessionAgent:
+    """What each session used to build: its own LLM client, compiled graph and checkpointer."""
+
+    def __init__(self):
+        from langchain_openai import ChatOpenAI
+
+        from agents.agent import Agent
+        from agents.tools.registry import all_tools
+
+        self.model = ChatOpenAI(model='gpt-4o', api_key='memory-bench').bind_tools(all_tools())
+        self.graph = Agent._build(Agent.__new__(Agent))
+        print(self.graph.get_graph().draw_mermaid())
+
+
+def _session(mode: str, i: int) -> Dict[str, Any]:
+    from langchain_core.messages import HumanMessage
+
+    from agents.agent import get_agent
+
+    agent = _PerSessionAgent() if mode == 'per_session' else get_agent()
+    config = {'configurable': {'thread_id': f'memory-{mode}-{i}'}}
+    agent.graph.invoke({'messages': [HumanMessage(content='Flights from Madrid to New York on October 1')]},
+                       config=config)
+    return {'agent': agent, 'thread_id': config['configurable']['thread_id']}
+
+
+def measure(mode: str, sessions: int) -> Dict[str, Any]:
+    """RSS growth for `sessions` live sessions of `mode` in this process."""
+    from benchmarks.replay import LatencyModel, ScriptedChatModel
+
+    chat = ScriptedChatModel(_SCRIPT, LatencyModel(scale=0.0))
+    with mock.patch.dict(os.environ, {'OPENAI_API_KEY': 'memory-bench'}), \
+            mock.patch('agents.agent.ChatOpenAI', lambda *a, **k: chat), \
+            contextlib.redirect_stdout(io.StringIO()):
+        live: List[Dict[str, Any]] = [_session(mode, 0)]  # warm-up: imports, first graph, caches
+        gc.collect()
+        start = rss_bytes()
+        live.extend(_session(mode, i) for i in range(1, sessions + 1))
+        gc.collect()
+        end = rss_bytes()
+    return {'mode': mode, 'sessions': sessions, 'rss_start_mb': start / (1 << 20), 'rss_end_mb': end / (1 << 20),
+            'kb_per_session': (end - start) / 1024 / sessions}
+
+
+def run(sessions: int = 200, modes=MODES) -> Dict[str, Any]:
+    report: Dict[str, Any] = {'sessions': sessions, 'modes': {}}
+    for mode in modes:
+        proc = subprocess.run([sys.executable, '-m', 'benchmarks.memory_bench', '--child', mode,
+                               '--sessions', str(sessions)], cwd=PROJECT_DIR, capture_output=True, text=True,
+                              check=True)
+        report['modes'][mode] = json.loads(proc.stdout.strip().splitlines()[-1])
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=200)
+    parser.add_argument('--mode', action='append', choices=MODES, help='mode(s) to measure (default both)')
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.sessions)))
+        return 0
+    report = run(args.sessions, args.mode or MODES)
+    for mode, r in report['modes'].items():
+        print(f"{mode:<12} {r['kb_per_session']:>9.1f} KB RSS per extra session "
+              f"({r['rss_start_mb']:.0f} -> {r['rss_end_mb']:.0f} MB for {r['sessions']} sessions)")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
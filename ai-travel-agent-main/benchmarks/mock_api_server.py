@@ -0,0 +1,373 @@
+"""Local stand-in for SerpAPI, OpenWeatherMap and AviationStack.
+
+Serves the request/response shapes consumed by `flights_finder`,
+`hotels_finder`, `weather_tool` and `flight_status_tool`, generated on demand
+from a seed so any inventory size costs no memory and every run sees the same
+data. Latency distribution, error rate and 429 rate limiting are
+configurable, so the agent can be load-tested without the network.
+
+Point the tools at it with:
+    SERPAPI_BASE_URL=http://127.0.0.1:8765
+    OPENWEATHER_BASE_URL=http://127.0.0.1:8765
+    AVIATIONSTACK_BASE_URL=http://127.0.0.1:8765
+
+Usage (from the project directory):
+    python -m benchmarks.mock_api_server --port 8765 --latency-ms 300 --error-rate 0.01 --rate-limit 200
+"""
+import argparse
+import datetime
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from agents.tools.ratelimit import TokenBucket
+
+AIRPORTS = {
+    'MAD': ('Adolfo Suárez Madrid–Barajas Airport', 'Madrid'),
+    'JFK': ('John F. Kennedy International Airport', 'New York'),
+    'LHR': ('Heathrow Airport', 'London'), 'CDG': ('Paris Charles de Gaulle Airport', 'Paris'),
+    'BOS': ('Logan International Airport', 'Boston'), 'SFO': ('San Francisco International Airport', 'San Francisco'),
+    'LAX': ('Los Angeles International Airport', 'Los Angeles'), 'NRT': ('Narita International Airport', 'Tokyo'),
+    'HND': ('Haneda Airport', 'Tokyo'), 'DXB': ('Dubai International Airport', 'Dubai'),
+    'BOM': ('Chhatrapati Shivaji Maharaj International Airport', 'Mumbai'), 'GOI': ('Dabolim Airport', 'Goa'),
+    'FRA': ('Frankfurt Airport', 'Frankfurt'), 'AMS': ('Amsterdam Airport Schiphol', 'Amsterdam'),
+    'BCN': ('Josep Tarradellas Barcelona–El Prat Airport', 'Barcelona'),
+    'FCO': ('Leonardo da Vinci–Fiumicino Airport', 'Rome'),
+    'SIN': ('Singapore Changi Airport', 'Singapore'), 'ORD': ("O'Hare International Airport", 'Chicago'),
+}
+HUBS = ['LHR', 'FRA', 'AMS', 'DXB', 'BOS', 'ORD']
+AIRLINES = [('American', 'AA'), ('Iberia', 'IB'), ('British Airways', 'BA'), ('Air France', 'AF'),
+            ('Lufthansa', 'LH'), ('KLM', 'KL'), ('Emirates', 'EK'), ('Delta', 'DL'), ('United', 'UA'),
+            ('JetBlue', 'B6'), ('Singapore Airlines', 'SQ'), ('Japan Airlines', 'JL')]
+AIRCRAFT = ['Boeing 777', 'Boeing 787', 'Airbus A330', 'Airbus A350', 'Airbus A320neo', 'Boeing 737']
+HOTEL_WORDS = (['Grand', 'Royal', 'Park', 'Harbor', 'Central', 'Garden', 'Plaza', 'Riverside', 'Urban', 'Old Town'],
+               ['Hotel', 'Suites', 'Inn', 'Residences', 'Lodge', 'House'])
+WEATHER = [(800, 'clear sky'), (801, 'few clouds'), (802, 'scattered clouds'), (803, 'broken clouds'),
+           (500, 'light rain'), (501, 'moderate rain'), (701, 'mist')]
+HOTELS_PAGE_SIZE = 20
+
+
+class MockConfig:
+
+    def __init__(self, seed: int = 0, flights_per_search: int = 8, hotels_per_city: int = 60,
+                 latency_ms: float = 0.0, latency_sigma: float = 0.5, latency_dist: str = 'lognormal',
+                 error_rate: float = 0.0, rate_limit: float = 0.0, burst: Optional[float] = None):
+        self.seed = seed
+        self.flights_per_search = flights_per_search
+        self.hotels_per_city = hotels_per_city
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.latency_dist = latency_dist
+        self.error_rate = error_rate
+        # Requests per second across all clients; 0 disables 429s.
+        self.rate_limit = rate_limit
+        self.burst = burst
+
+
+def _rng(config: MockConfig, *parts: Any) -> random.Random:
+    return random.Random(zlib.crc32('|'.join(str(p) for p in (config.seed,) + parts).encode()))
+
+
+def _airport(code: str) -> Dict[str, str]:
+    name = AIRPORTS.get(code, (f'{code} International Airport', code))[0]
+    return {'name': name, 'id': code}
+
+
+def _fmt(dt: datetime.datetime) -> str:
+    return dt.strftime('%Y-%m-%d %H:%M')
+
+
+def _date(value: Optional[str]) -> datetime.date:
+    try:
+        return datetime.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime.date.today() + datetime.timedelta(days=30)
+
+
+def generate_flights(config: MockConfig, params: Dict[str, str]) -> Dict[str, Any]:
+    dep = (params.get('departure_id') or 'MAD').upper()
+    arr = (params.get('arrival_id') or 'JFK').upper()
+    day = _date(params.get('outbound_date'))
+    route_rng = _rng(config, dep, arr)
+    base_price = route_rng.uniform(90, 1100)
+    base_minutes = route_rng.randint(70, 840)
+    rng = _rng(config, dep, arr, day.isoformat())
+    # Weekend departures cost more; the same route keeps a stable price level.
+    day_factor = 1.15 if day.weekday() >= 4 else 1.0
+    itineraries = []
+    for i in range(config.flights_per_search):
+        airline, code = rng.choice(AIRLINES)
+        depart = datetime.datetime.combine(day, datetime.time(rng.randint(5, 22), rng.choice([0, 15, 30, 45])))
+        stops = 0 if i < 2 else rng.choice([0, 1, 1])
+        legs, t, total = [], depart, 0
+        hops = [dep] + ([rng.choice([h for h in HUBS if h not in (dep, arr)])] if stops else []) + [arr]
+        for a, b in zip(hops, hops[1:]):
+            minutes = int(base_minutes / len(hops[1:]) * rng.uniform(0.9, 1.2))
+            land = t + datetime.timedelta(minutes=minutes)
+            legs.append({'departure_airport': dict(_airport(a), time=_fmt(t)),
+                         'arrival_airport': dict(_airport(b), time=_fmt(land)),
+                         'duration': minutes, 'airplane': rng.choice(AIRCRAFT), 'airline': airline,
+                         'airline_logo': f'https://www.gstatic.com/flights/airline_logos/70px/{code}.png',
+                         'travel_class': 'Economy', 'flight_number': f'{code} {rng.randint(10, 9999)}',
+                         'legroom': '31 in', 'extensions': ['Average legroom (31 in)', 'Wi-Fi for a fee']})
+            layover = rng.randint(55, 180)
+            total += minutes + (layover if b != arr else 0)
+            t = land + datetime.timedelta(minutes=layover)
+        price = int(base_price * day_factor * rng.uniform(0.8, 1.35) * (0.85 if stops else 1.0))
+        itineraries.append({
+            'flights': legs,
+            'layovers': [{'duration': 90, 'name': _airport(h)['name'], 'id': h} for h in hops[1:-1]],
+            'total_duration': total,
+            'carbon_emissions': {'this_flight': total * 900, 'typical_for_this_route': total * 950},
+            'price': price,
+            'type': 'Round trip' if params.get('return_date') else 'One way',
+            'airline_logo': f'https://www.gstatic.com/flights/airline_logos/70px/{code}.png',
+            'departure_token': f'{dep}{arr}{day:%Y%m%d}{i:03d}',
+        })
+    itineraries.sort(key=lambda it: it['price'])
+    prices = [it['price'] for it in itineraries]
+    return {
+        'search_metadata': {'status': 'Success', 'total_time_taken': 0.0},
+        'search_parameters': {k: v for k, v in params.items() if k != 'api_key'},
+        'best_flights': itineraries[:3],
+        'other_flights': itineraries[3:],
+        'price_insights': {'lowest_price': min(prices) if prices else None, 'price_level': 'typical',
+                           'typical_price_range': [int(base_price * 0.85), int(base_price * 1.3)]},
+    }
+
+
+def generate_hotel(config: MockConfig, city: str, index: int, nights: int) -> Dict[str, Any]:
+    rng = _rng(config, 'hotel', city, index)
+    stars = rng.choice([2, 3, 3, 4, 4, 5])
+    rate = int(rng.uniform(40, 110) * stars * (1.4 if stars == 5 else 1.0))
+    name = f'{rng.choice(HOTEL_WORDS[0])} {city.title()} {rng.choice(HOTEL_WORDS[1])} {index + 1}'
+    token = f'mock-{zlib.crc32(f"{config.seed}|{city}|{index}".encode()):08x}'
+    return {
+        'type': 'hotel',
+        'name': name,
+        'link': f'https://example.com/hotels/{token}',
+        'property_token': token,
+        'gps_coordinates': {'latitude': round(rng.uniform(-60, 60), 5), 'longitude': round(rng.uniform(-150, 150), 5)},
+        'check_in_time': '3:00 PM',
+        'check_out_time': '11:00 AM',
+        'rate_per_night': {'lowest': f'${rate:,}', 'extracted_lowest': rate},
+        'total_rate': {'lowest': f'${rate * nights:,}', 'extracted_lowest': rate * nights},
+        'hotel_class': f'{stars}-star hotel',
+        'extracted_hotel_class': stars,
+        'overall_rating': round(rng.uniform(3.2, 4.9), 1),
+        'reviews': rng.randint(40, 9000),
+        'amenities': rng.sample(['Free Wi-Fi', 'Pool', 'Spa', 'Fitness centre', 'Restaurant', 'Bar',
+                                 'Air conditioning', 'Accessible', 'Pet-friendly'], 4),
+        'images': [{'thumbnail': f'https://example.com/img/{token}.jpg'}],
+    }
+
+
+def generate_hotels(config: MockConfig, params: Dict[str, str]) -> Dict[str, Any]:
+    city = (params.get('q') or 'new york').strip().lower()
+    check_in, check_out = _date(params.get('check_in_date')), _date(params.get('check_out_date'))
+    nights = max(1, (check_out - check_in).days)
+    try:
+        offset = int(params.get('next_page_token') or 0)
+    except ValueError:
+        offset = 0
+    end = min(config.hotels_per_city, offset + HOTELS_PAGE_SIZE)
+    properties = [generate_hotel(config, city, i, nights) for i in range(offset, end)]
+    hotel_class = params.get('hotel_class')
+    if hotel_class:
+        wanted = {int(c) for c in str(hotel_class).split(',') if c.strip().isdigit()}
+        properties = [p for p in properties if p['extracted_hotel_class'] in wanted]
+    pagination = {'current_from': offset + 1, 'current_to': end}
+    if end < config.hotels_per_city:
+        pagination['next_page_token'] = str(end)
+        pagination['next'] = f'/search.json?engine=google_hotels&q={city}&next_page_token={end}'
+    return {'search_metadata': {'status': 'Success'}, 'properties': properties, 'serpapi_pagination': pagination}
+
+
+def _weather_point(config: MockConfig, city: str, when: datetime.datetime) -> Dict[str, Any]:
+    rng = _rng(config, 'weather', city, when.strftime('%Y-%m-%d %H'))
+    climate = _rng(config, 'climate', city).uniform(2, 28)
+    code, desc = rng.choice(WEATHER)
+    temp = round(climate + 6 * math.sin((when.hour - 9) / 24 * 2 * math.pi) + rng.uniform(-2, 2), 1)
+    return {
+        'dt': int(when.replace(tzinfo=datetime.timezone.utc).timestamp()),
+        'main': {'temp': temp, 'feels_like': temp - 1, 'humidity': rng.randint(30, 95), 'pressure': 1013},
+        'weather': [{'id': code, 'main': desc.split()[-1].title(), 'description': desc}],
+        'wind': {'speed': round(rng.uniform(0, 12), 2)},
+        'pop': round(rng.uniform(0, 1) if code < 800 else rng.uniform(0, 0.2), 2),
+    }
+
+
+def generate_weather(config: MockConfig, params: Dict[str, str]) -> Dict[str, Any]:
+    city = (params.get('q') or 'new york').strip()
+    now = datetime.datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    return dict(_weather_point(config, city.lower(), now), name=city, cod=200)
+
+
+def generate_forecast(config: MockConfig, params: Dict[str, str]) -> Dict[str, Any]:
+    """OpenWeatherMap 5 day / 3 hour forecast shape."""
+    city = (params.get('q') or 'new york').strip()
+    start = datetime.datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    start -= datetime.timedelta(hours=start.hour % 3)
+    count = int(params.get('cnt') or 40)
+    points = []
+    for i in range(min(count, 40)):
+        when = start + datetime.timedelta(hours=3 * i)
+        points.append(dict(_weather_point(config, city.lower(), when), dt_txt=when.strftime('%Y-%m-%d %H:%M:%S')))
+    return {'cod': '200', 'cnt': len(points), 'list': points, 'city': {'name': city}}
+
+
+def generate_flight_status(config: MockConfig, params: Dict[str, str]) -> Dict[str, Any]:
+    iata = (params.get('flight_iata') or 'AA95').upper().replace(' ', '')
+    day = _date(params.get('flight_date'))
+    rng = _rng(config, 'status', iata, day.isoformat())
+    status = rng.choices(['scheduled', 'active', 'landed', 'cancelled', 'diverted'], [40, 30, 25, 3, 2])[0]
+    delay = rng.choice([None, 0, 5, 15, 35, 75, 140]) if status != 'cancelled' else None
+    code = ''.join(c for c in iata if c.isalpha())[:2]
+    airline = next((name for name, c in AIRLINES if c == code), f'{code} Airlines')
+    dep, arr = rng.sample(list(AIRPORTS), 2)
+    return {'pagination': {'limit': 100, 'offset': 0, 'count': 1, 'total': 1}, 'data': [{
+        'flight_date': day.isoformat(), 'flight_status': status,
+        'departure': {'airport': AIRPORTS[dep][0], 'iata': dep, 'delay': delay},
+        'arrival': {'airport': AIRPORTS[arr][0], 'iata': arr, 'delay': delay},
+        'airline': {'name': airline, 'iata': code},
+        'flight': {'number': iata[len(code):], 'iata': iata},
+    }]}
+
+
+class MockAPIServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address: Tuple[str, int], config: MockConfig):
+        super().__init__(address, _Handler)
+        self.config = config
+        self.stats = {'requests': 0, 'rate_limited': 0, 'errors': 0}
+        self._lock = threading.Lock()
+        self._rng = random.Random(config.seed)
+        self._bucket = TokenBucket(config.rate_limit * 3600, burst=config.burst or max(1.0, config.rate_limit)) \
+            if config.rate_limit > 0 else None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def admit(self) -> Tuple[int, Optional[Dict[str, str]], float]:
+        """Decide the fate of one request: (status, error body or None, latency seconds)."""
+        cfg = self.config
+        with self._lock:
+            self.stats['requests'] += 1
+            if self._bucket is not None and not self._bucket.take():
+                self.stats['rate_limited'] += 1
+                return 429, {'error': 'Your account has run out of searches.'}, 0.0
+            if cfg.latency_dist == 'fixed':
+                latency = cfg.latency_ms
+            elif cfg.latency_dist == 'normal':
+                latency = max(0.0, self._rng.gauss(cfg.latency_ms, cfg.latency_ms * cfg.latency_sigma))
+            else:
+                latency = cfg.latency_ms * self._rng.lognormvariate(0.0, cfg.latency_sigma) if cfg.latency_ms else 0.0
+            if self._rng.random() < cfg.error_rate:
+                self.stats['errors'] += 1
+                return 500, {'error': 'Internal server error (injected).'}, latency / 1000.0
+        return 200, None, latency / 1000.0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: MockAPIServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: Dict[str, Any]):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        routes = {
+            '/search': self._serpapi, '/search.json': self._serpapi,
+            '/data/2.5/weather': generate_weather, '/data/2.5/forecast': generate_forecast,
+            '/v1/flights': generate_flight_status,
+        }
+        handler = routes.get(parsed.path)
+        if handler is None:
+            self._send(404, {'error': f'Unknown path {parsed.path}'})
+            return
+        status, error, latency = self.server.admit()
+        if latency:
+            time.sleep(latency)
+        if error is not None:
+            self._send(status, error)
+            return
+        try:
+            self._send(200, handler(self.server.config, params))
+        except ValueError as e:
+            self._send(400, {'error': str(e)})
+
+    @staticmethod
+    def _serpapi(config: MockConfig, params: Dict[str, str]) -> Dict[str, Any]:
+        engine = params.get('engine')
+        if engine == 'google_flights':
+            return generate_flights(config, params)
+        if engine == 'google_hotels':
+            return generate_hotels(config, params)
+        raise ValueError(f'Unsupported engine: {engine}')
+
+
+def start_server(host: str = '127.0.0.1', port: int = 0, config: Optional[MockConfig] = None) -> MockAPIServer:
+    """Start the server on a background thread and return it (`port=0` picks a free port)."""
+    server = MockAPIServer((host, port), config or MockConfig())
+    threading.Thread(target=server.serve_forever, name='mock-api-server', daemon=True).start()
+    return server
+
+
+def env_for(server: MockAPIServer) -> Dict[str, str]:
+    """Environment variables that point every tool at `server`."""
+    return {'SERPAPI_BASE_URL': server.base_url, 'OPENWEATHER_BASE_URL': server.base_url,
+            'AVIATIONSTACK_BASE_URL': server.base_url, 'SERPAPI_API_KEY': 'mock', 'WEATHER_API_KEY': 'mock',
+            'AVIATIONSTACK_API_KEY': 'mock'}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Local stand-in travel API server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--flights-per-search', type=int, default=8)
+    parser.add_argument('--hotels-per-city', type=int, default=60)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='median injected latency')
+    parser.add_argument('--latency-sigma', type=float, default=0.5)
+    parser.add_argument('--latency-dist', choices=['fixed', 'normal', 'lognormal'], default='lognormal')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='requests/second before 429s (0 = off)')
+    args = parser.parse_args(argv)
+    config = MockConfig(seed=args.seed, flights_per_search=args.flights_per_search,
+                        hotels_per_city=args.hotels_per_city, latency_ms=args.latency_ms,
+                        latency_sigma=args.latency_sigma, latency_dist=args.latency_dist,
+                        error_rate=args.error_rate, rate_limit=args.rate_limit)
+    server = MockAPIServer((args.host, args.port), config)
+    print(f'Mock travel APIs on {server.base_url}')
+    for k, v in env_for(server).items():
+        print(f'  {k}={v}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Throughput and compression benchmark for `agents/storage/payload_cache.py`.
+
+Uses the recorded SerpAPI hotel and flight responses in
+`benchmarks/fixtures/serpapi.json`. Reports the compression ratio of each
+payload kind per codec, then writes `--entries` payloads (each fixture with a
+distinct search id, so nothing is deduplicated) and reads them back,
+reporting entries/second and MB/second of raw JSON in both directions.
+
+Usage (from the project directory):
+    python -m benchmarks.payload_cache_bench
+    python -m benchmarks.payload_cache_bench --entries 20000 --codec zlib
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+from unittest import mock
+
+from cryptography.fernet import Fernet
+
+from agents.storage import payload_cache
+from benchmarks.run_bench import BENCH_DIR
+
+FIXTURES_PATH = BENCH_DIR / 'fixtures' / 'serpapi.json'
+CODECS = {'zlib': payload_cache.ZLIB, 'zstd': payload_cache.ZSTD}
+
+
+def _payloads() -> Dict[str, List[bytes]]:
+    fixtures = json.loads(FIXTURES_PATH.read_text(encoding='utf-8'))
+    kinds: Dict[str, List[bytes]] = {'flights': [], 'hotels': []}
+    for key, data in fixtures.items():
+        kinds['hotels' if key.startswith('google_hotels') else 'flights'].append(json.dumps(data).encode())
+    return kinds
+
+
+def _variant(payload: bytes, i: int) -> bytes:
+    return b'{"search_id":%d,' % i + payload[1:]
+
+
+def run(entries: int = 5000, codecs: List[str] = None) -> Dict[str, Any]:
+    codecs = codecs or [c for c in CODECS if c != 'zstd' or payload_cache._zstd() is not None]
+    kinds = _payloads()
+    samples = [p for payloads in kinds.values() for p in payloads]
+    report: Dict[str, Any] = {'entries': entries, 'codecs': {}}
+    with mock.patch.dict(os.environ, {'FERNET_KEY': Fernet.generate_key().decode()}):
+        for name in codecs:
+            with tempfile.TemporaryDirectory() as tmp:
+                cache = payload_cache.PayloadCache(tmp, max_bytes=1 << 40, codec=CODECS[name])
+                ratios = {}
+                for kind, payloads in kinds.items():
+                    stored = sum(len(payload_cache._compress(p, cache.codec, cache.level)) for p in payloads)
+                    ratios[kind] = sum(len(p) for p in payloads) / stored
+
+                written = [_variant(samples[i % len(samples)], i) for i in range(entries)]
+                raw_mb = sum(len(p) for p in written) / (1 << 20)
+                start = time.perf_counter()
+                for i, payload in enumerate(written):
+                    cache.put(f'search-{i}', payload)
+                cache.flush()
+                write_s = time.perf_counter() - start
+                start = time.perf_counter()
+                for i in range(entries):
+                    cache.get(f'search-{i}')
+                read_s = time.perf_counter() - start
+                report['codecs'][name] = {
+                    'compression_ratio': ratios,
+                    'stored_ratio': cache.compression_ratio(),
+                    'write_per_s': entries / write_s, 'write_mb_s': raw_mb / write_s,
+                    'read_per_s': entries / read_s, 'read_mb_s': raw_mb / read_s,
+                }
+                cache.close()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=5000)
+    parser.add_argument('--codec', action='append', choices=list(CODECS), help='codec(s) to measure (default all)')
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args(argv)
+
+    report = run(args.entries, args.codec)
+    for name, r in report['codecs'].items():
+        ratios = ', '.join(f'{kind} x{ratio:.1f}' for kind, ratio in r['compression_ratio'].items())
+        print(f"{name}: compression {ratios}; on disk incl. encryption x{r['stored_ratio']:.1f}")
+        print(f"  write {r['write_per_s']:.0f} entries/s ({r['write_mb_s']:.1f} MB/s), "
+              f"read {r['read_per_s']:.0f} entries/s ({r['read_mb_s']:.1f} MB/s)")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
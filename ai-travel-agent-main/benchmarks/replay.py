@@ -0,0 +1,217 @@
+import contextlib
+import json
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from unittest import mock
+
+from langchain_core.messages import AIMessage
+
+
+"""Record/replay layer for offline benchmarks.
+
+Replaces the three external dependencies of a planning run with canned
+responses stored under `benchmarks/fixtures/`:
+
+- `serpapi.search` (flights and hotels), keyed by engine and route/location;
+- `requests.get` (OpenWeatherMap and AviationStack), keyed by host and path;
+- `ChatOpenAI`, which replays a scripted list of assistant turns per scenario.
+
+Each provider gets an injected latency drawn from a normal distribution
+(`mean_ms`, `jitter_ms`) and scaled by `latency_scale`, so runs can model the
+network or measure CPU cost alone (`latency_scale=0`). In record mode the real
+calls are made and their responses written back to the fixture files.
+"""
+
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+
+DEFAULT_LATENCY_MS = {
+    'serpapi': {'mean_ms': 900.0, 'jitter_ms': 250.0},
+    'http': {'mean_ms': 150.0, 'jitter_ms': 50.0},
+    'openai': {'mean_ms': 1500.0, 'jitter_ms': 400.0},
+}
+
+# SerpAPI parameters that identify a search; everything else is ignored when matching fixtures.
+_SERPAPI_KEY_PARAMS = ('engine', 'departure_id', 'arrival_id', 'q')
+
+
+def serpapi_key(params: Dict[str, Any]) -> str:
+    return '|'.join(str(params.get(k) or '').lower() for k in _SERPAPI_KEY_PARAMS)
+
+
+def http_key(url: str) -> str:
+    return url.split('://', 1)[-1]
+
+
+class LatencyModel:
+
+    def __init__(self, latency: Optional[Dict[str, Dict[str, float]]] = None, scale: float = 1.0, seed: int = 0):
+        self.latency = dict(DEFAULT_LATENCY_MS, **(latency or {}))
+        self.scale = scale
+        self._rng = random.Random(seed)
+
+    def sleep(self, provider: str):
+        if self.scale <= 0:
+            return
+        cfg = self.latency[provider]
+        ms = max(0.0, self._rng.gauss(cfg['mean_ms'], cfg.get('jitter_ms', 0.0)))
+        time.sleep(ms * self.scale / 1000.0)
+
+
+class _SerpResults:
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+
+
+class _Response:
+    def __init__(self, payload: Dict[str, Any], status_code: int = 200):
+        self._payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+            raise requests.HTTPError(f'{self.status_code} replayed error', response=self)
+
+
+class FixtureStore:
+    """JSON fixture files: `serpapi.json` and `http.json` map request keys to responses."""
+
+    def __init__(self, directory: Path = FIXTURES_DIR):
+        self.directory = Path(directory)
+        self.serpapi = self._load('serpapi.json')
+        self.http = self._load('http.json')
+
+    def _load(self, name: str) -> Dict[str, Any]:
+        path = self.directory / name
+        return json.loads(path.read_text(encoding='utf-8')) if path.exists() else {}
+
+    def save(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for name, data in (('serpapi.json', self.serpapi), ('http.json', self.http)):
+            (self.directory / name).write_text(json.dumps(data, indent=1, ensure_ascii=False), encoding='utf-8')
+
+    def serpapi_response(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        key = serpapi_key(params)
+        if key in self.serpapi:
+            return self.serpapi[key]
+        # Fall back to the engine's default fixture so unseen routes still get realistic payloads.
+        return self.serpapi[f'{params.get("engine")}|default']
+
+    def http_response(self, url: str) -> Dict[str, Any]:
+        return self.http.get(http_key(url)) or self.http[f'{url.split("://", 1)[-1].split("/", 1)[0]}|default']
+
+
+class ScriptedChatModel:
+    """Stand-in for `ChatOpenAI` that replays scripted assistant turns.
+
+    `script` is a list of dicts with `content`, optional `tool_calls` and
+    optional `usage` (`input_tokens`/`output_tokens`). Once exhausted it repeats
+    the last turn without its tool calls, so unexpected extra rounds finish.
+
+    The turn is chosen from the number of assistant messages already in the
+    conversation, so one instance can serve many concurrent sessions.
+    """
+
+    def __init__(self, script: List[Dict[str, Any]], latency: LatencyModel):
+        self.script = list(script)
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def invoke(self, messages, *args, **kwargs):
+        self.latency.sleep('openai')
+        index = sum(1 for m in messages if isinstance(m, AIMessage))
+        turn = self.script[min(index, len(self.script) - 1)]
+        if index >= len(self.script):
+            turn = {k: v for k, v in turn.items() if k != 'tool_calls'}
+        with self._lock:
+            self.calls += 1
+        usage = turn.get('usage') or {}
+        tool_calls = [dict(tc, id=tc.get('id') or f'call_{index + 1}_{i}')
+                      for i, tc in enumerate(turn.get('tool_calls') or [])]
+        return AIMessage(content=turn.get('content', ''), tool_calls=tool_calls, usage_metadata={
+            'input_tokens': usage.get('input_tokens', 0),
+            'output_tokens': usage.get('output_tokens', 0),
+            'total_tokens': usage.get('input_tokens', 0) + usage.get('output_tokens', 0),
+        })
+
+
+@contextlib.contextmanager
+def replay(script: List[Dict[str, Any]], fixtures: Optional[FixtureStore] = None,
+           latency: Optional[LatencyModel] = None):
+    """Patch SerpAPI, `requests.get` and `ChatOpenAI` to serve canned responses.
+
+    Yields the `ScriptedChatModel` so callers can inspect how many LLM calls were made.
+    """
+    fixtures = fixtures or FixtureStore()
+    latency = latency or LatencyModel()
+    chat = ScriptedChatModel(script, latency)
+
+    def fake_search(params, **kwargs):
+        latency.sleep('serpapi')
+        return _SerpResults(json.loads(json.dumps(fixtures.serpapi_response(params))))
+
+    def fake_get(url, params=None, **kwargs):
+        latency.sleep('http')
+        return _Response(fixtures.http_response(url))
+
+    with mock.patch('serpapi.search', fake_search), \
+            mock.patch('requests.get', fake_get), \
+            mock.patch('agents.agent.ChatOpenAI', lambda *a, **k: chat):
+        yield chat
+
+
+@contextlib.contextmanager
+def record(fixtures: Optional[FixtureStore] = None):
+    """Call the real APIs and store every SerpAPI/HTTP response as a fixture.
+
+    The LLM is not patched; recorded assistant turns are appended to the
+    yielded list in the `ScriptedChatModel` script format.
+    """
+    import requests
+    import serpapi
+
+    fixtures = fixtures or FixtureStore()
+    real_search, real_get = serpapi.search, requests.get
+    turns: List[Dict[str, Any]] = []
+
+    def recording_search(params, **kwargs):
+        result = real_search(params, **kwargs)
+        fixtures.serpapi[serpapi_key(params)] = result.data
+        return result
+
+    def recording_get(url, params=None, **kwargs):
+        resp = real_get(url, params=params, **kwargs)
+        if resp.ok:
+            fixtures.http[http_key(url)] = resp.json()
+        return resp
+
+    from agents import agent as agent_module
+    real_invoke = agent_module.ChatOpenAI.invoke
+
+    def recording_invoke(self, messages, *args, **kwargs):
+        message = real_invoke(self, messages, *args, **kwargs)
+        usage = getattr(message, 'usage_metadata', None) or {}
+        turns.append({'content': message.content,
+                      'tool_calls': [{'name': t['name'], 'args': t['args']} for t in message.tool_calls],
+                      'usage': {'input_tokens': usage.get('input_tokens', 0),
+                                'output_tokens': usage.get('output_tokens', 0)}})
+        return message
+
+    try:
+        with mock.patch('serpapi.search', recording_search), \
+                mock.patch('requests.get', recording_get), \
+                mock.patch.object(agent_module.ChatOpenAI, 'invoke', recording_invoke):
+            yield turns
+    finally:
+        fixtures.save()
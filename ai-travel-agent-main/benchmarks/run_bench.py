@@ -0,0 +1,264 @@
+"""End-to-end offline benchmark for the agent graph and itinerary_builder.
+
+Drives `Agent.graph` through the scripted conversations in
+`benchmarks/scenarios.json` with SerpAPI, HTTP and OpenAI calls replayed from
+fixtures (see `benchmarks/replay.py`), then reports per scenario:
+
+- wall-clock latency percentiles per plan (p50/p90/p99);
+- tool calls, external API calls, LLM calls and tokens per plan;
+- median CPU time per plan and mean CPU per component (self time of each
+  traced span).
+
+Each scenario gets one discarded warm-up run before the measured iterations.
+
+Results are compared against `benchmarks/baseline.json`. The work counts
+(tool, API and LLM calls and tokens per plan) are deterministic under replay,
+and the run exits with status 1 when any of them grows. Latency and CPU time
+depend on the machine the baseline was recorded on, so slowdowns beyond
+`--threshold` are only reported, unless `--gate-timings` is given (for a
+baseline recorded on the same machine).
+
+Usage (from the project directory):
+    python -m benchmarks.run_bench
+    python -m benchmarks.run_bench --iterations 20 --latency-scale 1.0
+    python -m benchmarks.run_bench --update-baseline
+    python -m benchmarks.run_bench --gate-timings --threshold 0.3
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List
+from unittest import mock
+
+from langchain_core.messages import HumanMessage
+
+from agents.tools import gateway
+from agents.tracing import tracer
+from benchmarks.replay import FixtureStore, LatencyModel, replay
+
+BENCH_DIR = Path(__file__).parent
+SCENARIOS_PATH = BENCH_DIR / 'scenarios.json'
+BASELINE_PATH = BENCH_DIR / 'baseline.json'
+
+# Dummy credentials so the tools take their real HTTP code paths, which are replayed.
+_FAKE_ENV = {
+    'SERPAPI_API_KEY': 'replay', 'WEATHER_API_KEY': 'replay', 'AVIATIONSTACK_API_KEY': 'replay',
+    'OPENAI_API_KEY': 'replay',
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def self_cpu_by_component(spans: List[tracer.Span]) -> Dict[str, float]:
+    """CPU milliseconds per span name, excluding time spent in child spans."""
+    child_cpu: Dict[str, int] = defaultdict(int)
+    for s in spans:
+        if s.parent_id:
+            child_cpu[s.parent_id] += s.cpu_ns
+    out: Dict[str, float] = defaultdict(float)
+    for s in spans:
+        out[s.name] += max(0, s.cpu_ns - child_cpu[s.span_id]) / 1e6
+    return dict(out)
+
+
+def _api_calls(spans: List[tracer.Span]) -> int:
+    # Outbound requests actually made (gateway leaders), after turn-cache reuse and coalescing.
+    return sum(1 for s in spans if s.name.startswith('gateway.') and not s.attrs.get('coalesced'))
+
+
+def _fresh_run():
+    from agents.tools.hotels_finder import clear_page_cache
+    from agents.tools.weather import clear_grid
+
+    # Every run starts cold, as a new search would.
+    tracer.clear()
+    clear_page_cache()
+    clear_grid()
+
+
+def run_plan(name: str, scenario: Dict[str, Any], fixtures: FixtureStore, latency: LatencyModel) -> Dict[str, Any]:
+    from agents.agent import Agent
+
+    _fresh_run()
+    with replay(scenario['script'], fixtures, latency) as chat, contextlib.redirect_stdout(io.StringIO()):
+        agent = Agent()
+        # The compiled graph and its checkpointer are shared per process: use a fresh thread each run.
+        config = {'configurable': {'thread_id': f'bench-{name}-{uuid.uuid4().hex}'}}
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        with tracer.span('plan', scenario=name):
+            agent.graph.invoke({'messages': [HumanMessage(content=scenario['query'])]}, config=config)
+        wall_ms = (time.perf_counter() - wall_start) * 1000
+        cpu_ms = (time.process_time() - cpu_start) * 1000
+
+    spans = tracer.finished_spans()
+    return {
+        'latency_ms': wall_ms,
+        'cpu_ms': cpu_ms,
+        'llm_calls': chat.calls,
+        'tool_calls': sum(1 for s in spans if s.name.startswith('tool.')),
+        'api_calls': _api_calls(spans),
+        'tokens': sum(s.attrs.get('total_tokens', 0) for s in spans if s.name == 'llm.invoke'),
+        'components': self_cpu_by_component(spans),
+    }
+
+
+def run_itinerary(fixtures: FixtureStore, latency: LatencyModel) -> Dict[str, Any]:
+    from agents.itinerary.itinerary_builder import itinerary_builder
+
+    _fresh_run()
+    params = {'departure_airport': 'MAD', 'arrival_location': 'New York', 'outbound_date': '2025-10-01',
+              'return_date': '2025-10-07', 'adults': 1, 'budget': 700}
+    with replay([{'content': ''}], fixtures, latency), contextlib.redirect_stdout(io.StringIO()):
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        with tracer.span('plan', scenario='itinerary_builder'):
+            with tracer.span('tool.itinerary_builder'):
+                itinerary_builder.invoke({'params': params})
+        wall_ms = (time.perf_counter() - wall_start) * 1000
+        cpu_ms = (time.process_time() - cpu_start) * 1000
+    spans = tracer.finished_spans()
+    return {'latency_ms': wall_ms, 'cpu_ms': cpu_ms, 'llm_calls': 0, 'tool_calls': 1, 'api_calls': _api_calls(spans),
+            'tokens': 0, 'components': self_cpu_by_component(spans)}
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    latencies = [r['latency_ms'] for r in runs]
+    components: Dict[str, List[float]] = defaultdict(list)
+    for r in runs:
+        for k, v in r['components'].items():
+            components[k].append(v)
+    return {
+        'iterations': len(runs),
+        'latency_ms': {'p50': percentile(latencies, 50), 'p90': percentile(latencies, 90),
+                       'p99': percentile(latencies, 99)},
+        'cpu_ms': statistics.median(r['cpu_ms'] for r in runs),
+        'tool_calls_per_plan': statistics.mean(r['tool_calls'] for r in runs),
+        'api_calls_per_plan': statistics.mean(r['api_calls'] for r in runs),
+        'llm_calls_per_plan': statistics.mean(r['llm_calls'] for r in runs),
+        'tokens_per_plan': statistics.mean(r['tokens'] for r in runs),
+        'cpu_ms_by_component': {k: round(statistics.mean(v), 3) for k, v in sorted(components.items())},
+    }
+
+
+def run(iterations: int = 5, latency_scale: float = 0.01, scenarios: List[str] = None) -> Dict[str, Any]:
+    all_scenarios = json.loads(SCENARIOS_PATH.read_text(encoding='utf-8'))
+    fixtures = FixtureStore()
+    latency = LatencyModel(scale=latency_scale)
+    tracer.configure(enabled=True, sample_rate=1.0, cpu_time=True)
+    # Replayed calls cost no quota; rate limiting would only add queueing noise to the timings.
+    gateway.configure({})
+    results = {}
+    with mock.patch.dict(os.environ, _FAKE_ENV):
+        for name, scenario in all_scenarios.items():
+            if scenarios and name not in scenarios:
+                continue
+            run_plan(name, scenario, fixtures, latency)  # warm-up: first-call imports and caches
+            results[name] = summarize([run_plan(name, scenario, fixtures, latency) for _ in range(iterations)])
+        if not scenarios or 'itinerary_builder' in scenarios:
+            run_itinerary(fixtures, latency)
+            results['itinerary_builder'] = summarize([run_itinerary(fixtures, latency) for _ in range(iterations)])
+    return {'latency_scale': latency_scale, 'scenarios': results}
+
+
+def _pairs(report: Dict[str, Any], baseline: Dict[str, Any]):
+    for name, base in baseline.get('scenarios', {}).items():
+        cur = report['scenarios'].get(name)
+        if cur is not None:
+            yield name, cur, base
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Return human-readable work-count regressions of `report` against `baseline`."""
+    failures = []
+    for name, cur, base in _pairs(report, baseline):
+        # Work counts are deterministic under replay: any increase is a regression.
+        for metric in ('tool_calls_per_plan', 'api_calls_per_plan', 'llm_calls_per_plan', 'tokens_per_plan'):
+            if metric in base and cur[metric] > base[metric]:
+                failures.append(f'{name}: {metric} {cur[metric]:.1f} > baseline {base[metric]:.1f}')
+    return failures
+
+
+def slower(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Return latency and CPU slowdowns beyond `threshold`; only comparable on the baseline's machine."""
+    changes = []
+    for name, cur, base in _pairs(report, baseline):
+        checks = [('latency p50', cur['latency_ms']['p50'], base['latency_ms']['p50']),
+                  ('cpu_ms', cur['cpu_ms'], base['cpu_ms'])]
+        for label, value, ref in checks:
+            # A 2 ms absolute floor keeps timer noise on tiny scenarios out of the report.
+            if value > ref * (1 + threshold) and value - ref > 2.0:
+                changes.append(f'{name}: {label} {value:.1f}ms > baseline {ref:.1f}ms (+{threshold:.0%})')
+    return changes
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"{'scenario':<28}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'cpu ms':>9}"
+          f"{'tools':>7}{'api':>5}{'llm':>5}{'tokens':>9}")
+    for name, r in report['scenarios'].items():
+        lat = r['latency_ms']
+        print(f"{name:<28}{lat['p50']:>9.1f}{lat['p90']:>9.1f}{lat['p99']:>9.1f}{r['cpu_ms']:>9.1f}"
+              f"{r['tool_calls_per_plan']:>7.1f}{r['api_calls_per_plan']:>5.1f}{r['llm_calls_per_plan']:>5.1f}"
+              f"{r['tokens_per_plan']:>9.0f}")
+        top = sorted(r['cpu_ms_by_component'].items(), key=lambda kv: -kv[1])[:4]
+        print('    cpu by component: ' + ', '.join(f'{k}={v:.2f}ms' for k, v in top))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--latency-scale', type=float, default=0.01,
+                        help='multiplier on fixture latencies (1.0 = realistic network, 0 = CPU only)')
+    parser.add_argument('--scenario', action='append', help='run only the named scenario(s)')
+    parser.add_argument('--baseline', default=str(BASELINE_PATH))
+    parser.add_argument('--threshold', type=float, default=0.5, help='allowed relative slowdown (0.5 = +50%%)')
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--gate-timings', action='store_true',
+                        help='also fail on latency/CPU slowdowns (baseline recorded on this machine)')
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args(argv)
+
+    report = run(args.iterations, args.latency_scale, args.scenario)
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=1), encoding='utf-8')
+
+    if args.update_baseline:
+        Path(args.baseline).write_text(json.dumps(report, indent=1), encoding='utf-8')
+        print('Wrote', args.baseline)
+        return 0
+    if not Path(args.baseline).exists():
+        print('No baseline found; run with --update-baseline to create one.')
+        return 0
+    baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+    failures = compare(report, baseline, args.threshold)
+    if baseline.get('latency_scale') != args.latency_scale:
+        print(f"Baseline was recorded with latency scale {baseline.get('latency_scale')}; skipping timing checks.")
+    else:
+        timings = slower(report, baseline, args.threshold)
+        if args.gate_timings:
+            failures += timings
+        else:
+            for t in timings:
+                print('SLOWER (advisory):', t)
+    for f in failures:
+        print('REGRESSION:', f)
+    if not failures:
+        print('No regressions against', args.baseline)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
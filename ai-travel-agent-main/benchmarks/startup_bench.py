@@ -0,0 +1,141 @@
+"""Cold-start benchmark for the agent.
+
+Runs `python -X importtime -c "import agents.agent"` in fresh interpreters and
+reports the median total import time, the number of modules loaded and the
+slowest top-level imports, plus the time to construct the first `Agent`.
+Modules that must stay lazy (scikit-learn, NumPy, langchain_openai,
+SendGrid, serpapi, LangGraph) are flagged if importing the agent pulls them
+in.
+
+The run exits with status 1 when a heavy module is imported eagerly. Import
+and first-`Agent` times are compared against `benchmarks/startup_baseline.json`,
+but they depend on the machine the baseline was recorded on, so slowdowns
+beyond `--threshold` are only reported unless `--gate-timings` is given.
+
+Usage (from the project directory):
+    python -m benchmarks.startup_bench
+    python -m benchmarks.startup_bench --runs 10 --update-baseline
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+BENCH_DIR = Path(__file__).parent
+PROJECT_DIR = BENCH_DIR.parent
+BASELINE_PATH = BENCH_DIR / 'startup_baseline.json'
+
+LAZY_MODULES = ['sklearn', 'numpy', 'langchain_openai', 'sendgrid', 'serpapi', 'langgraph']
+
+_FIRST_AGENT = (
+    'import json, sys, time\n'
+    't0 = time.perf_counter()\n'
+    'import agents.agent as a\n'
+    't1 = time.perf_counter()\n'
+    'a.Agent()\n'
+    't2 = time.perf_counter()\n'
+    'print(json.dumps({"import_ms": (t1 - t0) * 1000, "first_agent_ms": (t2 - t1) * 1000}))\n'
+)
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """(module, self_us, cumulative_us, depth) for each `-X importtime` line."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def measure_import(module: str = 'agents.agent') -> Dict[str, Any]:
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=PROJECT_DIR,
+                          capture_output=True, text=True, check=True)
+    rows = parse_importtime(proc.stderr)
+    loaded = {name.split('.', 1)[0] for name, _, _, _ in rows}
+    top = sorted((r for r in rows if r[3] <= 1), key=lambda r: -r[2])[:10]
+    return {
+        'total_ms': sum(r[1] for r in rows) / 1000.0,
+        'modules': len(rows),
+        'top': [(name, cum / 1000.0) for name, _, cum, _ in top],
+        'eager_heavy': [m for m in LAZY_MODULES if m in loaded],
+    }
+
+
+def measure_first_agent() -> Dict[str, float]:
+    proc = subprocess.run([sys.executable, '-c', _FIRST_AGENT], cwd=PROJECT_DIR, capture_output=True, text=True,
+                          check=True, env=dict(os.environ, OPENAI_API_KEY='startup-bench'))
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run(runs: int = 5) -> Dict[str, Any]:
+    imports = [measure_import() for _ in range(runs)]
+    agents = [measure_first_agent() for _ in range(runs)]
+    return {
+        'import_total_ms': statistics.median(r['total_ms'] for r in imports),
+        'modules': imports[-1]['modules'],
+        'first_agent_ms': statistics.median(r['first_agent_ms'] for r in agents),
+        'top_imports_ms': imports[-1]['top'],
+        'eager_heavy': imports[-1]['eager_heavy'],
+    }
+
+
+def compare(report: Dict[str, Any]) -> List[str]:
+    """Eager heavy imports: the machine-independent regressions."""
+    return [f'agents.agent imports {m} eagerly' for m in report['eager_heavy']]
+
+
+def slower(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Import and first-`Agent` slowdowns beyond `threshold`; only comparable on the baseline's machine."""
+    changes = []
+    for metric in ('import_total_ms', 'first_agent_ms'):
+        value, ref = report[metric], baseline.get(metric)
+        # A 20 ms absolute floor keeps process start-up noise out of the report.
+        if ref and value > ref * (1 + threshold) and value - ref > 20.0:
+            changes.append(f'{metric} {value:.0f}ms > baseline {ref:.0f}ms (+{threshold:.0%})')
+    return changes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--baseline', default=str(BASELINE_PATH))
+    parser.add_argument('--threshold', type=float, default=0.5, help='allowed relative slowdown (0.5 = +50%%)')
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--gate-timings', action='store_true',
+                        help='also fail on import/first-Agent slowdowns (baseline recorded on this machine)')
+    args = parser.parse_args(argv)
+
+    report = run(args.runs)
+    print(f"import agents.agent: {report['import_total_ms']:.0f}ms ({report['modules']} modules); "
+          f"first Agent(): {report['first_agent_ms']:.0f}ms")
+    for name, ms in report['top_imports_ms']:
+        print(f'  {ms:>8.1f}ms  {name}')
+
+    if args.update_baseline:
+        Path(args.baseline).write_text(json.dumps(report, indent=1), encoding='utf-8')
+        print('Wrote', args.baseline)
+        return 0
+    baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8')) if Path(args.baseline).exists() else {}
+    failures = compare(report)
+    timings = slower(report, baseline, args.threshold)
+    if args.gate_timings:
+        failures += timings
+    else:
+        for t in timings:
+            print('SLOWER (advisory):', t)
+    for f in failures:
+        print('REGRESSION:', f)
+    if not failures:
+        print('No regressions against', args.baseline)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
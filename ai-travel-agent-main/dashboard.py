@@ -1,16 +1,40 @@
 import streamlit as st
 import json
-from agents.metrics.recorder import snapshot
+import time
+from agents.metrics import store
 from datetime import datetime
 
 st.title('VoyageVerse Metrics Dashboard')
 
-data = snapshot()
+# Aggregated across every worker writing to the shared metrics store
+data = store.snapshot()
 st.metric('Sessions', data.get('sessions', 0))
 st.metric('Total Planning Time (s)', data.get('total_planning_time_seconds', 0.0))
 st.metric('Total Savings', data.get('total_savings', 0.0))
 st.metric('Avg Satisfaction', data.get('avg_satisfaction', 'N/A'))
 
+now = time.time()
+st.subheader('Sessions per minute (last hour)')
+per_minute = store.rollups(store.MINUTE, since=now - store.HOUR)
+st.bar_chart({datetime.utcfromtimestamp(b['bucket_start']).strftime('%H:%M'): b['sessions'] for b in per_minute})
+
+st.subheader('Savings per hour (last 24h)')
+per_hour = store.rollups(store.HOUR, since=now - 24 * store.HOUR)
+st.bar_chart({datetime.utcfromtimestamp(b['bucket_start']).strftime('%m-%d %H:00'): b['total_savings']
+              for b in per_hour})
+
+st.subheader('Loop budgets exhausted (last 24h)')
+st.bar_chart(store.event_counts(since=now - 24 * store.HOUR, prefix='budget_exhausted.'))
+
+# Read only events appended since this session's last rerun
+if 'event_reader' not in st.session_state:
+    st.session_state.event_reader = store.EventReader()
+    st.session_state.recent_events = []
+new_events = st.session_state.event_reader.poll()
+st.session_state.recent_events = (st.session_state.recent_events + new_events)[-50:]
+st.subheader('Recent events')
+st.dataframe(list(reversed(st.session_state.recent_events)))
+
 st.write('Full snapshot:')
 st.json(data)
 
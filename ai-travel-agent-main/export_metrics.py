@@ -1,8 +1,8 @@
 import json
-from agents.metrics.recorder import snapshot
+from agents.metrics.recorder import shared_snapshot
 
 def main(outfile='metrics_snapshot.json'):
-    data = snapshot()
+    data = shared_snapshot()
     with open(outfile, 'w', encoding='utf-8') as f:
         json.dump(data, f)
     print('Wrote', outfile)
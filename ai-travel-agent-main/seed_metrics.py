@@ -1,7 +1,7 @@
 import random
 import time
 import json
-from agents.metrics.recorder import start_session, end_session, snapshot
+from agents.metrics.recorder import start_session, end_session, shared_snapshot
 
 
 def seed(n=5):
@@ -17,7 +17,7 @@ def seed(n=5):
 
 
 def export_snapshot(outfile='metrics_snapshot.json'):
-    data = snapshot()
+    data = shared_snapshot()
     with open(outfile, 'w', encoding='utf-8') as f:
         json.dump(data, f)
     print('Wrote', outfile)
@@ -26,6 +26,6 @@ def export_snapshot(outfile='metrics_snapshot.json'):
 if __name__ == '__main__':
     seed(5)
     print('Seeded demo metrics:')
-    cur = snapshot()
+    cur = shared_snapshot()
     print(cur)
     export_snapshot()
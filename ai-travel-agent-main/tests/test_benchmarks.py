@@ -0,0 +1,24 @@
+from benchmarks import run_bench
+
+
+def test_scenario_runs_offline_and_counts_work():
+    report = run_bench.run(iterations=1, latency_scale=0, scenarios=['flight_status_and_weather'])
+    result = report['scenarios']['flight_status_and_weather']
+    assert result['tool_calls_per_plan'] == 2 and result['llm_calls_per_plan'] == 2
+    assert result['tokens_per_plan'] == 4282
+    assert 'tool.weather_tool' in result['cpu_ms_by_component']
+
+
+def test_compare_flags_extra_tool_calls():
+    base = {'scenarios': {'s': {'tool_calls_per_plan': 2, 'llm_calls_per_plan': 2, 'tokens_per_plan': 10,
+                                'latency_ms': {'p50': 10.0}, 'cpu_ms': 5.0}}}
+    cur = {'scenarios': {'s': {'tool_calls_per_plan': 3, 'llm_calls_per_plan': 2, 'tokens_per_plan': 10,
+                               'latency_ms': {'p50': 10.5}, 'cpu_ms': 5.0}}}
+    assert run_bench.compare(cur, base, 0.5) == ['s: tool_calls_per_plan 3.0 > baseline 2.0']
+
+
+def test_timings_are_reported_apart_from_work_counts():
+    base = {'scenarios': {'s': {'tool_calls_per_plan': 2, 'latency_ms': {'p50': 10.0}, 'cpu_ms': 5.0}}}
+    cur = {'scenarios': {'s': {'tool_calls_per_plan': 2, 'latency_ms': {'p50': 30.0}, 'cpu_ms': 5.0}}}
+    assert run_bench.compare(cur, base, 0.5) == []
+    assert run_bench.slower(cur, base, 0.5) == ['s: latency p50 30.0ms > baseline 10.0ms (+50%)']
@@ -0,0 +1,61 @@
+from agents.sync.booking_sync import BookingSync, check_and_sync, flight_key
+
+
+def _engine(statuses, fetched):
+    def fetch(info):
+        fetched.append(info['flight_number'])
+        return statuses[info['flight_number']]
+    return BookingSync(fetch=fetch)
+
+
+def test_only_bookings_on_changed_flights_get_events():
+    statuses = {'AA95': {'status': 'scheduled', 'estimated_delay_minutes': 0},
+                'BA117': {'status': 'scheduled', 'estimated_delay_minutes': 0}}
+    fetched = []
+    sync = _engine(statuses, fetched)
+    for i in range(1000):
+        number = 'AA95' if i % 2 else 'BA117'
+        sync.link({'flight_number': number, 'date': '2025-10-01'}, {'id': f'h{i}'})
+    assert len(sync) == 1000
+
+    assert sync.poll() == []  # first sight of on-time flights: nothing to act on
+    assert sorted(fetched) == ['AA95', 'BA117']  # one status fetch per flight, not per booking
+    assert sync.poll() == [] and sync.stats['changes'] == 2
+
+    statuses['AA95'] = {'status': 'active', 'estimated_delay_minutes': 75}
+    events = sync.poll()
+    assert len(events) == 500 and {e['flight'] for e in events} == {'AA95|2025-10-01'}
+    assert events[0]['suggested_actions'][1]['action'] == 'hold_or_cancel'
+    assert sync.poll() == []  # unchanged since the last poll
+
+    statuses['AA95'] = {'status': 'active', 'estimated_delay_minutes': 20}
+    assert {e['suggested_actions'][1]['action'] for e in sync.poll()} == {'release_hold'}
+
+
+def test_pushed_updates_and_unlinking():
+    sync = BookingSync(fetch=None)
+    key = sync.link({'flight_number': 'aa95', 'date': '2025-10-01'}, {'id': 'h1'})
+    assert key == flight_key({'flight_number': 'AA 95', 'date': '2025-10-01'})
+    assert sync.observe(key, {'status': 'Cancelled'})[0]['booking_id'] == 'h1'
+    assert sync.observe(key, {'status': 'cancelled'}) == []
+    sync.unlink('h1')
+    assert len(sync) == 0 and sync.observe(key, {'status': 'scheduled'}) == []
+
+
+def test_check_and_sync_uses_the_tool_stub():
+    result = check_and_sync({'airline': 'AA', 'flight_number': None, 'date': '2025-10-01'}, {'id': 'h1'})
+    assert result['flight_status']['status'] == 'On time'
+    assert result['suggested_actions'] == [{'action': 'no_change'}]
+
+
+def test_booking_linked_to_an_already_delayed_flight_gets_actions():
+    statuses = {'AA95': {'status': 'active', 'estimated_delay_minutes': 120}}
+    sync = _engine(statuses, [])
+    sync.link({'flight_number': 'AA95', 'date': '2025-10-01'}, {'id': 'h1'})
+    assert [e['booking_id'] for e in sync.poll()] == ['h1']
+
+    sync.link({'flight_number': 'AA95', 'date': '2025-10-01'}, {'id': 'h2'})
+    events = sync.poll()
+    assert [e['booking_id'] for e in events] == ['h2'] and events[0]['previous'] is None
+    assert events[0]['suggested_actions'][1] == {'action': 'hold_or_cancel', 'booking_id': 'h2'}
+    assert sync.poll() == []
@@ -0,0 +1,31 @@
+import io
+import json
+
+from agents.privacy.bulk_mask import mask_file, mask_stream
+from agents.privacy.masking import mask_pii
+
+
+def test_pool_output_keeps_line_order_and_counts_detections(tmp_path):
+    lines = [f'line {i}: mail user{i}@example.com\r\n' if i % 2 else f'line {i}: nothing here\n' for i in range(500)]
+    src = tmp_path / 'app.log'
+    src.write_bytes(''.join(lines).encode() + b'\xff tail without newline')
+
+    streamed = tmp_path / 'streamed.log'
+    report = mask_file(str(src), str(streamed), workers=2, batch_bytes=1000)
+    mapped = tmp_path / 'mapped.log'
+    assert mask_file(str(src), str(mapped), workers=2, use_mmap=True, batch_bytes=1000)['lines'] == 501
+
+    expected = ''.join(mask_pii(line.rstrip('\r\n')) + line[len(line.rstrip('\r\n')):] for line in lines)
+    assert streamed.read_bytes() == mapped.read_bytes() == expected.encode() + b'\xff tail without newline'
+    assert report['lines'] == 501 and report['detections']['email'] == 250 and report['mb_per_s'] > 0
+
+
+def test_jsonl_records_mask_string_values_only():
+    records = [{'email': 'a@b.com', 'nights': 3, 'notes': ['call +1 555-123-4567']}, {'ok': True}]
+    src = io.BytesIO(b''.join(json.dumps(r).encode() + b'\n' for r in records) + b'not json a@b.com\n')
+    dst = io.BytesIO()
+    report = mask_stream(src, dst, jsonl=True, workers=1)
+    out = dst.getvalue().decode().splitlines()
+    assert json.loads(out[0]) == {'email': '***@***', 'nights': 3, 'notes': ['call +***-***-****']}
+    assert json.loads(out[1]) == {'ok': True} and out[2] == 'not json ***@***'
+    assert report['detections'] == {'credit_card': 0, 'ssn': 0, 'email': 2, 'phone': 1, 'invalid_json': 1}
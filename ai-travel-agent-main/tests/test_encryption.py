@@ -0,0 +1,52 @@
+import io
+import os
+from unittest import mock
+
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+
+from agents.security import encryption
+
+
+def test_batches_round_trip_and_old_keys_rotate_to_the_new_one():
+    old, new = Fernet.generate_key().decode(), Fernet.generate_key().decode()
+    records = [f'booking-{i}'.encode() for i in range(200)]
+    with mock.patch.dict(os.environ, {'FERNET_KEY': old}):
+        legacy = encryption.encrypt_many(records, workers=4)
+        assert encryption.get_fernet() is encryption.get_fernet()
+    with mock.patch.dict(os.environ, {'FERNET_KEY': f'{new},{old}'}):
+        assert encryption.decrypt_many(legacy, workers=4) == records
+        rotated = [encryption.rotate_token(t) for t in legacy[:3]]
+    with mock.patch.dict(os.environ, {'FERNET_KEY': new}):
+        assert encryption.decrypt_many(rotated) == records[:3]
+        with pytest.raises(InvalidToken):
+            encryption.decrypt_bytes(legacy[0])
+
+
+def test_streams_are_chunked_and_truncation_is_detected():
+    data = os.urandom(10_000)
+    sealed = io.BytesIO()
+    with mock.patch.dict(os.environ, {'FERNET_KEY': Fernet.generate_key().decode()}):
+        assert encryption.encrypt_stream(io.BytesIO(data), sealed, chunk_size=4096) == len(data)
+        opened = io.BytesIO()
+        assert encryption.decrypt_stream(io.BytesIO(sealed.getvalue()), opened) == len(data)
+        assert opened.getvalue() == data
+
+        first_chunk = 5 + 4 + int.from_bytes(sealed.getvalue()[5:9], 'big')
+        with pytest.raises(InvalidToken):
+            encryption.decrypt_stream(io.BytesIO(sealed.getvalue()[:first_chunk]), io.BytesIO())
+
+
+def test_data_after_the_last_chunk_or_a_chunk_without_header_is_rejected(tmp_path):
+    with mock.patch.dict(os.environ, {'FERNET_KEY': Fernet.generate_key().decode()}):
+        sealed = io.BytesIO()
+        encryption.encrypt_stream(io.BytesIO(b'itinerary'), sealed)
+        with pytest.raises(InvalidToken):
+            encryption.decrypt_stream(io.BytesIO(sealed.getvalue() + sealed.getvalue()[5:]), io.BytesIO())
+
+        token = encryption.encrypt_bytes(b'x')  # a valid token too short to hold a chunk header
+        source, target = tmp_path / 'short.enc', tmp_path / 'short.out'
+        source.write_bytes(encryption._MAGIC + encryption._LENGTH.pack(len(token)) + token)
+        with pytest.raises(InvalidToken):
+            encryption.decrypt_file(str(source), str(target))
+        assert not target.exists()
@@ -0,0 +1,25 @@
+import numpy as np
+
+from agents.federated import fed_mf
+from agents.recommender.factorized import FactorizedRecommender
+
+
+def test_federated_factors_recommend_held_out_items():
+    train, held = fed_mf.hold_out(fed_mf.synthetic_interactions(300, 120, clusters=4))
+    clients = fed_mf.make_clients(train, users_per_client=10)
+    result = fed_mf.train_federated(clients, 120, factors=8, rounds=10, workers=1)
+    assert set(result) == {'item_factors', 'rounds', 'history'}  # no user factors reach the server
+
+    top = FactorizedRecommender(result['item_factors']).top_k(train, k=10)
+    assert not (np.take_along_axis(train, top, axis=1) > 0).any()  # seen items are never recommended
+    assert fed_mf.recall(top, held) > 3 * 10 / 120
+
+
+def test_process_pool_matches_in_process_training():
+    matrix = fed_mf.synthetic_interactions(80, 40, clusters=2, per_user=6)
+    runs = [fed_mf.train_federated(fed_mf.make_clients(matrix, 8), 40, factors=4, rounds=3, fraction=0.5,
+                                   workers=w)['item_factors'] for w in (1, 2)]
+    np.testing.assert_allclose(runs[0], runs[1], rtol=1e-5, atol=1e-6)
+
+    recommender = FactorizedRecommender(runs[0])
+    assert recommender.top_k(matrix[0], k=3).tolist() == recommender.top_k(matrix[:1], k=3)[0].tolist()
@@ -0,0 +1,46 @@
+import threading
+import time
+
+from agents.tools.gateway import BACKGROUND, INTERACTIVE, Gateway
+
+
+def test_concurrent_identical_requests_share_one_call():
+    gw = Gateway(limits={})
+    calls = []
+    release = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        release.wait(2)
+        return {'price': 100}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(gw.call('serpapi', 'k', fetch))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and results == [{'price': 100}] * 8
+    stats = gw.stats()['serpapi']
+    assert stats['calls'] == 1 and stats['coalesced'] == 7
+
+
+def test_interactive_requests_jump_background_queue():
+    gw = Gateway(limits={'serpapi': (10.0, 1.0)})
+    gw.call('serpapi', 'warm', lambda: None)  # drain the single burst token
+    order = []
+
+    def request(name, level):
+        gw.call('serpapi', name, lambda: order.append(name), level=level)
+
+    background = threading.Thread(target=request, args=('background', BACKGROUND))
+    background.start()
+    time.sleep(0.02)
+    interactive = threading.Thread(target=request, args=('interactive', INTERACTIVE))
+    interactive.start()
+    background.join()
+    interactive.join()
+    assert order == ['interactive', 'background']
+    assert gw.stats()['serpapi']['queue_ms_max'] > 0
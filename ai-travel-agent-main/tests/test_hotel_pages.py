@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from agents.optimizer.cost_optimizer import recommend_from_pages
+from agents.tools import hotels_finder as hf
+from agents.tools import prefetch
+
+PARAMS = {'engine': 'google_hotels', 'q': 'Paris', 'check_in_date': '2025-11-03', 'check_out_date': '2025-11-06'}
+
+
+def _search(requests):
+    # Three pages of four properties each, getting cheaper page by page.
+    def search(params):
+        requests.append(params.get('next_page_token'))
+        page = int(params.get('next_page_token') or 0)
+        properties = [{'name': f'p{page}-{i}', 'rate_per_night': {'lowest': f'${400 - 100 * page + i:,}'}}
+                      for i in range(4)]
+        pagination = {'next_page_token': str(page + 1)} if page < 2 else {}
+        return SimpleNamespace(data={'properties': properties, 'serpapi_pagination': pagination})
+    return search
+
+
+def test_pages_are_pulled_only_until_an_option_fits_the_budget_and_reused():
+    requests = []
+    hf.clear_page_cache()
+    with mock.patch.object(hf, 'serpapi_search', _search(requests)), mock.patch.object(hf, '_record'):
+        best = recommend_from_pages(hf.hotel_pages(PARAMS), budget=310)
+        assert best['name'] == 'p1-0' and best['within_budget'] and best['considered'] == 8
+        assert requests == [None, '1']
+
+        assert recommend_from_pages(hf.hotel_pages(PARAMS))['name'] == 'p0-0'
+        assert len(list(hf.iter_hotels(PARAMS))) == 12
+        assert requests == [None, '1', '2']  # earlier pages came from the cache
+
+
+def test_a_page_a_prefetch_fetched_is_recorded_once_a_real_call_reads_it():
+    recorded, held_back = [], []
+    args = {'params': {'q': 'Paris', 'check_in_date': '2025-11-03', 'check_out_date': '2025-11-06',
+                       'sort_by': '8'}}
+    hf.clear_page_cache()
+    with mock.patch.object(hf, 'serpapi_search', _search([])), \
+            mock.patch.object(hf, '_record', lambda params, properties: recorded.append(len(properties))):
+        prefetch._run('hotels_finder', args, held_back)
+        assert recorded == [] and len(held_back) == 1
+
+        params = hf.search_params(hf.HotelsInput(**args['params']))
+        hf.fetch_page(params)
+        hf.fetch_page(params)
+        held_back[0]()  # what Prefetch.finish runs had the tool call used the prefetch
+    assert recorded == [4]
@@ -0,0 +1,44 @@
+import contextlib
+import io
+import json
+import os
+import uuid
+from unittest import mock
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from agents.control.budget import DEADLINE, LLM_CALLS, TOOL_CALLS, LoopBudget, turn_usage
+from agents.metrics import recorder
+from benchmarks.replay import LatencyModel, replay
+from benchmarks.run_bench import SCENARIOS_PATH
+
+
+def test_usage_counts_only_the_current_turn():
+    messages = [HumanMessage(content='old'), AIMessage(content='', usage_metadata={
+        'input_tokens': 5, 'output_tokens': 5, 'total_tokens': 10}),
+        HumanMessage(content='new'),
+        AIMessage(content='', tool_calls=[{'name': 'x', 'args': {}, 'id': '1'}], usage_metadata={
+            'input_tokens': 60, 'output_tokens': 40, 'total_tokens': 100}),
+        ToolMessage(content='r', tool_call_id='1', name='x')]
+    usage = turn_usage(messages)
+    assert usage == {'llm_calls': 1, 'tool_calls': 1, 'tokens': 100}
+    budget = LoopBudget(max_llm_calls=5, max_tool_calls=1, deadline_s=30, max_tokens=1000)
+    assert budget.exhausted(usage, elapsed_s=1) == TOOL_CALLS
+    assert LoopBudget(max_llm_calls=5, max_tool_calls=9, deadline_s=30).exhausted(usage, 31) == DEADLINE
+    assert LoopBudget.from_config({'configurable': {'budget': {'max_llm_calls': 2}}}).max_llm_calls == 2
+
+
+def test_graph_summarizes_when_llm_budget_runs_out(tmp_path):
+    from agents.agent import Agent
+
+    scenario = json.loads(SCENARIOS_PATH.read_text(encoding='utf-8'))['bad_tool_name_retry']
+    config = {'configurable': {'thread_id': uuid.uuid4().hex, 'budget': {'max_llm_calls': 2}}}
+    with mock.patch.dict(os.environ, {'METRICS_DB': str(tmp_path / 'metrics.db')}), \
+            replay(scenario['script'], latency=LatencyModel(scale=0)) as chat, \
+            contextlib.redirect_stdout(io.StringIO()):
+        before = recorder.event_counts().get('budget_exhausted.' + LLM_CALLS, 0)
+        state = Agent().graph.invoke({'messages': [HumanMessage(content=scenario['query'])]}, config=config)
+    final = state['messages'][-1]
+    assert isinstance(final, AIMessage) and not final.tool_calls
+    assert chat.calls == 2
+    assert recorder.event_counts()['budget_exhausted.' + LLM_CALLS] == before + 1
@@ -0,0 +1,39 @@
+import multiprocessing
+
+from agents.metrics import store
+
+
+def _worker(path, n):
+    for _ in range(n):
+        store.record_session(time_saved_seconds=10.0, savings=2.5, satisfaction=4, path=path)
+
+
+def test_sessions_from_several_processes_are_aggregated(tmp_path):
+    path = str(tmp_path / 'metrics.db')
+    procs = [multiprocessing.Process(target=_worker, args=(path, 5)) for _ in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+    snap = store.snapshot(path)
+    assert snap['sessions'] == 15
+    assert snap['total_savings'] == 37.5 and snap['avg_satisfaction'] == 4
+
+
+def test_rollups_and_incremental_reader(tmp_path):
+    path = str(tmp_path / 'metrics.db')
+    store.record_session(savings=10.0, ts=120.0, path=path)
+    store.record_session(savings=5.0, ts=130.0, path=path)
+    store.record_session(savings=1.0, ts=3700.0, path=path)
+
+    per_minute = store.rollups(store.MINUTE, path=path)
+    assert [(b['bucket_start'], b['sessions']) for b in per_minute] == [(120, 2), (3660, 1)]
+    per_hour = store.rollups(store.HOUR, since=3600, path=path)
+    assert [(b['bucket_start'], b['total_savings']) for b in per_hour] == [(3600, 1.0)]
+
+    reader = store.EventReader(path)
+    assert len(reader.poll()) == 3
+    assert reader.poll() == []
+    store.record_session(savings=2.0, path=path)
+    assert [e['savings'] for e in reader.poll()] == [2.0]
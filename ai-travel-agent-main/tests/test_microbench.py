@@ -0,0 +1,27 @@
+import json
+
+from benchmarks import microbench
+
+
+def test_cases_are_timed_and_slowdowns_fail_the_run(tmp_path):
+    report = microbench.run(['is_malicious', 'server_aggregate'], repeat=2, min_time=0.01)
+    assert set(report['cases']) == {'is_malicious', 'server_aggregate'}
+    assert report['calibration_us'] > 0
+    assert all(r['per_call_us'] > 0 and r['relative'] > 0 and r['loops'] >= 1 for r in report['cases'].values())
+
+    fast = {'cases': {name: {'per_call_us': r['per_call_us'], 'relative': r['relative'] / 10}
+                      for name, r in report['cases'].items()}}
+    assert len(microbench.compare(report, fast, threshold=0.5)) == 2
+    assert microbench.compare(report, report, threshold=0.0) == []
+
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps(fast))
+    argv = ['--case', 'is_malicious', '--repeat', '1', '--min-time', '0.01', '--baseline', str(baseline)]
+    assert microbench.main(argv) == 1
+    assert microbench.main(argv + ['--threshold', '1000']) == 0
+
+
+def test_absolute_times_are_compared_only_against_uncalibrated_baselines():
+    report = {'cases': {'mask_pii': {'per_call_us': 300.0, 'relative': 1.0}}}
+    assert microbench.compare(report, {'cases': {'mask_pii': {'per_call_us': 100.0, 'relative': 1.0}}}, 0.5) == []
+    assert len(microbench.compare(report, {'cases': {'mask_pii': {'per_call_us': 100.0}}}, 0.5)) == 1
@@ -0,0 +1,40 @@
+import os
+from unittest import mock
+
+import requests
+
+from benchmarks.mock_api_server import MockConfig, env_for, start_server
+
+
+def test_tools_hit_mock_server_deterministically():
+    from agents.tools.flights_finder import flights_finder
+    from agents.tools.weather import weather_tool
+
+    server = start_server(config=MockConfig(seed=7))
+    try:
+        with mock.patch.dict(os.environ, env_for(server)):
+            args = {'params': {'departure_airport': 'MAD', 'arrival_airport': 'JFK',
+                               'outbound_date': '2025-10-01', 'return_date': '2025-10-07'}}
+            first = flights_finder.invoke(args)
+            assert first == flights_finder.invoke(args)
+            assert first[0]['flights'][0]['departure_airport']['id'] == 'MAD'
+            assert weather_tool.invoke({'params': {'location': 'Paris'}})['temperature_c'] is not None
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_hotel_pagination_and_rate_limit():
+    server = start_server(config=MockConfig(hotels_per_city=30, rate_limit=1, burst=2))
+    try:
+        params = {'engine': 'google_hotels', 'q': 'Rome', 'check_in_date': '2025-11-03',
+                  'check_out_date': '2025-11-06'}
+        page = requests.get(server.base_url + '/search.json', params=params, timeout=5).json()
+        assert len(page['properties']) == 20
+        token = page['serpapi_pagination']['next_page_token']
+        rest = requests.get(server.base_url + '/search.json', params=dict(params, next_page_token=token), timeout=5)
+        assert len(rest.json()['properties']) == 10 and 'next_page_token' not in rest.json()['serpapi_pagination']
+        assert requests.get(server.base_url + '/search.json', params=params, timeout=5).status_code == 429
+    finally:
+        server.shutdown()
+        server.server_close()
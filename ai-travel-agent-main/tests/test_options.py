@@ -0,0 +1,37 @@
+import json
+import tracemalloc
+
+import numpy as np
+
+from agents.optimizer.cost_optimizer import recommend
+from agents.optimizer.options import FlightOption, flight_options, hotel_options, parse_price, to_columns
+from benchmarks.replay import FIXTURES_DIR
+
+FIXTURES = json.loads((FIXTURES_DIR / 'serpapi.json').read_text(encoding='utf-8'))
+
+
+def test_prices_are_parsed_from_provider_formats():
+    assert parse_price('$1,234') == 1234.0 and parse_price('1.234,50 €') == 1234.5
+    assert parse_price('USD 99') == 99.0 and parse_price(702) == 702.0 and parse_price('4.5') == 4.5
+    assert parse_price('n/a') is None and parse_price(None) is None
+
+
+def test_records_rank_on_numpy_columns_and_keep_a_fraction_of_the_payload():
+    flights = flight_options([{'price': '$1,234', 'flights': [{'airline': 'Iberia'}]},
+                              {'price': '$650', 'flights': [{'airline': 'Iberia'}, {}]}, {'price': None}])
+    cols = to_columns(flights)
+    assert cols['price'].dtype == np.float64 and np.isnan(cols['price'][2]) and list(cols['stops']) == [0, 1, 0]
+    best = recommend(flights, budget=700)
+    assert best['price'] == 650.0 and best['within_budget'] and best['stops'] == 1
+    assert recommend(flights, budget=100)['within_budget'] is False
+
+    payloads = [json.dumps(FIXTURES[k]) for k in ('google_flights|mad|jfk|', 'google_hotels|||new york')] * 50
+    tracemalloc.start()
+    raw = [json.loads(p) for p in payloads]
+    raw_bytes = tracemalloc.get_traced_memory()[0]
+    records = [flight_options(r.get('best_flights', []) + r.get('other_flights', [])) or hotel_options(r['properties'])
+               for r in raw]
+    del raw
+    record_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert isinstance(records[0][0], FlightOption) and record_bytes * 8 < raw_bytes
@@ -0,0 +1,77 @@
+import os
+from unittest import mock
+
+import pytest
+
+from cryptography.fernet import Fernet
+
+from agents.storage.payload_cache import ZLIB, PayloadCache
+
+HOTELS = {'properties': [{'name': f'Hotel {i}', 'rate_per_night': {'lowest': f'${100 + i}'}} for i in range(50)]}
+
+
+def test_payloads_are_encrypted_deduplicated_and_survive_reopening(tmp_path):
+    with mock.patch.dict(os.environ, {'FERNET_KEY': Fernet.generate_key().decode()}):
+        cache = PayloadCache(str(tmp_path), codec=ZLIB)
+        digest = cache.put_json('hotels|paris|2025-11-03', HOTELS)
+        assert cache.put_json('hotels|paris|2025-11-03|retry', HOTELS) == digest
+        big = os.urandom(100_000)
+        cache.put('blob', big)
+        cache.close()
+        assert cache.stats['deduplicated'] == 1 and cache.compression_ratio() > 1
+
+        stored = b''.join(p.read_bytes() for p in (tmp_path / 'objects').rglob('*') if p.is_file())
+        assert b'Hotel' not in stored and b'paris' not in (tmp_path / 'index.json').read_bytes()
+
+        (tmp_path / 'objects' / 'zz').mkdir()
+        (tmp_path / 'objects' / 'zz' / 'orphan').write_bytes(b'x')
+        reopened = PayloadCache(str(tmp_path))
+        assert reopened.get_json('hotels|paris|2025-11-03') == HOTELS and reopened.get('blob') == big
+        assert reopened.get_json('hotels|paris|2025-11-03', max_age_s=-1) is None
+        assert not (tmp_path / 'objects' / 'zz' / 'orphan').exists()
+
+
+def test_least_recently_used_entries_are_evicted_past_the_size_bound(tmp_path):
+    with mock.patch.dict(os.environ, {'FERNET_KEY': Fernet.generate_key().decode()}):
+        cache = PayloadCache(str(tmp_path), max_bytes=5000)
+        for i in range(4):
+            cache.put(f'k{i}', os.urandom(1000))
+            cache.get('k0')
+        cache.put('k4', os.urandom(1000))
+        assert cache.total_bytes <= 5000 and cache.stats['evicted'] >= 1
+        assert cache.get('k0') is not None and cache.get('k1') is None
+
+
+def test_a_directory_is_used_by_one_process_at_a_time(tmp_path):
+    with mock.patch.dict(os.environ, {'FERNET_KEY': Fernet.generate_key().decode()}):
+        cache = PayloadCache(str(tmp_path))
+        cache.put('k', b'payload')
+        # A second open file description stands in for another process: flock locks conflict between them.
+        with pytest.raises(RuntimeError, match='in use'):
+            PayloadCache(str(tmp_path))
+        cache.close()
+        assert PayloadCache(str(tmp_path)).get('k') == b'payload'
+
+
+def test_an_object_missing_on_read_counts_as_a_miss(tmp_path):
+    with mock.patch.dict(os.environ, {'FERNET_KEY': Fernet.generate_key().decode()}):
+        cache = PayloadCache(str(tmp_path))
+        digest = cache.put('k', b'payload')
+        cache._path(digest).unlink()
+        assert cache.get('k') is None
+        assert cache.stats['hits'] == 0 and cache.stats['misses'] == 1
+
+
+def test_cached_searches_do_not_enter_the_gateway(tmp_path):
+    from agents.storage import payload_cache
+    from agents.tools import endpoints
+
+    env = {'FERNET_KEY': Fernet.generate_key().decode(), 'PAYLOAD_CACHE_DIR': str(tmp_path)}
+    params = {'engine': 'google_hotels', 'q': 'Paris', 'api_key': 'secret'}
+    with mock.patch.dict(os.environ, env), mock.patch.dict(payload_cache._CACHE, clear=True), \
+            mock.patch.object(endpoints, '_serpapi_call', lambda base, p: mock.Mock(data=HOTELS)), \
+            mock.patch.object(endpoints, 'get_gateway', wraps=endpoints.get_gateway) as gateway:
+        assert endpoints.serpapi_search(params).data == HOTELS
+        assert endpoints.serpapi_search(dict(params, api_key='other')).data == HOTELS
+        assert gateway.call_count == 1
+        payload_cache._CACHE[str(tmp_path)].close()
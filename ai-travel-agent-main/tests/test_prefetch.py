@@ -0,0 +1,92 @@
+from datetime import date
+from types import SimpleNamespace
+from unittest import mock
+
+from agents.tools import prefetch, registry
+
+
+def test_query_is_parsed_into_the_calls_the_planner_makes():
+    query = prefetch.parse_query('I want to travel to New York from Madrid from October 1-7. '
+                                 'Find me flights and 4-star hotels.', today=date(2025, 9, 1))
+    calls = dict(prefetch.predict_calls(query))
+    assert calls['flights_finder']['params'] == {'departure_airport': 'MAD', 'arrival_airport': 'JFK',
+                                                 'outbound_date': '2025-10-01', 'return_date': '2025-10-07',
+                                                 'adults': 1}
+    assert calls['hotels_finder']['params']['q'] == 'New York'
+    assert calls['hotels_finder']['params']['hotel_class'] == '4'
+    # A date already past this year means next year's.
+    assert prefetch.parse_dates('from LHR on 3 Mar', today=date(2025, 9, 1)) == ('2026-03-03', None)
+
+
+def test_prefetched_search_answers_the_matching_tool_call():
+    searches = []
+
+    def search(params):
+        searches.append(params)
+        return SimpleNamespace(data={'best_flights': [{'price': 420}]})
+
+    before = registry.latency_stats()['flights_finder']
+    cache = registry.TurnCache()
+    with mock.patch('agents.tools.flights_finder.serpapi_search', search):
+        pending = prefetch.prefetch('Flights from MAD to JFK on 2025-10-01', cache)
+        with registry.turn_scope(cache):
+            result = registry.invoke_tool('flights_finder', {'params': {
+                'departure_airport': 'MAD', 'arrival_airport': 'JFK', 'outbound_date': '2025-10-01',
+                'return_date': None}})
+        assert pending.finish() == 0
+    after = registry.latency_stats()['flights_finder']
+    assert result == [{'price': 420}] and len(searches) == 1
+    assert after['prefetched'] - before['prefetched'] == 1 and after['calls'] == before['calls']
+
+
+def test_a_claimed_prefetch_that_failed_is_not_counted_as_used():
+    def failing_run(name, args, records):
+        raise RuntimeError('quota exceeded')
+
+    def search(params):
+        return SimpleNamespace(data={'best_flights': [{'price': 420}]})
+
+    before = prefetch.stats()
+    cache = registry.TurnCache()
+    with mock.patch.object(prefetch, '_run', failing_run), \
+            mock.patch('agents.tools.flights_finder.serpapi_search', search):
+        pending = prefetch.prefetch('Flights from MAD to JFK on 2025-10-01', cache)
+        with registry.turn_scope(cache):
+            result = registry.invoke_tool('flights_finder', {'params': {
+                'departure_airport': 'MAD', 'arrival_airport': 'JFK', 'outbound_date': '2025-10-01',
+                'return_date': None}})
+        assert pending.finish() == 1
+    after = prefetch.stats()
+    assert result == [{'price': 420}]
+    assert after['used'] == before['used'] and after['wasted'] == before['wasted'] + 1
+
+
+def test_only_prefetches_a_call_used_are_recorded():
+    recorded = []
+
+    def search(params):
+        return SimpleNamespace(data={'best_flights': [{'price': 420}]})
+
+    def keep(params, results):
+        recorded.append(params['arrival_id'])
+
+    with mock.patch('agents.tools.flights_finder.serpapi_search', search), \
+            mock.patch('agents.tools.flights_finder._record', keep):
+        unused = prefetch.prefetch('Flights from MAD to LHR on 2025-10-01', registry.TurnCache())
+        for future in unused.futures.values():
+            future.result()
+        assert unused.finish() == 1
+
+        cache = registry.TurnCache()
+        pending = prefetch.prefetch('Flights from MAD to JFK on 2025-10-01', cache)
+        with registry.turn_scope(cache):
+            registry.invoke_tool('flights_finder', {'params': {
+                'departure_airport': 'MAD', 'arrival_airport': 'JFK', 'outbound_date': '2025-10-01',
+                'return_date': None}})
+        assert recorded == []
+        assert pending.finish() == 0
+        # A search made for a real call is recorded straight away.
+        registry.invoke_tool('flights_finder', {'params': {
+            'departure_airport': 'MAD', 'arrival_airport': 'CDG', 'outbound_date': '2025-10-01',
+            'return_date': None}})
+    assert recorded == ['JFK', 'CDG']
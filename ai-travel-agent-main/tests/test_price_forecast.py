@@ -0,0 +1,87 @@
+import numpy as np
+
+from agents.pricing.price_forecast import PriceForecaster, forecast_price_trend
+from agents.pricing.price_history import PriceHistory, flight_observations
+
+
+def test_history_roundtrip(tmp_path):
+    h = PriceHistory(capacity=2)
+    h.append(['flight:MAD-JFK', 'flight:LHR-CDG', 'flight:MAD-JFK'], [702, 90.5, 680], observed_day=20000)
+    assert len(h) == 3 and h.price.dtype == np.float32
+    path = str(tmp_path / 'history.npz')
+    h.save(path)
+    days, prices = PriceHistory.load(path).series('flight:MAD-JFK')
+    assert list(prices) == [702, 680] and list(days) == [20000, 20000]
+
+
+def test_forecaster_advises_wait_on_falling_prices():
+    fc = PriceForecaster()
+    for d in range(30):
+        fc.observe(['flight:MAD-JFK', 'flight:LHR-CDG'], [900 - 15 * d, 200], observed_day=20000 + d)
+    falling = fc.advise('flight:MAD-JFK', 600)
+    assert falling['advice'] == 'wait'
+    low, high = falling['confidence_interval']
+    assert low <= falling['expected_price'] <= high < 600
+    assert fc.advise('flight:LHR-CDG', 200)['advice'] == 'buy'
+
+    batch = fc.forecast(np.array([0, 1]), horizon=5)
+    assert batch['mean'].shape == (2, 5)
+
+
+def test_forecast_price_trend_falls_back_without_history():
+    assert forecast_price_trend(50) == {'current_price': 50, 'advice': 'buy'}
+    assert forecast_price_trend(350, key='flight:NOPE-NOPE')['advice'] == 'consider_waiting'
+
+
+def test_flight_observations_keep_cheapest_fare():
+    keys, prices, _ = flight_observations('mad', 'jfk', '2025-10-01', [{'price': 702}, {'price': '$650'}])
+    assert keys == ['flight:MAD-JFK@2025-10-01'] and prices == [650.0]
+
+
+def test_searches_without_an_arrival_airport_are_not_recorded():
+    assert flight_observations('MAD', None, '2025-10-01', [{'price': 702}]) == ([], [], [])
+
+
+def test_history_is_saved_at_exit_when_a_path_is_set(tmp_path, monkeypatch):
+    from agents.pricing import price_forecast
+
+    path = str(tmp_path / 'history.npz')
+    saved = []
+    monkeypatch.setenv('PRICE_HISTORY_PATH', path)
+    monkeypatch.setattr(price_forecast, '_FORECASTER', {})
+    monkeypatch.setattr(price_forecast.atexit, 'register', lambda fn, *args, **kw: saved.append((fn, args, kw)))
+    fc = price_forecast.get_forecaster()
+    fc.observe(['flight:MAD-JFK'], [702], observed_day=20000)
+    [(fn, args, kw)] = saved
+    fn(*args, **kw)
+    assert list(PriceHistory.load(path).series('flight:MAD-JFK')[1]) == [702]
+
+
+def test_workers_saving_to_one_path_keep_each_others_rows(tmp_path):
+    path = str(tmp_path / 'history.npz')
+    first, second = PriceHistory(), PriceHistory()
+    first.append(['flight:MAD-JFK'], [702], observed_day=20000)
+    second.append(['hotel:noble'], [537], observed_day=20001)
+    first.save(path, merge=True)
+    second.save(path, merge=True)
+    first.save(path, merge=True)  # nothing new: no duplicates
+    merged = PriceHistory.load(path)
+    assert len(merged) == 2 and list(merged.series('hotel:noble')[0]) == [20001]
+
+
+def test_same_day_observations_are_one_point_at_the_days_minimum():
+    repeated, daily = PriceForecaster(), PriceForecaster()
+    for d in range(5):
+        repeated.observe(['k'], [500 + 10 * d], observed_day=20000 + d)
+        daily.observe(['k'], [500 + 10 * d], observed_day=20000 + d)
+    for price in (520, 700, 480, 490):
+        repeated.observe(['k'], [price], observed_day=20005)
+    daily.observe(['k'], [480], observed_day=20005)
+    assert repeated.n_obs[0] == 6
+    for name in ('level', 'trend', 'err_var'):
+        assert np.isclose(getattr(repeated, name)[0], getattr(daily, name)[0])
+    assert np.allclose(repeated.season[0], daily.season[0])
+
+    one_afternoon = PriceForecaster()
+    one_afternoon.observe(['k', 'k', 'k'], [900, 850, 800], observed_day=20000)
+    assert one_afternoon.advise('k', 800) is None
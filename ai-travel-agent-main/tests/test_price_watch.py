@@ -0,0 +1,62 @@
+from agents.scheduler.price_watch import FLIGHT, HOTEL, PriceWatchScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_identical_watches_share_one_call_and_fire_on_crossing():
+    clock = FakeClock()
+    prices = {'MAD': [700, 640, 600]}
+    calls = []
+
+    def fetch(kind, query):
+        calls.append(query['departure_airport'])
+        return prices[query['departure_airport']].pop(0)
+
+    sched = PriceWatchScheduler(fetch=fetch, clock=clock, base_interval=3600, min_interval=60)
+    query = {'departure_airport': 'MAD', 'arrival_airport': 'JFK', 'outbound_date': '2025-10-01'}
+    cheap = sched.register(FLIGHT, query, threshold=650, owner='u1')
+    sched.register(FLIGHT, dict(query), threshold=500, owner='u2')
+
+    assert sched.run_due() == [] and calls == ['MAD']
+    assert sched.run_due() == []  # not due again yet
+    clock.now += 4 * 3600
+    fired = sched.run_due()
+    assert [e['watch_id'] for e in fired] == [cheap] and fired[0]['price'] == 640
+    clock.now += 4 * 3600
+    assert sched.run_due() == []  # still below 650: no repeat notification
+    assert len(calls) == 3
+
+
+def test_rate_limit_bounds_calls_for_many_watches():
+    clock = FakeClock()
+    sched = PriceWatchScheduler(fetch=lambda kind, q: 100.0, clock=clock, max_calls_per_hour=120,
+                                batch_size=1000)
+    for i in range(100000):
+        sched.register(HOTEL, {'q': f'city-{i % 5000}', 'check_in_date': '2025-10-01'}, threshold=50)
+    assert len(sched) == 100000
+
+    for _ in range(60):
+        sched.run_due()
+        clock.now += 60
+    # One hour of polling: a full burst plus the hourly refill, never one call per watch.
+    assert sched.stats['calls'] <= 120 + 2
+    assert sched.stats['watches_checked'] == 20 * sched.stats['calls']
+
+
+def test_watch_joining_a_group_already_below_threshold_fires():
+    clock = FakeClock()
+    sched = PriceWatchScheduler(fetch=lambda kind, q: 600.0, clock=clock, base_interval=3600, min_interval=60)
+    query = {'departure_airport': 'MAD', 'arrival_airport': 'JFK', 'outbound_date': '2025-10-01'}
+    first = sched.register(FLIGHT, query, threshold=650, owner='u1')
+    assert [e['watch_id'] for e in sched.run_due()] == [first]
+
+    second = sched.register(FLIGHT, dict(query), threshold=650, owner='u2')
+    clock.now += 4 * 3600
+    fired = sched.run_due()
+    assert [e['watch_id'] for e in fired] == [second] and fired[0]['previous_price'] is None
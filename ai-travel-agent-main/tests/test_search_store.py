@@ -0,0 +1,70 @@
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from agents.storage.search_store import FLIGHTS, HOTELS, SearchStore
+
+FLIGHT = {
+    'flights': [
+        {'departure_airport': {'id': 'MAD', 'time': '2025-10-01 10:25'}, 'airline': 'Iberia',
+         'arrival_airport': {'id': 'LHR', 'time': '2025-10-01 12:00'}},
+        {'departure_airport': {'id': 'LHR', 'time': '2025-10-01 14:00'}, 'airline': 'Iberia',
+         'arrival_airport': {'id': 'JFK', 'time': '2025-10-01 17:25'}},
+    ],
+    'total_duration': 600,
+    'price': 702,
+}
+
+
+def test_flights_are_flattened_and_scanned_across_chunks(tmp_path):
+    store = SearchStore(str(tmp_path), chunk_rows=3)
+    params = {'departure_id': 'MAD', 'arrival_id': 'JFK', 'outbound_date': '2025-10-01'}
+    store.add_flights(params, [FLIGHT, dict(FLIGHT, price='$650')])
+    store.add_flights(dict(params, outbound_date='2025-11-01'), [dict(FLIGHT, price=500)])
+    store.add_flights({'departure_id': 'LHR', 'arrival_id': 'CDG', 'outbound_date': '2025-10-01'}, [FLIGHT])
+
+    reopened = SearchStore(str(tmp_path))
+    assert reopened.rows(FLIGHTS) == 3  # the LHR-CDG row is still buffered in `store`
+    store.flush()
+
+    reopened = SearchStore(str(tmp_path))
+    october = reopened.scan(FLIGHTS, key='mad-jfk', start='2025-10-01', end='2025-10-31')
+    assert october['price'].dtype == np.float32
+    assert sorted(october['price'].tolist()) == [650.0, 702.0]
+    assert october['stops'].tolist() == [1, 1]
+    assert reopened.strings.decode(int(october['arrival_airport'][0])) == 'JFK'
+    assert len(reopened.scan(FLIGHTS, key='MAD-JFK')['price']) == 3
+    assert len(reopened.scan(FLIGHTS, key='AAA-BBB')['price']) == 0
+
+
+def test_hotels_scan_by_location(tmp_path):
+    store = SearchStore(str(tmp_path))
+    prop = {'name': 'NobleDen Hotel', 'rate_per_night': {'extracted_lowest': 537},
+            'total_rate': {'extracted_lowest': 3223}, 'extracted_hotel_class': 4, 'overall_rating': 4.5}
+    store.add_hotels({'q': 'New York', 'check_in_date': '2025-10-01', 'check_out_date': '2025-10-07'}, [prop])
+    rows = store.scan(HOTELS, key='new york', columns=['price', 'total_price', 'hotel_class'])
+    assert rows['price'].tolist() == [537.0] and rows['hotel_class'].tolist() == [4]
+
+
+def test_a_chunk_left_by_a_crash_does_not_block_later_flushes(tmp_path):
+    params = {'departure_id': 'MAD', 'arrival_id': 'JFK', 'outbound_date': '2025-10-01'}
+    (tmp_path / FLIGHTS / 'chunk_000001').mkdir(parents=True)  # written, but never indexed
+    store = SearchStore(str(tmp_path))
+    store.add_flights(params, [FLIGHT])
+    store.flush()
+    assert SearchStore(str(tmp_path)).rows(FLIGHTS) == 1
+
+    with mock.patch('agents.storage.search_store.np.save', side_effect=OSError('disk full')), \
+            pytest.warns(UserWarning, match='dropped 1 flights rows'):
+        store.add_flights(params, [FLIGHT])
+        store.flush()
+    assert store.rows(FLIGHTS) == 1 and not list((tmp_path / FLIGHTS).glob('.*.tmp'))
+
+
+def test_a_root_has_one_writer(tmp_path):
+    writer = SearchStore(str(tmp_path))
+    writer.claim()
+    # A second open file description stands in for another process: flock locks conflict between them.
+    with pytest.raises(RuntimeError, match='in use'):
+        SearchStore(str(tmp_path)).add_flights({'departure_id': 'MAD', 'arrival_id': 'JFK'}, [FLIGHT])
@@ -0,0 +1,38 @@
+import contextlib
+import io
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from langchain_core.messages import HumanMessage
+
+from agents import agent as agent_module
+from benchmarks.memory_bench import _SCRIPT
+from benchmarks.replay import LatencyModel, replay
+
+
+def test_sessions_share_one_agent_and_stay_apart_by_thread_id():
+    queries = [f'Trip idea {i}' for i in range(8)]
+    with mock.patch.dict(os.environ, {'OPENAI_API_KEY': 'test'}), \
+            replay(_SCRIPT, latency=LatencyModel(scale=0)), contextlib.redirect_stdout(io.StringIO()):
+        def session(query):
+            shared = agent_module.get_agent()
+            config = {'configurable': {'thread_id': uuid.uuid4().hex}}
+            shared.graph.invoke({'messages': [HumanMessage(content=query)]}, config=config)
+            return shared, shared.graph.get_state(config).values['messages']
+
+        with ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(session, queries))
+    assert len({id(shared) for shared, _ in results}) == 1
+    assert [messages[0].content for _, messages in results] == queries
+    assert all(len(messages) == 2 for _, messages in results)
+
+
+def test_email_fields_come_from_the_run_config():
+    config = {'configurable': {'thread_id': 't', 'from_email': 'a@example.com', 'to_email': 'b@example.com',
+                               'email_subject': 'Trip'}}
+    with mock.patch.dict(os.environ, {'FROM_EMAIL': 'env@example.com', 'TO_EMAIL': 'env@example.com'}):
+        assert agent_module._email_fields(config) == {'from_email': 'a@example.com', 'to_emails': 'b@example.com',
+                                                      'subject': 'Trip'}
+        assert agent_module._email_fields({'configurable': {'thread_id': 't'}})['to_emails'] == 'env@example.com'
@@ -0,0 +1,28 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.startup_bench import LAZY_MODULES, compare, parse_importtime, slower
+
+
+def test_importing_agent_defers_heavy_dependencies():
+    code = ('import sys, agents.agent; '
+            f'print(",".join(m for m in {LAZY_MODULES!r} if m in sys.modules))')
+    out = subprocess.run([sys.executable, '-c', code], cwd=Path(__file__).parent.parent, capture_output=True,
+                         text=True, check=True).stdout.strip()
+    assert out == ''
+
+
+def test_parse_importtime():
+    stderr = ('import time: self [us] | cumulative | imported package\n'
+              'import time:       120 |        120 |   numpy.core\n'
+              'import time:       300 |        420 | numpy\n')
+    assert parse_importtime(stderr) == [('numpy.core', 120, 120, 1), ('numpy', 300, 420, 0)]
+
+
+def test_only_eager_heavy_imports_fail_the_run():
+    report = {'eager_heavy': [], 'import_total_ms': 900.0, 'first_agent_ms': 400.0}
+    baseline = {'import_total_ms': 300.0, 'first_agent_ms': 400.0}
+    assert compare(report) == []
+    assert slower(report, baseline, 0.5) == ['import_total_ms 900ms > baseline 300ms (+50%)']
+    assert compare(dict(report, eager_heavy=['numpy'])) == ['agents.agent imports numpy eagerly']
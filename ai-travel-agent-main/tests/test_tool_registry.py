@@ -0,0 +1,25 @@
+import os
+from unittest import mock
+
+from agents.tools import registry
+from agents.tools.weather import WeatherInput
+
+
+def test_equivalent_calls_share_one_execution_per_turn():
+    before = registry.latency_stats()['weather_tool']
+    with mock.patch.dict(os.environ, {'WEATHER_API_KEY': '', 'OPENWEATHER_API_KEY': ''}):
+        with registry.turn_scope(registry.TurnCache()):
+            first = registry.invoke_tool('weather_tool', {'params': WeatherInput(location='Paris', date='2025-11-03')})
+            again = registry.invoke_tool('weather_tool', {'params': {'location': 'Paris', 'date': '2025-11-03'}})
+        outside = registry.invoke_tool('weather_tool', {'params': {'location': 'Paris', 'date': '2025-11-03'}})
+    after = registry.latency_stats()['weather_tool']
+    assert again is first and outside == first
+    assert after['calls'] - before['calls'] == 2 and after['reused'] - before['reused'] == 1
+    assert after['p50_ms'] is not None
+
+
+def test_covering_tools_run_first_and_are_described_to_the_planner():
+    names = ['hotels_finder', 'itinerary_builder', 'weather_tool']
+    assert registry.execution_order(names) == [1, 0, 2]
+    hints = registry.planner_hints()
+    assert 'itinerary_builder' in hints and 'covers flights_finder, hotels_finder, weather_tool' in hints
@@ -0,0 +1,92 @@
+from agents.tracing import tracer
+
+
+def test_nested_spans_and_chrome_export():
+    tracer.clear()
+    tracer.configure(enabled=True, sample_rate=1.0)
+    with tracer.span('node.invoke_tools'):
+        with tracer.span('tool.flights_finder', args_chars=10) as s:
+            s.set(result_chars=42)
+    spans = tracer.finished_spans()
+    assert [s.name for s in spans] == ['tool.flights_finder', 'node.invoke_tools']
+    child, root = spans
+    assert child.parent_id == root.span_id and child.trace_id == root.trace_id
+    assert child.attrs['result_chars'] == 42
+
+    events = tracer.to_chrome_trace()['traceEvents']
+    assert events[0]['ph'] == 'X' and events[0]['args']['args_chars'] == 10
+    otlp = tracer.to_otlp()['resourceSpans'][0]['scopeSpans'][0]['spans']
+    assert otlp[0]['parentSpanId'] == root.span_id
+
+
+def test_sampled_out_trace_records_nothing():
+    tracer.clear()
+    tracer.configure(sample_rate=0.0)
+    try:
+        with tracer.span('node.call_tools_llm'):
+            with tracer.span('llm.invoke') as s:
+                s.set(total_tokens=10)
+        assert tracer.finished_spans() == []
+    finally:
+        tracer.configure(sample_rate=1.0)
+
+
+def test_finished_traces_go_to_the_exporter():
+    import threading
+
+    tracer.clear()
+    exported, done = [], threading.Event()
+    tracer.set_exporter(lambda spans: (exported.append(spans), done.set()))
+    try:
+        with tracer.span('plan'):
+            with tracer.span('node.invoke_tools'):
+                pass
+        assert done.wait(5)
+    finally:
+        tracer.set_exporter(None)
+    [spans] = exported
+    assert [s.name for s in spans] == ['node.invoke_tools', 'plan']
+
+
+def test_agent_turn_is_one_trace():
+    import contextlib
+    import io
+    import os
+    import uuid
+    from unittest import mock
+
+    from langchain_core.messages import HumanMessage
+
+    from agents.agent import get_agent
+    from benchmarks.memory_bench import _SCRIPT
+    from benchmarks.replay import LatencyModel, replay
+
+    tracer.clear()
+    tracer.configure(enabled=True, sample_rate=1.0)
+    with mock.patch.dict(os.environ, {'OPENAI_API_KEY': 'test'}), \
+            replay(_SCRIPT, latency=LatencyModel(scale=0)), contextlib.redirect_stdout(io.StringIO()):
+        get_agent().invoke({'messages': [HumanMessage(content='Hi')]},
+                           {'configurable': {'thread_id': uuid.uuid4().hex}})
+    spans = tracer.finished_spans()
+    roots = [s for s in spans if s.parent_id is None]
+    assert [s.name for s in roots] == ['plan']
+    assert {s.trace_id for s in spans} == {roots[0].trace_id} and len(spans) > 1
+
+
+def test_an_unusable_exporter_setting_warns_and_traces_in_memory():
+    import warnings
+
+    tracer.clear()
+    errors = tracer.export_errors()
+    tracer._EXPORT['spec'] = 'nosuch.mod:fn'
+    try:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            with tracer.span('plan'):
+                pass
+            with tracer.span('plan'):
+                pass
+    finally:
+        tracer.set_exporter(None)
+    assert [str(w.message).split(' cannot')[0] for w in caught] == ["TRACE_EXPORTER='nosuch.mod:fn'"]
+    assert tracer.export_errors() == errors + 1 and len(tracer.finished_spans()) == 2
@@ -0,0 +1,90 @@
+import datetime
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
+
+from agents.tools import weather
+
+START = datetime.datetime(2025, 11, 3, tzinfo=datetime.timezone.utc)
+
+
+def _http_get(requests):
+    # Five days of 3-hourly points from 2025-11-03 00:00 UTC, in a city at UTC+1.
+    def http_get(provider, path, params=None, timeout=10):
+        requests.append((path, params['q']))
+        points = [{'dt': int((START + datetime.timedelta(hours=3 * i)).timestamp()),
+                   'main': {'temp': 10 + i % 8}, 'pop': 0.1 * (i % 8),
+                   'weather': [{'description': 'light rain' if i % 8 == 4 else 'clear sky'}]} for i in range(40)]
+        data = {'list': points, 'city': {'name': params['q'], 'timezone': 3600}}
+        return SimpleNamespace(json=lambda: data, raise_for_status=lambda: None)
+    return http_get
+
+
+def test_a_trip_and_later_lookups_for_the_city_come_from_one_request():
+    requests = []
+    weather.clear_grid()
+    with mock.patch.object(weather, 'http_get', _http_get(requests)), \
+            mock.patch.dict(os.environ, {'WEATHER_API_KEY': 'test'}):
+        trip = weather.weather_tool.invoke({'params': {'location': 'Paris', 'date': '2025-11-03',
+                                                       'end_date': '2025-11-06'}})
+        assert [d['date'] for d in trip['days']] == ['2025-11-03', '2025-11-04', '2025-11-05', '2025-11-06']
+        day = trip['days'][1]
+        # Points fall at 01:00, 04:00, ... local time; the one nearest midday (13:00) says 'light rain'.
+        assert day['forecast'] == 'light rain' and day['temp_min_c'] == 10 and day['temp_max_c'] == 17
+        assert day['precipitation_chance_pct'] == 70
+
+        same_city = weather.weather_tool.invoke({'params': {'location': ' PARIS ', 'date': '2025-11-05'}})
+        assert same_city == dict(trip['days'][2], location=' PARIS ')
+        # Past the forecast horizon: reported without a forecast, and not fetched again.
+        late = weather.weather_tool.invoke({'params': {'location': 'Paris', 'date': '2025-11-20'}})
+        assert late['forecast'] is None and late['note']
+
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda _: weather.forecast_range('paris', '2025-11-04', '2025-11-07', 'test'), range(32)))
+        assert requests == [('/data/2.5/forecast', 'paris')]
+
+        weather.weather_tool.invoke({'params': {'location': 'São Paulo', 'date': '2025-11-03'}})
+        weather.weather_tool.invoke({'params': {'location': 'sao paulo', 'date': '2025-11-04'}})
+        assert len(requests) == 2 and weather.normalize_city('São  Paulo, BR') == 'sao paulo,br'
+
+
+def test_cells_expire_sooner_for_nearer_days():
+    today = datetime.date(2025, 11, 3)
+    ttls = [weather.cell_ttl_s(f'2025-11-{d:02d}', today) for d in (2, 3, 4, 8)]
+    assert ttls[1] < ttls[2] < ttls[3] and ttls[0] == weather._PAST_TTL_S
+
+
+def test_stub_without_api_key():
+    with mock.patch.dict(os.environ, {}, clear=True):
+        trip = weather.weather_tool.invoke({'params': {'location': 'Paris', 'date': '2025-11-03',
+                                                       'end_date': '2025-11-04'}})
+        assert [d['date'] for d in trip['days']] == ['2025-11-03', '2025-11-04']
+        assert weather.weather_tool.invoke({'params': {'location': 'Paris', 'date': 'soon'}})['date'] == 'soon'
+
+
+def test_spellings_of_a_city_share_one_cold_request():
+    from agents.tools.gateway import Gateway, request_key
+
+    calls = []
+    release = threading.Event()
+
+    def fetch_get(provider, path, params=None, timeout=10):
+        def fetch():
+            release.wait(5)
+            return _http_get(calls)(provider, path, params, timeout)
+        return gateway.call(provider, request_key(path, params), fetch)
+
+    gateway = Gateway({})
+    weather.clear_grid()
+    with mock.patch.object(weather, 'http_get', fetch_get), mock.patch.dict(os.environ, {'WEATHER_API_KEY': 'test'}):
+        with ThreadPoolExecutor(2) as pool:
+            lookups = [pool.submit(weather.forecast_range, name, '2025-11-03', None, 'test')
+                       for name in ('Paris', ' PARIS ')]
+            time.sleep(0.1)
+            release.set()
+            results = [f.result() for f in lookups]
+    assert calls == [('/data/2.5/forecast', 'paris')]
+    assert results[0][0]['forecast'] == results[1][0]['forecast']